@@ -0,0 +1,111 @@
+"""
+Query latency with a per-request Chroma client vs the shared ChromaClientManager.
+
+Builds a persistent collection of 100k chunks with random vectors in a temporary
+directory, then times similarity searches through both paths. A fixed random
+embedding function is used so the numbers reflect client/collection overhead,
+not model inference.
+
+Usage (from Backend/):
+    python -m benchmarks.bench_chroma_client --chunks 100000 --queries 200
+"""
+from src.vectorstorage.chroma_client import ChromaClientManager
+from langchain_core.embeddings import Embeddings
+from langchain_chroma import Chroma
+from chromadb.config import Settings
+import numpy as np
+import statistics
+import argparse
+import tempfile
+import chromadb
+import time
+
+
+class RandomEmbeddings(Embeddings):
+    def __init__(self, dim: int, seed: int = 0):
+        self.dim = dim
+        self.rng = np.random.default_rng(seed)
+
+    def _vector(self):
+        v = self.rng.standard_normal(self.dim).astype(np.float32)
+        return (v / np.linalg.norm(v)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector() for _ in texts]
+
+    def embed_query(self, text):
+        return self._vector()
+
+
+def build_collection(path: str, name: str, chunks: int, dim: int, batch: int = 5000):
+    client = chromadb.PersistentClient(path=path, settings=Settings(anonymized_telemetry=False))
+    collection = client.get_or_create_collection(name)
+    rng = np.random.default_rng(1)
+    for start in range(0, chunks, batch):
+        n = min(batch, chunks - start)
+        vectors = rng.standard_normal((n, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        collection.add(
+            ids=[f"chunk-{i}" for i in range(start, start + n)],
+            embeddings=vectors,
+            documents=[f"document chunk {i}" for i in range(start, start + n)],
+            metadatas=[{"source": f"file-{i % 100}.txt"} for i in range(start, start + n)],
+        )
+        print(f"  inserted {start + n}/{chunks}", end="\r")
+    print()
+
+
+def per_request_query(path: str, name: str, embeddings: Embeddings, k: int):
+    """The old get_vectorstore path: new client and wrapper for every request."""
+    client = chromadb.PersistentClient(
+        path=path,
+        settings=Settings(anonymized_telemetry=False, allow_reset=True, is_persistent=True)
+    )
+    store = Chroma(client=client, embedding_function=embeddings, collection_name=name)
+    return store.similarity_search("benchmark query", k=k)
+
+
+def report(label: str, timings):
+    timings = sorted(timings)
+    p50 = statistics.median(timings) * 1000
+    p99 = timings[int(len(timings) * 0.99) - 1] * 1000
+    print(f"{label:<28} p50 {p50:8.2f} ms   p99 {p99:8.2f} ms   mean {statistics.mean(timings) * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    name = "bench_collection"
+    embeddings = RandomEmbeddings(args.dim)
+    with tempfile.TemporaryDirectory() as path:
+        print(f"Building collection with {args.chunks} chunks ({args.dim}d) in {path}")
+        build_collection(path, name, args.chunks, args.dim)
+
+        # Warm the HNSW index once so neither path pays the first segment load
+        per_request_query(path, name, embeddings, args.top_k)
+
+        before = []
+        for _ in range(args.queries):
+            start = time.perf_counter()
+            per_request_query(path, name, embeddings, args.top_k)
+            before.append(time.perf_counter() - start)
+
+        manager = ChromaClientManager(path)
+        after = []
+        for _ in range(args.queries):
+            start = time.perf_counter()
+            manager.get_vectorstore(name, embeddings).similarity_search("benchmark query", k=args.top_k)
+            after.append(time.perf_counter() - start)
+
+        report("per-request client (before)", before)
+        report("shared client (after)", after)
+        print(f"speedup (p50): {statistics.median(before) / statistics.median(after):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
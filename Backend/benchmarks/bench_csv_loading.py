@@ -0,0 +1,97 @@
+"""
+CSV ingestion: the old row-at-a-time path (whole file in a DataFrame, one
+line per row via iterrows) vs CsvDocumentStream (chunked parse, vectorized
+rendering, size-targeted documents).
+
+Writes a synthetic CSV (1,000,000 rows by default) unless --csv is given and
+runs each mode in its own process, reporting wall time, rows/s, documents
+and peak RSS, so the memory column shows whether it grows with the file.
+
+Usage (from Backend/):
+    python -m benchmarks.bench_csv_loading --rows 1000000
+    python -m benchmarks.bench_csv_loading --csv /path/to/large.csv --modes stream
+"""
+import argparse
+import subprocess
+import resource
+import tempfile
+import random
+import json
+import time
+import sys
+import os
+
+WORDS = ("vector index query chunk model token embedding latency batch corpus "
+         "retrieval document collection search memory throughput cache").split()
+
+
+def write_csv(path: str, rows: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("id,title,score,notes,category\n")
+        for i in range(rows):
+            notes = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 20)))
+            if i % 7 == 0:
+                notes = f'"{notes}, with a comma"'
+            f.write(f"{i},{rng.choice(WORDS)} {rng.choice(WORDS)},{rng.random():.4f},{notes},{rng.choice(WORDS)}\n")
+
+
+def run_rows(path: str) -> int:
+    import pandas as pd
+    df = pd.read_csv(path)
+    docs = 0
+    lines = [",".join(df.columns)]
+    for _, row in df.iterrows():
+        lines.append(",".join(str(val) for val in row))
+        if len(lines) == 20:
+            docs += 1
+            lines = lines[:1]
+    return docs + (len(lines) > 1)
+
+
+def run_stream(path: str) -> int:
+    from src.data.dataIntake.fileTypes.loadX import CsvDocumentStream
+    return sum(1 for _ in CsvDocumentStream(path))
+
+
+def measure(mode: str, path: str) -> None:
+    start = time.perf_counter()
+    docs = {"rows": run_rows, "stream": run_stream}[mode](path)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"docs": docs, "seconds": time.perf_counter() - start, "peak_mb": peak_kb / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=None, help="existing CSV to load instead of a generated one")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--modes", default="rows,stream", help="comma-separated: rows, stream")
+    parser.add_argument("--measure", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure, args.csv)
+        return
+
+    with tempfile.TemporaryDirectory() as work:
+        path = args.csv
+        rows = args.rows
+        if path is None:
+            path = os.path.join(work, "bench.csv")
+            write_csv(path, rows)
+        else:
+            with open(path, "rb") as f:
+                rows = sum(1 for _ in f) - 1
+        print(f"{path}: {rows} rows, {os.path.getsize(path) / (1024 * 1024):.1f}MB")
+
+        print(f"{'mode':<8} {'docs':>9} {'total s':>8} {'rows/s':>10} {'peak MB':>8}")
+        for mode in args.modes.split(","):
+            out = subprocess.run([sys.executable, "-m", "benchmarks.bench_csv_loading", "--measure", mode, "--csv", path],
+                                 capture_output=True, text=True, check=True).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            print(f"{mode:<8} {result['docs']:>9} {result['seconds']:>8.2f} "
+                  f"{rows / result['seconds']:>10.0f} {result['peak_mb']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
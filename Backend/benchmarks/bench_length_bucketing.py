@@ -0,0 +1,102 @@
+"""
+Embedding throughput with and without length bucketing on a mixed-length corpus.
+
+Generates a corpus where short chunks (titles, list items) are interleaved with
+full-size chunks, cuts it into batches the way IngestPipeline does, once in
+arrival order (--window 1) and once with a sorted bucketing window, and encodes
+every batch on CPU. Alongside docs/s it reports padding efficiency: real tokens
+divided by padded tokens over the model's own sub-batches, which is where the
+saving comes from.
+
+sentence-transformers already sorts texts by length inside a single encode
+call, so the gain measured here is from bucketing across a window larger than
+one pipeline batch.
+
+Usage (from Backend/):
+    python -m benchmarks.bench_length_bucketing --docs 4000 --window 4
+"""
+from src.vectorstorage.embeddings import IngestProgress, embed_texts
+from src.vectorstorage.pipeline import IngestPipeline
+from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.documents import Document
+from types import SimpleNamespace
+import numpy as np
+import argparse
+import time
+
+WORDS = ("vector index query chunk model token embedding latency batch corpus "
+         "retrieval document collection search memory throughput cache").split()
+
+
+def build_corpus(n: int, seed: int = 0):
+    """Roughly a third short chunks, a third medium and a third near the splitter's 1000 chars."""
+    rng = np.random.default_rng(seed)
+    docs = []
+    for i in range(n):
+        words = int(rng.choice([rng.integers(3, 15), rng.integers(40, 80), rng.integers(140, 170)]))
+        text = " ".join(rng.choice(WORDS, size=words))
+        docs.append(Document(page_content=text, metadata={"source": f"file-{i % 50}.txt", "i": i}))
+    return docs
+
+
+def cut(docs, batch_size: int, window: int):
+    pipeline = IngestPipeline(SimpleNamespace(embeddings=None), IngestProgress(), batch_size=batch_size, bucket_window=window)
+    batches = []
+    step = batch_size * window
+    for start in range(0, len(docs), step):
+        batches.extend(pipeline._cut_batches(docs[start:start + step]))
+    return batches
+
+
+def padding_efficiency(tokenizer, batches, sub_batch: int, max_length: int):
+    """Mirror sentence-transformers: sort each call by length, pad each sub-batch to its longest text."""
+    real = padded = 0
+    for batch in batches:
+        lengths = sorted(min(max_length, len(ids)) for ids in tokenizer([d.page_content for d in batch])["input_ids"])
+        for start in range(0, len(lengths), sub_batch):
+            group = lengths[start:start + sub_batch]
+            real += sum(group)
+            padded += max(group) * len(group)
+    return real / padded
+
+
+def run(embeddings, batches):
+    start = time.perf_counter()
+    for batch in batches:
+        embed_texts(embeddings, batch)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--docs", type=int, default=4000)
+    parser.add_argument("--batch-size", type=int, default=128, help="documents per pipeline batch")
+    parser.add_argument("--sub-batch", type=int, default=32, help="encode batch size inside the model")
+    parser.add_argument("--window", type=int, default=4, help="pipeline batches per bucketing window")
+    args = parser.parse_args()
+
+    embeddings = HuggingFaceEmbeddings(
+        model_name=args.model,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"batch_size": args.sub_batch, "normalize_embeddings": True},
+    )
+    tokenizer = embeddings._client.tokenizer
+    max_length = embeddings._client.max_seq_length
+    docs = build_corpus(args.docs)
+    embed_texts(embeddings, docs[:64])  # warm up
+
+    results = {}
+    for label, window in (("arrival order", 1), (f"bucketed (window {args.window})", args.window)):
+        batches = cut(docs, args.batch_size, window)
+        efficiency = padding_efficiency(tokenizer, batches, args.sub_batch, max_length)
+        seconds = run(embeddings, batches)
+        results[label] = seconds
+        print(f"{label:<24} {len(docs) / seconds:8.1f} docs/s   padding efficiency {efficiency * 100:5.1f}%   {len(batches)} batches")
+
+    before, after = results.values()
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
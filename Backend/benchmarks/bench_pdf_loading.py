@@ -0,0 +1,100 @@
+"""
+PDF text extraction: serial (one thread, the old load_pdf) vs page-range
+shards across a process pool (PdfPageStream).
+
+Writes a synthetic text PDF (2,000 pages by default, a few hundred words
+each) unless --pdf is given, then reports wall time, time to the first page
+(when embedding can start) and pages/s for each mode.
+
+Usage (from Backend/):
+    python -m benchmarks.bench_pdf_loading --pages 2000 --workers 4 --shard 50
+    python -m benchmarks.bench_pdf_loading --pdf /path/to/large.pdf
+"""
+from src.data.dataIntake.fileTypes.loadX import PdfPageStream, extract_pdf_pages, count_pdf_pages
+import argparse
+import asyncio
+import tempfile
+import random
+import time
+import os
+
+WORDS = ("vector index query chunk model token embedding latency batch corpus "
+         "retrieval document collection search memory throughput cache").split()
+
+
+def write_text_pdf(path: str, pages: int, lines_per_page: int = 45, seed: int = 0) -> None:
+    """Minimal PDF with one Helvetica text block per page."""
+    rng = random.Random(seed)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        lines = [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(lines_per_page)]
+        text = "".join(f"({line}) Tj T* " for line in lines)
+        stream = f"BT /F1 10 Tf 12 TL 40 800 Td {text}ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % k for k in kids) + b"] /Count %d >>" % pages
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def serial(path: str):
+    start = time.perf_counter()
+    pages = extract_pdf_pages(path, 0, count_pdf_pages(path))
+    elapsed = time.perf_counter() - start
+    # Serial extraction hands over nothing until every page is done
+    return len(pages), elapsed, elapsed
+
+
+async def parallel(path: str, workers: int, shard: int):
+    start = time.perf_counter()
+    first = None
+    count = 0
+    async for _ in PdfPageStream(path, pages_per_shard=shard, workers=workers):
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    return count, time.perf_counter() - start, first
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", default=None, help="existing PDF to load instead of a generated one")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--shard", type=int, default=50, help="pages per worker task")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work:
+        path = args.pdf
+        if path is None:
+            path = os.path.join(work, "bench.pdf")
+            start = time.perf_counter()
+            write_text_pdf(path, args.pages)
+            print(f"Wrote {args.pages}-page PDF ({os.path.getsize(path) / (1024 * 1024):.1f}MB) in {time.perf_counter() - start:.1f}s")
+
+        print(f"{'mode':<28} {'pages':>6} {'total s':>8} {'first page s':>13} {'pages/s':>8}")
+        pages, total, first = serial(path)
+        print(f"{'serial':<28} {pages:>6} {total:>8.2f} {first:>13.2f} {pages / total:>8.1f}")
+        # Run twice: the first parallel run also pays for starting the pool
+        for label in ("parallel (cold pool)", "parallel (warm pool)"):
+            pages, total, first = asyncio.run(parallel(path, args.workers, args.shard))
+            name = f"{label} x{args.workers}"
+            print(f"{name:<28} {pages:>6} {total:>8.2f} {first:>13.2f} {pages / total:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
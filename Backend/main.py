@@ -4,13 +4,21 @@ from src.authentication.token import verify_token, verify_token_or_api_key
 from src.data.database.checkAPIKey import check_api_key
 from src.data.dataFetch.youtube import youtube_transcript
 from src.endpoint.deleteStore import delete_vectorstore_collection
-from src.endpoint.models import EmbeddingRequest, QueryRequest, ChatCompletionRequest, VectorStoreQueryRequest, DeleteCollectionRequest, YoutubeTranscriptRequest, WebCrawlRequest, ModelLoadRequest
+from src.endpoint.models import EmbeddingRequest, BulkEmbeddingRequest, QueryRequest, ChatCompletionRequest, VectorStoreQueryRequest, BatchVectorStoreQueryRequest, CompactCollectionRequest, ExportCollectionRequest, ImportCollectionRequest, DeleteCollectionRequest, YoutubeTranscriptRequest, WebCrawlRequest, ModelLoadRequest
 from src.endpoint.embed import embed
-from src.endpoint.vectorQuery import query_vectorstore
+from src.endpoint.bulkEmbed import bulk_embed
+from src.endpoint.vectorQuery import query_vectorstore, query_vectorstore_batch
 from src.endpoint.devApiCall import rag_call, llm_call, vector_call
 from src.endpoint.transcribe import transcribe_audio
 from src.endpoint.webcrawl import webcrawl
 from src.models.manager import model_manager
+from src.vectorstorage.embedding_registry import embedding_registry
+from src.vectorstorage.query_cache import query_cache
+from src.vectorstorage.reranker import reranker
+from src.vectorstorage.compaction import compactor
+from src.vectorstorage.collection_archive import export_collection, import_collection
+from src.vectorstorage.helpers.sanitizeCollectionName import sanitize_collection_name
+from src.vectorstorage.warmup import WARMUP_ENABLED, collection_usage, warmup
 from fastapi import FastAPI, Depends, File, UploadFile, Request, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse, JSONResponse
@@ -42,6 +50,19 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+
+@app.on_event("startup")
+async def start_warmup():
+    # Preload hot collections and their embedding models so the first query doesn't pay for it
+    if WARMUP_ENABLED:
+        warmup.start()
+
+
+@app.on_event("shutdown")
+async def flush_collection_usage():
+    collection_usage.flush()
+
+
 # Configure FastAPI app settings for long-running requests
 
 
@@ -222,7 +243,7 @@ async def add_embedding(data: EmbeddingRequest, user_id: str = Depends(verify_to
 
                 if result["status"] == "progress":
                     progress_data = result["data"]
-                    yield f"data: {{'type': 'progress', 'chunk': {progress_data['chunk']}, 'totalChunks': {progress_data['total_chunks']}, 'percent_complete': '{progress_data['percent_complete']}', 'est_remaining_time': '{progress_data['est_remaining_time']}'}}\n\n"
+                    yield f"data: {{'type': 'progress', 'chunk': {progress_data['chunk']}, 'totalChunks': {progress_data['total_chunks']}, 'percent_complete': '{progress_data['percent_complete']}', 'est_remaining_time': '{progress_data['est_remaining_time']}', 'embed_rate': {progress_data.get('embed_rate', 0)}, 'write_rate': {progress_data.get('write_rate', 0)}}}\n\n"
                 else:
                     yield f"data: {{'type': '{result['status']}', 'message': '{result['message']}'}}\n\n"
                 await asyncio.sleep(0.1)  # Prevent overwhelming the connection
@@ -249,6 +270,57 @@ async def add_embedding(data: EmbeddingRequest, user_id: str = Depends(verify_to
     return response
 
 
+@app.post("/embed-bulk")
+async def add_embeddings_bulk(data: BulkEmbeddingRequest, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    global embedding_task, embedding_event
+
+    if embedding_task is not None:
+        return {"status": "error", "message": "An embedding process is already running"}
+
+    embedding_event = asyncio.Event()
+
+    async def event_generator():
+        global embedding_task, embedding_event
+        try:
+            async for result in bulk_embed(data):
+                if embedding_event.is_set():
+                    yield f"data: {{'type': 'cancelled', 'message': 'Embedding process cancelled'}}\n\n"
+                    break
+
+                if result["status"] == "progress":
+                    progress_data = result["data"]
+                    yield f"data: {{'type': 'progress', 'chunk': {progress_data['chunk']}, 'totalChunks': {progress_data['total_chunks']}, 'percent_complete': '{progress_data['percent_complete']}', 'est_remaining_time': '{progress_data['est_remaining_time']}', 'embed_rate': {progress_data.get('embed_rate', 0)}, 'write_rate': {progress_data.get('write_rate', 0)}, 'files_total': {progress_data.get('files_total', 0)}, 'files_done': {progress_data.get('files_done', 0)}, 'files_failed': {progress_data.get('files_failed', 0)}, 'files_skipped': {progress_data.get('files_skipped', 0)}}}\n\n"
+                elif result["status"] == "file":
+                    file_data = result["data"]
+                    yield f"data: {{'type': 'file', 'file': '{file_data['file']}', 'state': '{file_data['state']}', 'chunks': {file_data['chunks']}, 'message': '{file_data['message']}'}}\n\n"
+                else:
+                    yield f"data: {{'type': '{result['status']}', 'message': '{result['message']}'}}\n\n"
+                # Per-file events can be frequent, so no per-event delay here
+                await asyncio.sleep(0)
+        except Exception as e:
+            logger.error(f"Error in bulk embedding process: {str(e)}")
+            yield f"data: {{'type': 'error', 'message': '{str(e)}'}}\n\n"
+        finally:
+            embedding_task = None
+            embedding_event = None
+            logger.info("Bulk embedding task cleanup completed")
+
+    response = StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream"
+    )
+
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["Connection"] = "keep-alive"
+    response.headers["X-Accel-Buffering"] = "no"
+    response.headers["Transfer-Encoding"] = "chunked"
+
+    embedding_task = asyncio.create_task(event_generator().__anext__())
+    return response
+
+
 @app.post("/youtube-ingest")
 async def youtube_ingest(data: YoutubeTranscriptRequest, user_id: str = Depends(verify_token)):
     if user_id is None:
@@ -286,6 +358,7 @@ async def restart_server(user_id: str = Depends(verify_token)):
         return {"status": "error", "message": "Unauthorized"}
 
     def restart():
+        collection_usage.flush()
         pid = os.getpid()
         parent = psutil.Process(pid)
         # Kill all child processes
@@ -313,6 +386,82 @@ async def vector_query(data: VectorStoreQueryRequest, user_id: str = Depends(ver
         return {"status": "error", "message": str(e)}
 
 
+@app.post("/vector-query-batch")
+async def vector_query_batch(data: BatchVectorStoreQueryRequest, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    try:
+        # Encoding hundreds of queries takes a while, keep the event loop free
+        return await asyncio.to_thread(query_vectorstore_batch, data)
+    except Exception as e:
+        print(f"Error querying vectorstore: {str(e)}")
+        return {"status": "error", "message": str(e)}
+
+
+@app.get("/vectorstore-stats")
+async def vectorstore_stats(user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    return {
+        "status": "success",
+        "embedding_models": embedding_registry.stats(),
+        "query_cache": query_cache.stats(),
+        "reranker": reranker.stats()
+    }
+
+
+@app.get("/ready")
+async def ready(user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    return {"status": "success", "warmup": warmup.status()}
+
+
+@app.post("/compact-collection")
+async def compact_collection(data: CompactCollectionRequest, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    collection_name = sanitize_collection_name(str(data.collection_name))
+    if not compactor.start(collection_name):
+        return {"status": "error", "message": "Compaction already running"}
+    return {"status": "success", "message": "Compaction started", "collection_name": collection_name}
+
+
+@app.get("/compaction-status")
+async def compaction_status(collection_name: str = None, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    if collection_name is not None:
+        collection_name = sanitize_collection_name(collection_name)
+    return {"status": "success", "compaction": compactor.status(collection_name)}
+
+
+@app.post("/export-collection")
+async def export_collection_archive(data: ExportCollectionRequest, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    try:
+        collection_name = sanitize_collection_name(str(data.collection_name))
+        manifest = await asyncio.to_thread(export_collection, collection_name, data.archive_path)
+        return {"status": "success", "count": manifest["count"], "dim": manifest["dim"], "archive_path": data.archive_path}
+    except Exception as e:
+        print(f"Error exporting collection: {str(e)}")
+        return {"status": "error", "message": str(e)}
+
+
+@app.post("/import-collection")
+async def import_collection_archive(data: ImportCollectionRequest, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    try:
+        collection_name = sanitize_collection_name(str(data.collection_name)) if data.collection_name else None
+        result = await asyncio.to_thread(import_collection, data.archive_path, collection_name, bool(data.replace))
+        return {"status": "success", **result}
+    except Exception as e:
+        print(f"Error importing collection: {str(e)}")
+        return {"status": "error", "message": str(e)}
+
+
 @app.post("/delete-collection")
 async def delete_collection(data: DeleteCollectionRequest, user_id: str = Depends(verify_token)):
     if user_id is None:
@@ -2,6 +2,7 @@ import os
 from src.endpoint.models import YoutubeTranscriptRequest
 from src.vectorstorage.vectorstore import get_vectorstore
 from src.vectorstorage.helpers.sanitizeCollectionName import sanitize_collection_name
+from src.vectorstorage.embeddings import add_documents_dedup
 
 from langchain_core.documents import Document
 import yt_dlp
@@ -250,7 +251,7 @@ def youtube_transcript(request: YoutubeTranscriptRequest) -> Generator[dict, Non
 
             for i in range(0, len(documents), batch_size):
                 batch = documents[i:i + batch_size]
-                vectordb.add_documents(batch)
+                add_documents_dedup(vectordb, batch)
 
                 docs_processed += len(batch)
                 percent = 40 + ((docs_processed / total_docs)
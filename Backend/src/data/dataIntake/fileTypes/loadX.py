@@ -1,18 +1,115 @@
+import numpy as np
 import pandas as pd
 import json
 import markdown
 from bs4 import BeautifulSoup
 from pptx import Presentation
 from langchain_community.document_loaders import Docx2txtLoader
-from langchain_community.document_loaders.csv_loader import CSVLoader
 from pypdf import PdfReader
+from openpyxl import load_workbook
 from langchain_core.documents import Document
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+import multiprocessing
+import threading
 import logging
+import codecs
+import csv
+import io
 import os
 import asyncio
 
-
-async def load_pdf(file_path):
+# Pages per worker task when a PDF is extracted across processes
+PDF_PAGES_PER_SHARD = int(os.environ.get("NOTATE_PDF_PAGES_PER_SHARD", "50"))
+PDF_WORKERS = int(os.environ.get("NOTATE_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _get_pdf_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Shared process pool for PDF extraction, started on first use. Workers are
+    spawned rather than forked: forking the server while its embedding and
+    Chroma threads hold locks can leave a child deadlocked.
+    """
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pdf_pool
+
+
+def count_pdf_pages(file_path: str) -> int:
+    return len(PdfReader(file_path).pages)
+
+
+def extract_pdf_pages(file_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """(page number, text) of the non-empty pages in [start, end). Runs in a worker process."""
+    reader = PdfReader(file_path)
+    pages = []
+    for i in range(start, min(end, len(reader.pages))):
+        try:
+            text = reader.pages[i].extract_text()
+        except Exception as e:
+            logging.warning(f"Could not extract page {i} of {file_path}: {str(e)}")
+            continue
+        if text and text.strip():
+            pages.append((i, text))
+    return pages
+
+
+class PdfPageStream:
+    """
+    Async stream of a PDF's pages as Documents. Page ranges are extracted in
+    parallel in a process pool and each range's pages are yielded as soon as
+    it finishes, so ranges may arrive out of order (the page number is in the
+    metadata). Only 2 x workers ranges are in flight at a time, which keeps
+    memory bounded when the consumer is slower than extraction.
+    """
+
+    def __init__(self, file_path: str, pages_per_shard: int = PDF_PAGES_PER_SHARD, workers: Optional[int] = None):
+        self.file_path = file_path
+        self.pages_per_shard = max(1, pages_per_shard)
+        self.workers = max(1, workers if workers is not None else PDF_WORKERS)
+        self.page_count: Optional[int] = None
+        self.pages_done = 0
+        self.pages_yielded = 0
+
+    @property
+    def fraction(self) -> float:
+        return self.pages_done / self.page_count if self.page_count else 0.0
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        self.page_count = await loop.run_in_executor(None, count_pdf_pages, self.file_path)
+        shards = [(start, min(start + self.pages_per_shard, self.page_count))
+                  for start in range(0, self.page_count, self.pages_per_shard)]
+        # A single range isn't worth a round trip to another process
+        executor = _get_pdf_pool(self.workers) if len(shards) > 1 and self.workers > 1 else None
+        next_shard = 0
+        pending = {}
+        try:
+            while pending or next_shard < len(shards):
+                while next_shard < len(shards) and len(pending) < 2 * self.workers:
+                    start, end = shards[next_shard]
+                    pending[loop.run_in_executor(executor, extract_pdf_pages, self.file_path, start, end)] = (start, end)
+                    next_shard += 1
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    start, end = pending.pop(future)
+                    pages = future.result()
+                    self.pages_done += end - start
+                    for page, text in pages:
+                        self.pages_yielded += 1
+                        yield Document(page_content=text, metadata={"source": self.file_path, "page": page})
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+async def load_pdf(file_path, chunk_size: Optional[int] = None):
+    """Load a PDF's non-empty pages; with chunk_size, pages are extracted that many at a time across processes."""
     try:
         logging.info(f"Starting to load PDF: {file_path}")
 
@@ -20,6 +117,15 @@ async def load_pdf(file_path):
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"PDF file not found: {file_path}")
 
+        if chunk_size:
+            pages = [page async for page in PdfPageStream(file_path, pages_per_shard=chunk_size)]
+            pages.sort(key=lambda doc: doc.metadata["page"])
+            if not pages:
+                logging.error(f"No valid pages found in {file_path}")
+                return None
+            logging.info(f"Successfully loaded {len(pages)} pages from {file_path}")
+            return pages
+
         def read_pdf():
             reader = PdfReader(file_path)
             pages = []
@@ -54,6 +160,40 @@ async def load_pdf(file_path):
         return None
 
 
+# Bytes read per window when a text file is streamed
+TEXT_WINDOW_BYTES = int(os.environ.get("NOTATE_TEXT_WINDOW_BYTES", str(1024 * 1024)))
+
+
+class TextWindowReader:
+    """
+    Iterate over a text file in fixed-size windows of decoded text. An
+    incremental decoder carries multi-byte characters split across windows.
+    """
+
+    def __init__(self, file_path: str, window_bytes: int = TEXT_WINDOW_BYTES, encoding: str = "utf-8"):
+        self.file_path = file_path
+        self.window_bytes = window_bytes
+        self.encoding = encoding
+        self.size = os.path.getsize(file_path)
+        self.bytes_read = 0
+
+    @property
+    def fraction(self) -> float:
+        return self.bytes_read / self.size if self.size else 1.0
+
+    def __iter__(self):
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        with open(self.file_path, "rb") as f:
+            while True:
+                window = f.read(self.window_bytes)
+                self.bytes_read += len(window)
+                text = decoder.decode(window, final=not window)
+                if text:
+                    yield text
+                if not window:
+                    return
+
+
 async def load_py(file):
     try:
         with open(file, 'r', encoding='utf-8') as f:
@@ -98,6 +238,11 @@ async def load_md(file):
 
 async def load_html(file_path: str) -> str:
     """Load and process HTML file content"""
+    return load_html_sync(file_path)
+
+
+def load_html_sync(file_path: str) -> str:
+    """Synchronous HTML loader for callers that aren't running a coroutine"""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
@@ -128,11 +273,111 @@ async def load_html(file_path: str) -> str:
         return None
 
 
+# Rows parsed per pandas chunk when a CSV is streamed
+CSV_READ_ROWS = int(os.environ.get("NOTATE_CSV_READ_ROWS", "20000"))
+# Target characters per CSV document, header included
+CSV_DOC_CHARS = int(os.environ.get("NOTATE_CSV_DOC_CHARS", "2000"))
+
+
+def _csv_quote(values: pd.Series) -> pd.Series:
+    """Re-quote cells that need it so rendered rows stay valid CSV."""
+    needs_quotes = values.str.contains(r'[",\r\n]', regex=True)
+    if not needs_quotes.any():
+        return values
+    return values.where(~needs_quotes, '"' + values.str.replace('"', '""', regex=False) + '"')
+
+
+def render_csv_rows(frame: pd.DataFrame) -> pd.Series:
+    """One CSV line per row, built column-wise with vectorized string ops."""
+    columns = [_csv_quote(frame[column]) for column in frame.columns]
+    if len(columns) == 1:
+        return columns[0]
+    return columns[0].str.cat(columns[1:], sep=",")
+
+
+class CsvDocumentStream:
+    """
+    Iterate over a CSV as Documents of about target_chars each: the header
+    line followed by as many whole rows as fit. The file is parsed
+    read_rows rows at a time with every cell kept as its original string,
+    so memory stays flat however large the file is. Documents carry the
+    row_start/row_end (0-based data rows, end exclusive) they hold.
+    """
+
+    def __init__(self, file_path: str, metadata: Optional[dict] = None,
+                 target_chars: int = CSV_DOC_CHARS, read_rows: int = CSV_READ_ROWS):
+        self.file_path = file_path
+        self.metadata = dict(metadata or {})
+        self.metadata["source"] = file_path
+        self.target_chars = target_chars
+        self.read_rows = read_rows
+        self.size = os.path.getsize(file_path)
+        self.bytes_read = 0
+        self.rows_read = 0
+
+    @property
+    def fraction(self) -> float:
+        return self.bytes_read / self.size if self.size else 1.0
+
+    def _document(self, header: str, rows: List[str], row_start: int) -> Document:
+        metadata = self.metadata.copy()
+        metadata.update(row_start=row_start, row_end=row_start + len(rows))
+        return Document(page_content="\n".join([header, *rows]), metadata=metadata)
+
+    def __iter__(self):
+        with open(self.file_path, "rb") as f:
+            try:
+                reader = pd.read_csv(f, dtype=str, keep_default_na=False, chunksize=self.read_rows,
+                                     encoding="utf-8", encoding_errors="replace")
+            except pd.errors.EmptyDataError:
+                return
+            header = None
+            budget = 1
+            carry: List[str] = []
+            carry_start = 0
+            carry_chars = 0
+            with reader:
+                for frame in reader:
+                    if header is None:
+                        header = ",".join(_csv_quote(pd.Series([str(c) for c in frame.columns], dtype=object)))
+                        budget = max(1, self.target_chars - len(header) - 1)
+                    if frame.empty:
+                        continue
+                    # Short rows come back with NaN in the missing cells
+                    rendered = render_csv_rows(frame.fillna(""))
+                    lengths = rendered.str.len().to_numpy(dtype=np.int64) + 1
+                    rows = rendered.to_numpy()
+                    # Greedy packing by cumulative length: a row joins the document its first character
+                    # falls in. Offsets continue from the document carried over from the previous chunk.
+                    offsets = carry_chars + np.cumsum(lengths) - lengths
+                    groups = offsets // budget
+                    bounds = [*np.flatnonzero(np.diff(groups, prepend=-1)).tolist(), len(rows)]
+                    for start, end in zip(bounds[:-1], bounds[1:]):
+                        group = rows[start:end].tolist()
+                        row_start = self.rows_read + start
+                        if start == 0 and carry:
+                            if groups[0] == 0:
+                                group = carry + group
+                                row_start = carry_start
+                            else:
+                                yield self._document(header, carry, carry_start)
+                        if end == len(rows):
+                            # The last document may still have room; fill it from the next chunk
+                            carry, carry_start = group, row_start
+                            carry_chars = sum(len(row) + 1 for row in group)
+                        else:
+                            yield self._document(header, group, row_start)
+                    self.rows_read += len(rows)
+                    self.bytes_read = min(f.tell(), self.size)
+            if carry:
+                yield self._document(header, carry, carry_start)
+            self.bytes_read = self.size
+        logging.info(f"Streamed {self.rows_read} CSV rows from {self.file_path}")
+
+
 async def load_csv(file):
     try:
-        loader = CSVLoader(file)
-        data = loader.load()
-        return data
+        return await asyncio.to_thread(lambda: list(CsvDocumentStream(file)))
     except Exception as e:
         print(f"Error loading CSV: {str(e)}")
         return None
@@ -162,10 +407,95 @@ def load_pptx(file):
         return None
 
 
-def load_xlsx(file):
+# Target characters per spreadsheet document, header included
+XLSX_DOC_CHARS = int(os.environ.get("NOTATE_XLSX_DOC_CHARS", "2000"))
+
+
+def _xlsx_line(values) -> str:
+    """A worksheet row as a CSV line, without trailing empty cells."""
+    cells = ["" if value is None else str(value) for value in values]
+    while cells and not cells[-1].strip():
+        cells.pop()
+    out = io.StringIO()
+    csv.writer(out, lineterminator="").writerow(cells)
+    return out.getvalue()
+
+
+class XlsxDocumentStream:
+    """
+    Iterate over every sheet of a workbook as Documents of about
+    target_chars each. The workbook is opened read-only, so rows are parsed
+    from the sheet XML as they're walked and memory doesn't grow with the
+    workbook. Each sheet's first non-empty row is its header and starts
+    every document from that sheet; documents carry the sheet name and the
+    spreadsheet row numbers (1-based, inclusive) they hold. Formulas are
+    read as their cached values.
+    """
+
+    def __init__(self, file_path: str, metadata: Optional[dict] = None, target_chars: int = XLSX_DOC_CHARS):
+        self.file_path = file_path
+        self.metadata = dict(metadata or {})
+        self.metadata["source"] = file_path
+        self.target_chars = target_chars
+        self.sheets_done = 0
+        self.sheet_count = 0
+        self._sheet_rows = 0
+        self._sheet_max_row = 0
+        self.rows_read = 0
+
+    @property
+    def fraction(self) -> float:
+        if not self.sheet_count:
+            return 0.0
+        within = min(1.0, self._sheet_rows / self._sheet_max_row) if self._sheet_max_row else 0.0
+        return min(1.0, (self.sheets_done + within) / self.sheet_count)
+
+    def _document(self, sheet: str, header: str, rows: List[str], row_start: int, row_end: int) -> Document:
+        metadata = self.metadata.copy()
+        metadata.update(sheet=sheet, row_start=row_start, row_end=row_end)
+        return Document(page_content="\n".join([f"Sheet: {sheet}", header, *rows]), metadata=metadata)
+
+    def __iter__(self):
+        workbook = load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            self.sheet_count = len(workbook.sheetnames)
+            for sheet in workbook.worksheets:
+                self._sheet_rows = 0
+                # Read-only sheets know their size only if the file records its dimensions
+                self._sheet_max_row = getattr(sheet, "max_row", None) or 0
+                header = None
+                rows: List[str] = []
+                size = 0
+                row_start = row_end = 0
+                for number, values in enumerate(sheet.iter_rows(values_only=True), start=1):
+                    self._sheet_rows = number
+                    line = _xlsx_line(values)
+                    if not line:
+                        continue
+                    if header is None:
+                        header = line
+                        budget = max(1, self.target_chars - len(sheet.title) - len(header) - 9)
+                        continue
+                    if rows and size + len(line) + 1 > budget:
+                        yield self._document(sheet.title, header, rows, row_start, row_end)
+                        rows, size = [], 0
+                    if not rows:
+                        row_start = number
+                    rows.append(line)
+                    size += len(line) + 1
+                    row_end = number
+                    self.rows_read += 1
+                if rows:
+                    yield self._document(sheet.title, header, rows, row_start, row_end)
+                self.sheets_done += 1
+        finally:
+            workbook.close()
+        logging.info(f"Streamed {self.rows_read} rows from {self.sheet_count} sheets of {self.file_path}")
+
+
+async def load_xlsx(file):
     try:
-        df = pd.read_excel(file)
-        return df.to_string().strip()
+        return await asyncio.to_thread(lambda: list(XlsxDocumentStream(file)))
     except Exception as e:
         print(f"Error loading XLSX: {str(e)}")
         return None
@@ -1,9 +1,22 @@
 import os
+import asyncio
+import inspect
 import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterable, Callable, Iterable, List, Optional, Union
+from langchain_core.documents import Document
 
 logger = logging.getLogger(__name__)
 
+from src.data.dataIntake.textSplitting import split_text, split_text_stream
 from src.data.dataIntake.fileTypes.loadX import (
+    CsvDocumentStream,
+    PdfPageStream,
+    TextWindowReader,
+    XlsxDocumentStream,
     load_csv,
     load_docx,
     load_html,
@@ -29,6 +42,42 @@ file_handlers = {
     "py": load_py,
 }
 
+# Text-like files above this size are read and split as a stream instead of loaded whole
+STREAM_TEXT_BYTES = int(os.environ.get("NOTATE_STREAM_TEXT_BYTES", str(16 * 1024 * 1024)))
+# Streamed markdown is split as raw text, markup included
+STREAMED_TEXT_TYPES = ("txt", "md", "py")
+
+
+@dataclass
+class DocumentStream:
+    """Ready-to-embed Documents produced while the file is read, with progress through the file."""
+    docs: Union[Iterable[Document], AsyncIterable[Document]]
+    fraction: Callable[[], float]
+    description: str
+
+
+def stream_document(file: str, metadata: Optional[dict] = None) -> Optional[DocumentStream]:
+    """
+    Stream for file types and sizes that are ingested without loading the
+    whole file, or None when load_document should be used.
+    """
+    file_type = file.split(".")[-1].lower()
+    if file_type == "pdf":
+        pages = PdfPageStream(file)
+        return DocumentStream(pages, lambda: pages.fraction, f"Extracting PDF pages with {pages.workers} workers")
+    if file_type == "csv":
+        rows = CsvDocumentStream(file, metadata)
+        return DocumentStream(rows, lambda: rows.fraction, f"Streaming CSV rows {rows.read_rows} at a time")
+    if file_type == "xlsx":
+        workbook = XlsxDocumentStream(file, metadata)
+        return DocumentStream(workbook, lambda: workbook.fraction, "Streaming every sheet of the workbook")
+    if file_type in STREAMED_TEXT_TYPES and os.path.getsize(file) > STREAM_TEXT_BYTES:
+        reader = TextWindowReader(file)
+        return DocumentStream(split_text_stream(reader, file, metadata), lambda: reader.fraction,
+                              f"Streaming text in {reader.window_bytes // 1024}KB windows")
+    return None
+
+
 async def load_document(file: str):
     try:
         file_type = file.split(".")[-1].lower()
@@ -49,8 +98,49 @@ async def load_document(file: str):
             logger.info("Large PDF detected - using chunked processing")
             return await handler(file, chunk_size=50)  # Process 50 pages at a time
         
-        return await handler(file)
+        result = handler(file)
+        # pptx and a few other handlers are plain functions
+        return await result if inspect.isawaitable(result) else result
 
     except Exception as e:
         logger.error(f"Error loading file: {str(e)}")
         return None
+
+
+# Processes parsing files for bulk ingest
+PARSE_WORKERS = int(os.environ.get("NOTATE_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """
+    Shared process pool for parsing files, started on first use. Workers are
+    spawned, not forked, so they never inherit locks held by server threads.
+    """
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(max_workers=max(1, PARSE_WORKERS), mp_context=multiprocessing.get_context("spawn"))
+        return _parse_pool
+
+
+def parse_file(file: str, metadata: Optional[dict] = None) -> List[Document]:
+    """
+    Load a file with its file_handlers entry and split it into chunks ready to
+    embed. Runs in a parse worker process; raises if nothing could be read.
+    """
+    output = asyncio.run(load_document(file))
+    if output is None:
+        raise ValueError("Failed to load document")
+    if isinstance(output, list):
+        # CSV and XLSX handlers return row documents and the PDF handler per-page documents; neither is re-split
+        docs = output
+        for doc in docs:
+            doc.metadata = {**(metadata or {}), **doc.metadata}
+    else:
+        docs = split_text(output, file, dict(metadata) if metadata else None)
+    if not docs:
+        raise ValueError("No text content extracted from file")
+    return docs
@@ -1,7 +1,22 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+from typing import Iterable, Iterator
 import logging
 
+# Normalized characters split at a time when splitting a stream
+STREAM_SPLIT_BUFFER = 64 * 1024
+
+
+def _text_splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=500,
+        chunk_overlap=20,
+        length_function=len,
+        is_separator_regex=False,
+        # Prioritize sentence boundaries
+        separators=[". ", "? ", "! ", "\n\n", "\n", " ", ""]
+    )
+
 
 def split_text(text: str, file_path: str, metadata: dict = None) -> list:
     """Split text into chunks for embedding."""
@@ -14,14 +29,7 @@ def split_text(text: str, file_path: str, metadata: dict = None) -> list:
         # Pre-process text to remove excessive whitespace
         text = " ".join(text.split())
 
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=20,
-            length_function=len,
-            is_separator_regex=False,
-            # Prioritize sentence boundaries
-            separators=[". ", "? ", "! ", "\n\n", "\n", " ", ""]
-        )
+        text_splitter = _text_splitter()
 
         # Directly split text and create documents in one go
         texts = text_splitter.split_text(text)
@@ -45,3 +53,53 @@ def split_text(text: str, file_path: str, metadata: dict = None) -> list:
     except Exception as e:
         logging.error(f"Error splitting text from {file_path}: {str(e)}")
         return []
+
+
+def normalize_whitespace(pieces: Iterable[str]) -> Iterator[str]:
+    """
+    Incremental " ".join(text.split()) over consecutive pieces of one text:
+    whitespace runs collapse to one space even when they span pieces, and a
+    word split across pieces is not broken up.
+    """
+    pending_space = False
+    emitted = False
+    for piece in pieces:
+        words = piece.split()
+        if not words:
+            pending_space = pending_space or (emitted and bool(piece))
+            continue
+        if emitted and (pending_space or piece[0].isspace()):
+            yield " "
+        yield " ".join(words)
+        emitted = True
+        pending_space = piece[-1].isspace()
+
+
+def split_text_stream(pieces: Iterable[str], file_path: str, metadata: dict = None) -> Iterator[Document]:
+    """
+    Streaming split_text for text too large to hold in memory: pieces are
+    normalized as they arrive and split a buffer at a time. The last chunk of
+    each buffer is held back and re-split with the following text, so chunks
+    end on the same kind of boundary as in split_text rather than wherever a
+    read window happened to end. Memory depends on the buffer, not the file.
+    """
+    text_splitter = _text_splitter()
+    base_metadata = dict(metadata or {})
+    base_metadata["source"] = file_path
+    buffer = ""
+    count = 0
+    for piece in normalize_whitespace(pieces):
+        buffer += piece
+        if len(buffer) < STREAM_SPLIT_BUFFER:
+            continue
+        chunks = text_splitter.split_text(buffer)
+        if len(chunks) < 2:
+            continue
+        for chunk in chunks[:-1]:
+            count += 1
+            yield Document(page_content=chunk.strip(), metadata=base_metadata.copy())
+        buffer = buffer[buffer.rfind(chunks[-1]):]
+    for chunk in text_splitter.split_text(buffer) if buffer else []:
+        count += 1
+        yield Document(page_content=chunk.strip(), metadata=base_metadata.copy())
+    logging.info(f"Streamed {count} chunks from {file_path}")
@@ -0,0 +1,301 @@
+from src.data.dataIntake.loadFile import PARSE_WORKERS, file_handlers, get_parse_pool, parse_file, stream_document
+from src.endpoint.models import BulkEmbeddingRequest
+from src.vectorstorage.helpers.sanitizeCollectionName import sanitize_collection_name
+from src.vectorstorage.vectorstore import get_vectorstore, batch_tuning_key
+from src.vectorstorage.collection_config import get_collection_config
+from src.vectorstorage.embeddings import IngestProgress, chunk_id, delete_chunks
+from src.vectorstorage.pipeline import IngestPipeline
+from src.vectorstorage.batch_tuner import AdaptiveBatchSizer
+from src.vectorstorage.manifest import CollectionManifest, get_manifest
+from langchain_core.documents import Document
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, AsyncGenerator, Dict, Iterator, List, Optional
+import threading
+import asyncio
+import logging
+import queue
+import os
+
+logger = logging.getLogger(__name__)
+
+# Files larger than this are streamed in the server process instead of parsed whole in a worker
+BULK_STREAM_BYTES = int(os.environ.get("NOTATE_BULK_STREAM_BYTES", str(25 * 1024 * 1024)))
+
+
+def collect_files(directory: Optional[str] = None, file_paths: Optional[List[str]] = None, recursive: bool = True) -> List[str]:
+    """
+    Files of a supported type under a directory (hidden entries skipped),
+    followed by the listed files, without duplicates. Listed files are kept
+    even if unsupported or missing so they are reported as failures.
+    """
+    paths = []
+    if directory:
+        if not os.path.isdir(directory):
+            raise ValueError(f"Not a directory: {directory}")
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = sorted(d for d in dirs if not d.startswith(".")) if recursive else []
+            paths.extend(os.path.join(root, name) for name in sorted(files)
+                         if not name.startswith(".") and name.split(".")[-1].lower() in file_handlers)
+    paths.extend(file_paths or [])
+    return list(dict.fromkeys(os.path.abspath(path) for path in paths))
+
+
+def _iterate_async(stream) -> Iterator[Document]:
+    """Drain an async document stream (e.g. PDF pages) from a worker thread."""
+    loop = asyncio.new_event_loop()
+    iterator = stream.__aiter__()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(iterator.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        if hasattr(iterator, "aclose"):
+            loop.run_until_complete(iterator.aclose())
+        loop.close()
+
+
+class BulkTracker:
+    """
+    Per-file bookkeeping for a bulk ingest. Every chunk fed to the shared
+    pipeline is registered against its file; a file is finished once it has
+    been fully fed and all its chunks are settled. Finished files are
+    recorded in the manifest (dropping chunks an older version produced);
+    files with a dropped batch are reported failed and left out of it, so
+    the next run retries them.
+    """
+
+    def __init__(self, manifest: CollectionManifest, vectordb, events: "queue.Queue[Optional[Dict[str, Any]]]", total: int):
+        self.manifest = manifest
+        self.vectordb = vectordb
+        self.events = events
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._owner: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def fraction(self) -> float:
+        return (self.done + self.failed + self.skipped) / self.total if self.total else 1.0
+
+    def counts(self) -> Dict[str, int]:
+        return {"files_total": self.total, "files_done": self.done, "files_failed": self.failed, "files_skipped": self.skipped}
+
+    def _event(self, path: str, state: str, chunks: int = 0, message: str = "") -> None:
+        # Messages go out as single-quoted SSE fields
+        message = message.replace("'", "").replace('"', "")
+        self.events.put({"status": "file", "data": {"file": path, "state": state, "chunks": chunks, "message": message}})
+
+    def begin(self, path: str, info: Dict[str, Any]) -> None:
+        with self._lock:
+            self._files[path] = {"info": info, "ids": {}, "pending": set(), "fed": False, "error": None}
+
+    def skip(self, path: str) -> None:
+        with self._lock:
+            self.skipped += 1
+        self._event(path, "skipped", message="Unchanged since it was last embedded")
+
+    def fail(self, path: str, error: str) -> None:
+        logger.error(f"Bulk ingest of {path} failed: {error}")
+        with self._lock:
+            self._files.pop(path, None)
+            self.failed += 1
+        self._event(path, "failed", message=error)
+
+    def expect(self, path: str, doc: Document) -> None:
+        """Register a chunk before it enters the pipeline."""
+        key = chunk_id(doc)
+        with self._lock:
+            state = self._files[path]
+            state["ids"][key] = None
+            state["pending"].add(key)
+            self._owner[key] = path
+
+    def fed(self, path: str) -> None:
+        """All of a file's chunks are in the pipeline."""
+        with self._lock:
+            state = self._files[path]
+            state["fed"] = True
+            chunks = len(state["ids"])
+        self._event(path, "parsed", chunks)
+        self._maybe_finish(path)
+
+    def settled(self, ids: List[str], error: Optional[str] = None) -> None:
+        """IngestPipeline on_done callback."""
+        touched = set()
+        with self._lock:
+            for key in ids:
+                path = self._owner.pop(key, None)
+                state = self._files.get(path)
+                if state is None:
+                    continue
+                state["pending"].discard(key)
+                if error is not None and state["error"] is None:
+                    state["error"] = error
+                touched.add(path)
+        for path in touched:
+            self._maybe_finish(path)
+
+    def _maybe_finish(self, path: str) -> None:
+        with self._lock:
+            state = self._files.get(path)
+            if state is None or not state["fed"] or state["pending"]:
+                return
+            del self._files[path]
+        if state["error"] is None and not state["ids"]:
+            state["error"] = "No text content extracted from file"
+        if state["error"] is not None:
+            with self._lock:
+                self.failed += 1
+            self._event(path, "failed", len(state["ids"]), state["error"])
+            return
+        ids = list(state["ids"])
+        try:
+            stale_ids = set(self.manifest.chunk_ids(path)) - set(ids)
+            delete_chunks(self.vectordb, list(stale_ids))
+            self.manifest.record(path, state["info"], ids)
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            self._event(path, "failed", len(ids), str(e))
+            return
+        with self._lock:
+            self.done += 1
+        self._event(path, "done", len(ids))
+
+
+def _bulk_documents(files: List[str], tracker: BulkTracker, pipeline: IngestPipeline, metadata: Optional[dict]) -> Iterator[Document]:
+    """
+    Chunks of every file for the shared pipeline. Files are parsed on the
+    parse process pool with at most 2 x workers in flight, and their chunks
+    are fed in the order parsing finishes; large files that have a streaming
+    reader are streamed afterwards from this thread instead.
+    """
+    queued = iter(files)
+    large = []
+    pending = {}
+
+    def submit_more():
+        while len(pending) < 2 * max(1, PARSE_WORKERS) and not pipeline.cancelled:
+            path = next(queued, None)
+            if path is None:
+                return
+            try:
+                if path.split(".")[-1].lower() not in file_handlers:
+                    raise ValueError("Unsupported file type")
+                status, info = tracker.manifest.check(path, metadata)
+                if status == "unchanged":
+                    tracker.skip(path)
+                    continue
+                if status == "metadata_changed":
+                    # Chunk IDs don't depend on metadata, so the old chunks would be kept as they are
+                    delete_chunks(tracker.vectordb, tracker.manifest.chunk_ids(path))
+                tracker.begin(path, info)
+                if os.path.getsize(path) > BULK_STREAM_BYTES:
+                    stream = stream_document(path, metadata)
+                    if stream is not None:
+                        large.append((path, stream))
+                        continue
+                pending[get_parse_pool().submit(parse_file, path, metadata)] = path
+            except Exception as e:
+                tracker.fail(path, str(e))
+
+    try:
+        submit_more()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path = pending.pop(future)
+                try:
+                    docs = future.result()
+                except Exception as e:
+                    tracker.fail(path, str(e))
+                    continue
+                for doc in docs:
+                    tracker.expect(path, doc)
+                    yield doc
+                tracker.fed(path)
+            submit_more()
+
+        for path, stream in large:
+            if pipeline.cancelled:
+                return
+            tracker.events.put({"status": "info", "message": f"{os.path.basename(path)}: {stream.description}"})
+            docs = _iterate_async(stream.docs) if hasattr(stream.docs, "__aiter__") else iter(stream.docs)
+            try:
+                for doc in docs:
+                    tracker.expect(path, doc)
+                    yield doc
+            except Exception as e:
+                tracker.fail(path, str(e))
+                continue
+            tracker.fed(path)
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def bulk_embed(data: BulkEmbeddingRequest) -> AsyncGenerator[dict, None]:
+    """
+    Embed a directory and/or list of files into one collection: files are
+    parsed in parallel and all their chunks go through one shared embedding
+    pipeline. Yields aggregate progress plus a file event per file (parsed,
+    done, skipped or failed).
+    """
+    try:
+        collection_name = sanitize_collection_name(str(data.collection_name))
+        files = await asyncio.to_thread(collect_files, data.directory, data.file_paths, data.recursive)
+        if not files:
+            raise Exception("No supported files to embed")
+        yield {"status": "info", "message": f"Embedding {len(files)} files with {PARSE_WORKERS} parse workers"}
+
+        config = get_collection_config(collection_name)
+        vectordb = get_vectorstore(data.api_key, collection_name, data.is_local, data.local_embedding_model)
+        if not vectordb:
+            raise Exception("Failed to initialize vector database")
+
+        manifest = get_manifest(collection_name)
+        progress = IngestProgress(fraction_hint=lambda: tracker.fraction)
+        sizer = AdaptiveBatchSizer(batch_tuning_key(
+            data.api_key, data.is_local, data.local_embedding_model, config.embedding_backend))
+        pipeline = IngestPipeline(vectordb, progress, sizer=sizer)
+        # File events go on the pipeline's event queue so they arrive in order with its progress
+        tracker = BulkTracker(manifest, vectordb, pipeline.events, len(files))
+        pipeline.on_done = tracker.settled
+        pipeline.start()
+        yield {"status": "info", "message": f"Embedding with {pipeline.workers} workers, starting at {sizer.token_budget} tokens per batch"}
+        pipeline.feed_in_background(_bulk_documents(files, tracker, pipeline, data.metadata))
+        try:
+            while True:
+                event = await asyncio.to_thread(pipeline.events.get)
+                if event is None:
+                    break
+                if event["status"] == "progress":
+                    event["data"].update(tracker.counts())
+                yield event
+        finally:
+            # Stops the stages if the client went away mid-stream
+            pipeline.cancel()
+            await asyncio.to_thread(manifest.save)
+
+        sizer.save()
+        if data.directory:
+            # Only files that were under the walked directory; a file list says nothing about the rest
+            for missing_path in manifest.missing_files(under=data.directory):
+                delete_chunks(vectordb, manifest.remove(missing_path))
+            manifest.save()
+
+        counts = tracker.counts()
+        yield {"status": "progress", "data": {**progress.snapshot(), **counts}}
+        summary = (f"{counts['files_done']} files embedded, {counts['files_skipped']} unchanged, "
+                   f"{counts['files_failed']} failed")
+        yield {"status": "success" if not counts["files_failed"] else "error", "message": f"Bulk embedding finished: {summary}"}
+
+    except Exception as e:
+        error_msg = f"Error in bulk embedding: {str(e)}"
+        logger.error(error_msg)
+        yield {"status": "error", "message": error_msg}
@@ -1,6 +1,12 @@
 from src.endpoint.models import DeleteCollectionRequest
-from src.vectorstorage.vectorstore import get_vectorstore
+from src.vectorstorage.helpers.sanitizeCollectionName import sanitize_collection_name
+from src.vectorstorage.vectorstore import chroma_manager, get_collection_dir
+from src.vectorstorage.manifest import drop_manifest
+from src.vectorstorage.collection_config import drop_collection_config
+from src.vectorstorage.lexical_index import drop_lexical_index
+from src.vectorstorage.warmup import collection_usage
 import logging
+import shutil
 
 logger = logging.getLogger(__name__)
 
@@ -8,12 +14,14 @@ logger = logging.getLogger(__name__)
 def delete_vectorstore_collection(data: DeleteCollectionRequest):
     try:
         logger.info(f"Deleting vectorstore collection: {data.collection_name}")
-        vectorstore = get_vectorstore(
-            data.api_key, data.collection_name, data.is_local)
-        if vectorstore:
-            vectorstore.delete_collection()
-            return True
-        return False
+        collection_name = sanitize_collection_name(str(data.collection_name))
+        deleted = chroma_manager.delete_collection(collection_name)
+        drop_manifest(collection_name)
+        drop_collection_config(collection_name)
+        drop_lexical_index(collection_name)
+        collection_usage.forget(collection_name)
+        shutil.rmtree(get_collection_dir(collection_name), ignore_errors=True)
+        return deleted
     except Exception as e:
         logger.error(f"Error deleting vectorstore collection: {str(e)}")
         return False
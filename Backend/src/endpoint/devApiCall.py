@@ -28,6 +28,14 @@ def vector_call(query_request: VectorStoreQueryRequest, user_id: str):
             user=user_id,
             api_key=api_key,
             top_k=query_request.top_k,
+            hybrid=query_request.hybrid,
+            rerank=query_request.rerank,
+            rerank_candidates=query_request.rerank_candidates,
+            rerank_budget_ms=query_request.rerank_budget_ms,
+            search_type=query_request.search_type,
+            fetch_k=query_request.fetch_k,
+            mmr_lambda=query_request.mmr_lambda,
+            filter=query_request.filter,
             is_local=collectionSettings.is_local,
             local_embedding_model=collectionSettings.local_embedding_model
         )
@@ -52,6 +60,14 @@ async def rag_call(query_request: VectorStoreQueryRequest, user_id: str):
         user=user_id,
         api_key=api_key,
         top_k=query_request.top_k,
+        hybrid=query_request.hybrid,
+        rerank=query_request.rerank,
+        rerank_candidates=query_request.rerank_candidates,
+        rerank_budget_ms=query_request.rerank_budget_ms,
+        search_type=query_request.search_type,
+        fetch_k=query_request.fetch_k,
+        mmr_lambda=query_request.mmr_lambda,
+        filter=query_request.filter,
         is_local=collectionSettings.is_local,
         local_embedding_model=collectionSettings.local_embedding_model,
         temperature=query_request.temperature,
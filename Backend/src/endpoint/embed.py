@@ -1,16 +1,18 @@
 from src.data.dataIntake.textSplitting import split_text
-from src.data.dataIntake.loadFile import load_document
+from src.data.dataIntake.loadFile import load_document, stream_document
 from src.endpoint.models import EmbeddingRequest
 from src.vectorstorage.helpers.sanitizeCollectionName import sanitize_collection_name
-from src.vectorstorage.vectorstore import get_vectorstore
-from src.vectorstorage.embeddings import embed_chunk, chunk_list
+from src.vectorstorage.vectorstore import get_vectorstore, batch_tuning_key, chroma_manager
+from src.vectorstorage.collection_config import get_collection_config, save_collection_config
+from src.vectorstorage.embeddings import IngestProgress, delete_chunks
+from src.vectorstorage.pipeline import IngestPipeline
+from src.vectorstorage.batch_tuner import AdaptiveBatchSizer
+from src.vectorstorage.manifest import get_manifest
 
 import os
-import multiprocessing
-import concurrent.futures
-import time
+import asyncio
+from dataclasses import replace
 from typing import AsyncGenerator
-from collections import deque
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,81 +23,129 @@ async def embed(data: EmbeddingRequest) -> AsyncGenerator[dict, None]:
     try:
         yield {"status": "info", "message": f"Starting embedding process for file: {file_name}"}
 
+        collection_name = sanitize_collection_name(str(data.collection_name))
+        # Settings are applied even when the file itself needs no re-embedding
+        config = get_collection_config(collection_name)
+        requested = {
+            "embedding_backend": data.embedding_backend,
+            "embedding_dim": data.embedding_dim,
+            "hnsw_m": data.hnsw_m,
+            "hnsw_construction_ef": data.hnsw_construction_ef,
+            "hnsw_search_ef": data.hnsw_search_ef,
+        }
+        changes = {k: v for k, v in requested.items() if v is not None and v != getattr(config, k)}
+        if changes:
+            empty = not chroma_manager.get_collection(collection_name).count()
+            if {"embedding_dim", "hnsw_m", "hnsw_construction_ef"} & changes.keys() and not empty:
+                raise Exception("Vector storage and index build settings can only be changed while the collection is empty")
+            config = replace(config, **changes)
+            save_collection_config(collection_name, config)
+            if empty and {"hnsw_m", "hnsw_construction_ef", "hnsw_search_ef"} & changes.keys():
+                # Drop it so get_vectorstore recreates it with the new index parameters
+                chroma_manager.delete_collection(collection_name)
+            elif "hnsw_search_ef" in changes:
+                chroma_manager.update_hnsw_metadata(collection_name, {"hnsw:search_ef": config.hnsw_search_ef})
+            settings = ", ".join(f"{k}={v}" for k, v in changes.items())
+            yield {"status": "info", "message": f"Updated collection settings: {settings}"}
+
+        manifest = get_manifest(collection_name)
+        file_status, file_info = manifest.check(data.file_path, data.metadata)
+        if file_status == "unchanged":
+            yield {"status": "success", "message": f"{file_name} is unchanged since it was last embedded, skipping"}
+            return
+
         # Get file size
         file_size = os.path.getsize(data.file_path)
         if file_size > 25 * 1024 * 1024:  # If file is larger than 25MB
             yield {"status": "info", "message": f"Processing large file ({file_size / (1024*1024):.1f}MB). This may take longer."}
 
-        text_output = await load_document(data.file_path)
-
-        if text_output is None:
-            raise Exception("Failed to load document")
-
-        # Handle generator output from CSV loader
-        if hasattr(text_output, '__iter__') and not isinstance(text_output, (str, list)):
-            texts = []
-            for item in text_output:
-                if isinstance(item, dict) and "status" in item:
-                    # Forward progress updates from CSV processing
-                    yield item
-                else:
-                    texts = item
+        # PDFs, spreadsheets and very large text files go straight from the reader into the pipeline, never all in memory
+        stream = stream_document(data.file_path, data.metadata if hasattr(data, 'metadata') else None)
+        if stream is not None:
+            texts = None
+            yield {"status": "info", "message": stream.description}
         else:
+            text_output = await load_document(data.file_path)
+            if text_output is None:
+                raise Exception("Failed to load document")
+
             yield {"status": "info", "message": "File loaded successfully"}
 
-        # Check if file is CSV or PDF
-        if file_name.lower().endswith('.csv'):
-            texts = text_output  # CSV loader already returns list of documents
-        elif file_name.lower().endswith('.pdf'):
-            # PDF loader returns list of Documents, no need to split
-            texts = text_output
-        else:
             # Pass metadata to split_text if it exists
-            texts = split_text(text_output, data.file_path,
-                             data.metadata if hasattr(data, 'metadata') else None)
+            texts = await asyncio.to_thread(
+                split_text, text_output, data.file_path,
+                data.metadata if hasattr(data, 'metadata') else None)
 
-        if not texts:
-            raise Exception("No text content extracted from file")
+            if not texts:
+                raise Exception("No text content extracted from file")
 
-        yield {"status": "info", "message": f"Split text into {len(texts)} chunks"}
+            yield {"status": "info", "message": f"Split text into {len(texts)} chunks"}
 
-        collection_name = sanitize_collection_name(str(data.collection_name))
         vectordb = get_vectorstore(
             data.api_key, collection_name, data.is_local, data.local_embedding_model)
         if not vectordb:
             raise Exception("Failed to initialize vector database")
+        if file_status == "metadata_changed":
+            # Chunk IDs don't depend on metadata, so the old chunks would be kept as they are
+            delete_chunks(vectordb, manifest.chunk_ids(data.file_path))
+            yield {"status": "info", "message": f"Metadata of {file_name} changed, re-embedding it"}
+
+        # Stream the chunks through the staged pipeline: dedup -> embed -> write
+        if stream is not None:
+            progress = IngestProgress(fraction_hint=stream.fraction)
+        else:
+            progress = IngestProgress(total_docs=len(texts))
+        sizer = AdaptiveBatchSizer(batch_tuning_key(
+            data.api_key, data.is_local, data.local_embedding_model, config.embedding_backend))
+        pipeline = IngestPipeline(vectordb, progress, sizer=sizer).start()
+        yield {"status": "info", "message": f"Embedding with {pipeline.workers} workers, starting at {sizer.token_budget} tokens per batch"}
+        feeder = None
+        if stream is None:
+            pipeline.feed_in_background(texts)
+        elif hasattr(stream.docs, "__aiter__"):
+            feeder = asyncio.create_task(pipeline.feed_async(stream.docs))
+        else:
+            pipeline.feed_in_background(stream.docs)
+        try:
+            while True:
+                event = await asyncio.to_thread(pipeline.events.get)
+                if event is None:
+                    break
+                yield event
+        finally:
+            # Stops the stages if the client went away mid-stream
+            pipeline.cancel()
+            if feeder is not None:
+                feeder.cancel()
+
+        if stream is not None and not pipeline.chunk_ids and not pipeline.failed_batches:
+            raise Exception("No text content extracted from file")
 
-        # Adjust chunk size based on file size
-        chunk_size = min(50, max(10, int(1000000 / file_size)))  # Dynamic chunk size
-        chunks = list(chunk_list(texts, chunk_size))
-        total_chunks = len(chunks)
-        yield {"status": "info", "message": f"Split into {total_chunks} chunks of {chunk_size} documents each"}
-
-        start_time = time.time()
-        time_history = deque(maxlen=5)
-
-        # Process chunks with reduced parallelism for large files
-        num_cores = max(1, min(multiprocessing.cpu_count() - 1, 4))  # Use fewer cores for large files
-        yield {"status": "info", "message": f"Using {num_cores} CPU cores for processing"}
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=num_cores) as executor:
-            futures = []
-            for i, chunk in enumerate(chunks):
-                chunk_arg = (vectordb, chunk, i + 1, total_chunks, start_time, time_history)
-                future = executor.submit(embed_chunk, chunk_arg)
-                futures.append(future)
-                
-                # Process results as they complete
-                for completed in concurrent.futures.as_completed(futures):
-                    try:
-                        result = completed.result()
-                        yield {"status": "progress", "data": result}
-                    except Exception as e:
-                        logger.error(f"Error processing chunk: {str(e)}")
-                        yield {"status": "error", "message": f"Error processing chunk: {str(e)}"}
-                
-                futures = [f for f in futures if not f.done()]  # Clean up completed futures
-
+        sizer.save()
+        if progress.docs_skipped:
+            yield {"status": "info", "message": f"Skipped {progress.docs_skipped} chunks that were already embedded"}
+        if pipeline.failed_batches:
+            # Leave the manifest untouched so the next run retries this file
+            raise Exception(f"{pipeline.failed_batches} batches failed to embed")
+        all_ids = pipeline.chunk_ids
+
+        # Drop chunks the previous version of this file produced that no longer exist
+        stale_ids = set(manifest.chunk_ids(data.file_path)) - set(all_ids)
+        delete_chunks(vectordb, list(stale_ids))
+        manifest.record(data.file_path, file_info, all_ids)
+
+        removed_files = 0
+        if data.prune_missing:
+            # Drop chunks of files that were removed from disk since they were ingested
+            for missing_path in manifest.missing_files():
+                delete_chunks(vectordb, manifest.remove(missing_path))
+                removed_files += 1
+        manifest.save()
+
+        if stale_ids:
+            yield {"status": "info", "message": f"Removed {len(stale_ids)} outdated chunks"}
+        if removed_files:
+            yield {"status": "info", "message": f"Removed chunks of {removed_files} files no longer on disk"}
         yield {"status": "success", "message": "Embedding completed successfully"}
 
     except Exception as e:
@@ -11,6 +11,32 @@ class EmbeddingRequest(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
     is_local: Optional[bool] = False
     local_embedding_model: Optional[str] = "granite-embedding:278m"
+    # Collection settings, stored on the collection; None keeps the current value.
+    # embedding_backend: "torch", "onnx" or "onnx-int8"
+    embedding_backend: Optional[str] = None
+    # Matryoshka truncation, only while the collection is empty
+    embedding_dim: Optional[int] = None
+    # HNSW index parameters; M and construction_ef only while the collection is empty
+    hnsw_m: Optional[int] = None
+    hnsw_construction_ef: Optional[int] = None
+    hnsw_search_ef: Optional[int] = None
+    # Also drop the chunks of every previously ingested file that is no longer on disk
+    prune_missing: Optional[bool] = False
+
+
+class BulkEmbeddingRequest(BaseModel):
+    # A directory to walk, a list of files, or both
+    directory: Optional[str] = None
+    file_paths: Optional[List[str]] = None
+    recursive: Optional[bool] = True
+    api_key: Optional[str] = None
+    collection: int
+    collection_name: str
+    user: int
+    # Applied to every file
+    metadata: Optional[Dict[str, Any]] = None
+    is_local: Optional[bool] = False
+    local_embedding_model: Optional[str] = "granite-embedding:278m"
 
 
 class ModelLoadRequest(BaseModel):
@@ -81,6 +107,20 @@ class VectorStoreQueryRequest(BaseModel):
     user: int
     api_key: Optional[str] = None
     top_k: int = 5
+    # Fuse BM25 keyword matches with the vector results (reciprocal-rank fusion)
+    hybrid: Optional[bool] = False
+    # Rescore rerank_candidates hits with a cross-encoder and keep the best top_k;
+    # skipped if it would take longer than rerank_budget_ms (0 = no budget)
+    rerank: Optional[bool] = False
+    rerank_candidates: Optional[int] = None
+    rerank_budget_ms: Optional[float] = None
+    # "similarity" or "mmr" (maximal marginal relevance over fetch_k candidates,
+    # mmr_lambda 1 = pure relevance, 0 = maximum diversity)
+    search_type: Optional[Literal["similarity", "mmr"]] = "similarity"
+    fetch_k: Optional[int] = None
+    mmr_lambda: Optional[float] = 0.5
+    # Metadata filter pushed down to Chroma, e.g. {"source": "a.pdf", "page": {"$gte": 3}}
+    filter: Optional[Dict[str, Any]] = None
     is_local: Optional[bool] = False
     local_embedding_model: Optional[str] = "granite-embedding:278m"
     prompt: Optional[str] = None
@@ -96,6 +136,11 @@ class VectorStoreQueryRequest(BaseModel):
     is_ollama: Optional[bool] = False
 
 
+class BatchVectorStoreQueryRequest(BaseModel):
+    # Caller-chosen ids -> queries; results come back under the same ids
+    queries: Dict[str, VectorStoreQueryRequest]
+
+
 class YoutubeTranscriptRequest(BaseModel):
     url: str
     user_id: int
@@ -107,6 +152,22 @@ class YoutubeTranscriptRequest(BaseModel):
     local_embedding_model: Optional[str] = "granite-embedding:278m"
 
 
+class CompactCollectionRequest(BaseModel):
+    collection_name: str
+
+
+class ExportCollectionRequest(BaseModel):
+    collection_name: str
+    archive_path: str
+
+
+class ImportCollectionRequest(BaseModel):
+    archive_path: str
+    # Defaults to the name stored in the archive
+    collection_name: Optional[str] = None
+    replace: Optional[bool] = False
+
+
 class DeleteCollectionRequest(BaseModel):
     collection_id: int
     collection_name: str
@@ -133,6 +194,14 @@ class QueryRequest(BaseModel):
     model: Optional[str] = None
     collection_name: Optional[str] = None
     top_k: Optional[int] = 5
+    hybrid: Optional[bool] = False
+    rerank: Optional[bool] = False
+    rerank_candidates: Optional[int] = None
+    rerank_budget_ms: Optional[float] = None
+    search_type: Optional[Literal["similarity", "mmr"]] = "similarity"
+    fetch_k: Optional[int] = None
+    mmr_lambda: Optional[float] = 0.5
+    filter: Optional[Dict[str, Any]] = None
     temperature: Optional[float] = 0.5
     max_completion_tokens: Optional[int] = 2048
     top_p: Optional[float] = 1
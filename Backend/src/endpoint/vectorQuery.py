@@ -1,14 +1,63 @@
-from src.endpoint.models import VectorStoreQueryRequest
+from src.endpoint.models import VectorStoreQueryRequest, BatchVectorStoreQueryRequest
 from src.vectorstorage.helpers.sanitizeCollectionName import sanitize_collection_name
-from src.vectorstorage.vectorstore import get_vectorstore
+from src.vectorstorage.vectorstore import get_vectorstore, collection_model_id
+from src.vectorstorage.query_cache import query_cache
+from src.vectorstorage.hybrid import HYBRID_CANDIDATES, Hit, dense_candidates, hybrid_search
+from src.vectorstorage.reranker import RERANK_CANDIDATES, reranker
+from src.vectorstorage.mmr import mmr_select
+from src.vectorstorage.helpers.buildWhereClause import build_where_clause
+from src.vectorstorage.warmup import collection_usage
+from typing import Any, Dict, List, Optional
+import logging
+import json
+
+logger = logging.getLogger(__name__)
+
+
+def _uses_stages(data: VectorStoreQueryRequest) -> bool:
+    return bool(data.hybrid or data.rerank or data.search_type == "mmr")
+
+
+def _stage_sizes(data: VectorStoreQueryRequest):
+    """(dense candidates to fetch, candidate pool after fusion, hits selected before reranking) for a query."""
+    select = max(data.top_k, data.rerank_candidates or RERANK_CANDIDATES) if data.rerank else data.top_k
+    pool = max(data.fetch_k or 4 * select, select) if data.search_type == "mmr" else select
+    fetch = max(HYBRID_CANDIDATES, pool) if data.hybrid else pool
+    return fetch, pool, select
+
+
+def _select_hits(collection, data: VectorStoreQueryRequest, query_vector: List[float], dense_hits: List[Hit], where: Optional[Dict[str, Any]] = None) -> List[Hit]:
+    """Apply the optional hybrid fusion, MMR and rerank stages to a query's dense candidates."""
+    _, pool, select = _stage_sizes(data)
+    hits = hybrid_search(collection, data.query, dense_hits, pool, where) if data.hybrid else dense_hits[:pool]
+    if data.search_type == "mmr":
+        hits = mmr_select(collection, query_vector, hits, select,
+                          data.mmr_lambda if data.mmr_lambda is not None else 0.5)
+    if data.rerank:
+        hits = reranker.rerank(data.query, hits, data.top_k, data.rerank_budget_ms)
+    return hits[:data.top_k]
 
 
 def query_vectorstore(data: VectorStoreQueryRequest, is_local: bool):
     try:
         collection_name = sanitize_collection_name(str(data.collection_name))
+        collection_usage.record(collection_name)
+        where = build_where_clause(data.filter)
         vectordb = get_vectorstore(
             data.api_key, collection_name, is_local, data.local_embedding_model)
-        results = vectordb.similarity_search(data.query, k=data.top_k)
+        model_id = collection_model_id(
+            data.api_key, collection_name, is_local, data.local_embedding_model)
+        query_vector = query_cache.get_or_compute(
+            model_id, data.query, vectordb.embeddings.embed_query)
+        if _uses_stages(data):
+            collection = vectordb._collection
+            dense_hits = dense_candidates(collection, [query_vector], _stage_sizes(data)[0], where)[0]
+            hits = _select_hits(collection, data, query_vector, dense_hits, where)
+            return {
+                "status": "success",
+                "results": [{"content": content, "metadata": metadata} for _, content, metadata in hits],
+            }
+        results = vectordb.similarity_search_by_vector(query_vector, k=data.top_k, filter=where)
         return {
             "status": "success",
             "results": [{"content": doc.page_content, "metadata": doc.metadata} for doc in results],
@@ -16,3 +65,100 @@ def query_vectorstore(data: VectorStoreQueryRequest, is_local: bool):
     except Exception as e:
         print(f"Error querying vectorstore: {str(e)}")
         return {"status": "error", "message": str(e)}
+
+
+def _embed_queries(model_id: str, embeddings, queries: List[str]) -> List[List[float]]:
+    """Resolve query vectors from the cache and encode all misses in one model batch."""
+    vectors = [query_cache.get(model_id, query) for query in queries]
+    missing = list(dict.fromkeys(q for q, v in zip(queries, vectors) if v is None))
+    if missing:
+        # embed_documents and embed_query share encode settings for our models, so cached vectors stay interchangeable
+        encoded = dict(zip(missing, embeddings.embed_documents(missing)))
+        for query, vector in encoded.items():
+            query_cache.put(model_id, query, vector)
+        vectors = [v if v is not None else encoded[q] for q, v in zip(queries, vectors)]
+    return vectors
+
+
+def query_vectorstore_batch(data: BatchVectorStoreQueryRequest) -> Dict[str, Any]:
+    """
+    Run many vector queries, possibly across collections, with one encode per
+    embedding model and one ANN lookup per collection and filter (plus a BM25 lookup for
+    each hybrid query, and the MMR and rerank stages where requested). Results are keyed by the
+    caller's query ids; a failing collection only fails its own queries.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+
+    # Group queries by the collection handle they resolve to
+    groups: Dict[tuple, List[str]] = {}
+    for key, query in data.queries.items():
+        collection_name = sanitize_collection_name(str(query.collection_name))
+        collection_usage.record(collection_name)
+        group = (collection_name, query.api_key, bool(query.is_local), query.local_embedding_model)
+        groups.setdefault(group, []).append(key)
+
+    # Resolve collections, then gather queries per embedding model so each model runs once
+    by_model: Dict[str, Dict[str, Any]] = {}
+    handles = {}
+    for group, keys in groups.items():
+        collection_name, api_key, is_local, local_embedding_model = group
+        try:
+            vectordb = get_vectorstore(api_key, collection_name, is_local, local_embedding_model)
+            if vectordb is None:
+                raise Exception(f"Failed to open collection {collection_name}")
+            model_id = collection_model_id(api_key, collection_name, is_local, local_embedding_model)
+        except Exception as e:
+            logger.error(f"Error opening {collection_name} for batch query: {str(e)}")
+            for key in keys:
+                results[key] = {"status": "error", "message": str(e)}
+            continue
+        handles[group] = vectordb
+        entry = by_model.setdefault(model_id, {"embeddings": vectordb.embeddings, "keys": []})
+        entry["keys"].extend(keys)
+
+    vectors: Dict[str, List[float]] = {}
+    for model_id, entry in by_model.items():
+        keys = entry["keys"]
+        try:
+            encoded = _embed_queries(model_id, entry["embeddings"], [data.queries[k].query for k in keys])
+            vectors.update(zip(keys, encoded))
+        except Exception as e:
+            logger.error(f"Error embedding batch queries with {model_id}: {str(e)}")
+            for key in keys:
+                results[key] = {"status": "error", "message": str(e)}
+
+    for group, vectordb in handles.items():
+        # Queries sharing a collection and filter share one lookup
+        by_filter: Dict[str, List[str]] = {}
+        wheres: Dict[str, Optional[Dict[str, Any]]] = {}
+        for key in groups[group]:
+            if key not in vectors:
+                continue
+            try:
+                where = build_where_clause(data.queries[key].filter)
+            except ValueError as e:
+                results[key] = {"status": "error", "message": str(e)}
+                continue
+            filter_key = json.dumps(where, sort_keys=True)
+            wheres[filter_key] = where
+            by_filter.setdefault(filter_key, []).append(key)
+
+        collection = vectordb._collection
+        for filter_key, keys in by_filter.items():
+            where = wheres[filter_key]
+            try:
+                # Sized for the query needing the most candidates
+                n_results = max(_stage_sizes(data.queries[k])[0] for k in keys)
+                candidates = dense_candidates(collection, [vectors[k] for k in keys], n_results, where)
+                for key, dense_hits in zip(keys, candidates):
+                    hits = _select_hits(collection, data.queries[key], vectors[key], dense_hits, where)
+                    results[key] = {
+                        "status": "success",
+                        "results": [{"content": content, "metadata": metadata} for _, content, metadata in hits],
+                    }
+            except Exception as e:
+                logger.error(f"Error querying {group[0]} in batch: {str(e)}")
+                for key in keys:
+                    results[key] = {"status": "error", "message": str(e)}
+
+    return {"status": "success", "results": {key: results[key] for key in data.queries}}
@@ -1,9 +1,12 @@
-from src.data.dataIntake.fileTypes.loadX import load_html
+from src.data.dataIntake.fileTypes.loadX import load_html_sync
 from src.data.dataIntake.textSplitting import split_text
 from src.data.dataIntake.getHtmlFiles import get_html_files
 from src.data.dataFetch.webcrawler import WebCrawler
 from src.endpoint.models import WebCrawlRequest
+from src.vectorstorage.helpers.sanitizeCollectionName import sanitize_collection_name
 from src.vectorstorage.vectorstore import get_vectorstore
+from src.vectorstorage.embeddings import add_documents_dedup, delete_chunks, chunk_id
+from src.vectorstorage.manifest import get_manifest
 
 from typing import Generator
 import json
@@ -34,28 +37,44 @@ def webcrawl(data: WebCrawlRequest, cancel_event=None) -> Generator[dict, None,
         root_url_dir = urlparse(
             data.base_url).netloc.replace(".", "_") + "_docs"
         collection_path = os.path.join(scraper.output_dir, root_url_dir)
+        collection_name = sanitize_collection_name(str(data.collection_name))
         vector_store = get_vectorstore(
-            data.api_key, data.collection_name, data.is_local, data.local_embedding_model)
+            data.api_key, collection_name, data.is_local, data.local_embedding_model)
 
         # Get all HTML files recursively
         html_files = get_html_files(collection_path)
         print(f"Found {len(html_files)} HTML files")
 
-        # Process files in batches for better performance
+        # Process files in batches for better performance, re-embedding only changed pages
+        manifest = get_manifest(collection_name)
         batch_size = 50
         total_batches = (len(html_files) + batch_size - 1) // batch_size
+        skipped_files = 0
         for i in range(0, len(html_files), batch_size):
             batch = html_files[i:i + batch_size]
+
             batch_docs = []
+            changed_files = []
 
             for file_path in batch:
-                content = load_html(file_path)
-                if content:
-                    split_content = split_text(content, file_path)
-                    batch_docs.extend(split_content)
+                file_status, file_info = manifest.check(file_path)
+                if file_status == "unchanged":
+                    skipped_files += 1
+                    continue
+                content = load_html_sync(file_path)
+                split_content = split_text(content, file_path) if content else []
+                batch_docs.extend(split_content)
+                changed_files.append((file_path, file_info, split_content))
 
             if batch_docs:
-                vector_store.add_documents(batch_docs)
+                add_documents_dedup(vector_store, batch_docs)
+
+            for file_path, file_info, split_content in changed_files:
+                ids = list(dict.fromkeys(chunk_id(doc) for doc in split_content))
+                stale_ids = set(manifest.chunk_ids(file_path)) - set(ids)
+                delete_chunks(vector_store, list(stale_ids))
+                manifest.record(file_path, file_info, ids)
+            manifest.save()
 
             current_batch = i//batch_size + 1
             progress_data = {
@@ -69,6 +88,13 @@ def webcrawl(data: WebCrawlRequest, cancel_event=None) -> Generator[dict, None,
             }
             yield f"data: {json.dumps(progress_data)}"
 
+        # Pages that disappeared from the crawl output no longer belong in the collection
+        for missing_path in manifest.missing_files(under=collection_path):
+            delete_chunks(vector_store, manifest.remove(missing_path))
+        manifest.save()
+        if skipped_files:
+            print(f"Skipped {skipped_files} unchanged HTML files")
+
         final_message = f"Successfully crawled and embedded {len(scraper.visited_urls)} pages from {data.base_url}"
         success_data = {
             "status": "success",
@@ -0,0 +1,144 @@
+from src.vectorstorage.vectorstore import get_app_data_dir
+from typing import Any, Dict, List, Optional
+import threading
+import logging
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("NOTATE_EMBED_TOKEN_BUDGET", "16384"))
+MIN_TOKEN_BUDGET = 512
+MAX_TOKEN_BUDGET = 65536
+# Batches slower than this are shrunk regardless of throughput, to keep progress responsive
+MAX_BATCH_SECONDS = float(os.environ.get("NOTATE_EMBED_MAX_BATCH_SECONDS", "20"))
+# Measurements taken at each budget before deciding which way to move
+SAMPLES_PER_STEP = 3
+
+tuning_path = os.path.join(get_app_data_dir(), "embedding_batch_tuning.json")
+_tuning_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for sizing, not truncation."""
+    return len(text) // 4 + 1
+
+
+def _load_tuning() -> Dict[str, Any]:
+    if not os.path.exists(tuning_path):
+        return {}
+    try:
+        with open(tuning_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable batch tuning file: {str(e)}")
+        return {}
+
+
+class AdaptiveBatchSizer:
+    """
+    Sizes embedding batches by total estimated tokens and hill-climbs the token
+    budget on measured throughput. Throughput is compared in tokens/s, since
+    length-bucketed batches of short chunks finish more docs/s than batches of
+    long ones at the same budget. Each budget is sampled a few times; the search
+    keeps moving while throughput improves, reverses with a smaller step when
+    it drops, and settles once the step is negligible. The best budget is
+    persisted per (model, device) so later jobs start from it.
+    """
+
+    def __init__(self, tuning_key: str, initial_budget: Optional[int] = None):
+        self.tuning_key = tuning_key
+        saved = _load_tuning().get(tuning_key)
+        self.warm = saved is not None and initial_budget is None
+        budget = initial_budget or (saved["token_budget"] if saved else DEFAULT_TOKEN_BUDGET)
+        self.token_budget = self._clamp(budget)
+        self.best_budget = self.token_budget
+        self.best_rate = 0.0
+        # A warm start only fine-tunes around the saved value
+        self.step = 1.25 if self.warm else 2.0
+        self.direction = 1
+        self.converged = False
+        self.last_batch_seconds = 0.0
+        self.last_docs_per_sec = 0.0
+        self._samples: List[float] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _clamp(budget: float) -> int:
+        return int(min(MAX_TOKEN_BUDGET, max(MIN_TOKEN_BUDGET, budget)))
+
+    def record(self, docs: int, tokens: int, seconds: float, budget: int) -> None:
+        """Feed one batch measurement into the search. budget is the one the batch was cut with."""
+        if seconds <= 0 or docs == 0:
+            return
+        with self._lock:
+            self.last_batch_seconds = seconds
+            self.last_docs_per_sec = docs / seconds
+            if budget != self.token_budget:
+                # Batch was formed before the last adjustment, it says nothing about the current budget
+                return
+            if seconds > MAX_BATCH_SECONDS and self.token_budget > MIN_TOKEN_BUDGET:
+                self.token_budget = self._clamp(self.token_budget / 2)
+                self.best_budget = min(self.best_budget, self.token_budget)
+                self._samples = []
+                return
+            if self.converged:
+                return
+            self._samples.append(tokens / seconds)
+            if len(self._samples) < SAMPLES_PER_STEP:
+                return
+
+            # Median is robust to the odd batch that waited on the writer or GC
+            rate = sorted(self._samples)[len(self._samples) // 2]
+            self._samples = []
+            if rate > self.best_rate:
+                self.best_rate = rate
+                self.best_budget = self.token_budget
+            else:
+                # Overshot: turn around from the best point with a finer step
+                self.direction = -self.direction
+                self.step = 1 + (self.step - 1) / 2
+                self.token_budget = self.best_budget
+            if self.step < 1.1:
+                self.converged = True
+                self.token_budget = self.best_budget
+                logger.info(f"Batch size for {self.tuning_key} converged at {self.best_budget} tokens ({self.best_rate:.1f} tokens/s)")
+                return
+            next_budget = self.token_budget * (self.step if self.direction > 0 else 1 / self.step)
+            if self._clamp(next_budget) == self.token_budget:
+                # Pinned at a bound, nothing left to explore in this direction
+                self.direction = -self.direction
+                next_budget = self.token_budget * (self.step if self.direction > 0 else 1 / self.step)
+            self.token_budget = self._clamp(next_budget)
+
+    def save(self) -> None:
+        """Persist the best budget found so far for this model and device."""
+        with self._lock:
+            if self.best_rate <= 0:
+                return
+            entry = {
+                "token_budget": self.best_budget,
+                "tokens_per_sec": round(self.best_rate, 2),
+                "converged": self.converged,
+                "updated": time.time(),
+            }
+        with _tuning_lock:
+            tuning = _load_tuning()
+            tuning[self.tuning_key] = entry
+            tmp_path = f"{tuning_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(tuning, f, indent=2)
+            os.replace(tmp_path, tuning_path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "token_budget": self.token_budget,
+                "best_budget": self.best_budget,
+                "best_tokens_per_sec": round(self.best_rate, 1),
+                "last_docs_per_sec": round(self.last_docs_per_sec, 1),
+                "last_batch_seconds": round(self.last_batch_seconds, 3),
+                "converged": self.converged,
+                "warm_start": self.warm,
+            }
@@ -0,0 +1,153 @@
+from langchain_chroma import Chroma
+from chromadb.config import Settings
+from typing import Any, Dict, Optional, Tuple
+import threading
+import chromadb
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Opt-in to an ephemeral store (tests, read-only installs). Never used as a silent fallback.
+CHROMA_IN_MEMORY = os.environ.get("NOTATE_CHROMA_IN_MEMORY") == "1"
+
+
+class ChromaClientManager:
+    """
+    Owns the process-wide Chroma client and caches LangChain collection wrappers
+    by sanitized collection name, so requests don't reopen the persistent store.
+    """
+
+    def __init__(self, path: str, in_memory: bool = CHROMA_IN_MEMORY):
+        self.path = path
+        self.in_memory = in_memory
+        self._client = None
+        self._handles: Dict[str, Tuple[Any, Chroma]] = {}
+        self._lock = threading.RLock()
+        # Per-collection guard for chunk writes, held briefly when a collection is swapped
+        self._write_locks: Dict[str, threading.RLock] = {}
+        # Collection ID -> the collection that replaced it in a swap
+        self._replaced: Dict[str, Any] = {}
+
+    def get_client(self):
+        """Open the Chroma client on first use and reuse it afterwards."""
+        if self._client is not None:
+            return self._client
+        with self._lock:
+            if self._client is None:
+                if self.in_memory:
+                    logger.warning("NOTATE_CHROMA_IN_MEMORY is set, using an ephemeral Chroma store")
+                    self._client = chromadb.Client(
+                        settings=Settings(
+                            anonymized_telemetry=False,
+                            allow_reset=True,
+                            is_persistent=False
+                        )
+                    )
+                else:
+                    self._client = chromadb.PersistentClient(
+                        path=self.path,
+                        settings=Settings(
+                            anonymized_telemetry=False,
+                            allow_reset=True,
+                            is_persistent=True
+                        )
+                    )
+                    logger.info(f"Opened persistent Chroma client at {self.path}")
+            return self._client
+
+    def get_vectorstore(self, collection_name: str, embeddings, collection_metadata: Optional[Dict[str, Any]] = None) -> Chroma:
+        """Return the cached wrapper for a collection, rebuilding it if the embedding function changed."""
+        with self._lock:
+            cached = self._handles.get(collection_name)
+            if cached is not None and cached[0] is embeddings:
+                return cached[1]
+            vectorstore = Chroma(
+                client=self.get_client(),
+                embedding_function=embeddings,
+                collection_name=collection_name,
+                collection_metadata=collection_metadata,
+            )
+            self._handles[collection_name] = (embeddings, vectorstore)
+            logger.info(f"Opened collection handle: {collection_name}")
+            return vectorstore
+
+    def get_collection(self, collection_name: str, metadata: Optional[Dict[str, Any]] = None):
+        """Return the native Chroma collection, creating it (with metadata) if needed."""
+        with self._lock:
+            cached = self._handles.get(collection_name)
+            if cached is not None:
+                return cached[1]._collection
+        return self.get_client().get_or_create_collection(collection_name, metadata=metadata)
+
+    def update_hnsw_metadata(self, collection_name: str, values: Dict[str, Any]) -> bool:
+        """
+        Change HNSW settings of an existing collection, e.g. hnsw:search_ef.
+        Chroma reads them when it loads the index, so they apply from the next
+        load; M and construction_ef only change when the index is rebuilt.
+        """
+        with self._lock:
+            collection = self.get_client().get_collection(collection_name)
+            metadata = dict(collection.metadata or {})
+            # Chroma rejects any hnsw:space in a modify, and dropping a non-default one would change it
+            if metadata.pop("hnsw:space", "l2") != "l2":
+                logger.warning(f"Not updating HNSW settings of {collection_name}: it uses a non-default distance")
+                return False
+            metadata.update(values)
+            collection.modify(metadata=metadata)
+            self.invalidate(collection_name)
+            return True
+
+    def invalidate(self, collection_name: Optional[str] = None) -> None:
+        """Drop cached handles for one collection, or all of them."""
+        with self._lock:
+            if collection_name is None:
+                self._handles.clear()
+            else:
+                self._handles.pop(collection_name, None)
+
+    def delete_collection(self, collection_name: str) -> bool:
+        """Delete a collection without loading any embedding model."""
+        with self._lock:
+            self.invalidate(collection_name)
+            client = self.get_client()
+            try:
+                client.delete_collection(collection_name)
+            except Exception as e:
+                logger.warning(f"Could not delete collection {collection_name}: {str(e)}")
+                return False
+            return True
+
+    def write_lock(self, collection_name: str) -> threading.RLock:
+        """Lock taken around writes to a collection so a swap never loses them."""
+        with self._lock:
+            return self._write_locks.setdefault(collection_name, threading.RLock())
+
+    def current_collection(self, collection):
+        """
+        The collection a write should go to: handles opened before a swap still
+        point at the old collection, so follow the swap to its replacement.
+        """
+        with self._lock:
+            while str(collection.id) in self._replaced:
+                collection = self._replaced[str(collection.id)]
+            return collection
+
+    def swap_collection(self, collection_name: str, replacement, retired_name: str):
+        """
+        Put replacement in place of a collection under its name. The old one is
+        renamed to retired_name and returned, so in-flight queries on it finish;
+        new handles open the replacement. Call with the write lock held.
+        """
+        with self._lock:
+            client = self.get_client()
+            current = client.get_collection(collection_name)
+            current.modify(name=retired_name)
+            try:
+                replacement.modify(name=collection_name)
+            except Exception:
+                current.modify(name=collection_name)
+                raise
+            self._replaced[str(current.id)] = replacement
+            self.invalidate(collection_name)
+            return current
@@ -0,0 +1,172 @@
+from src.vectorstorage.vectorstore import chroma_manager, get_collection_dir
+from src.vectorstorage.collection_config import CollectionConfig, get_collection_config, save_collection_config, drop_collection_config
+from src.vectorstorage.lexical_index import get_lexical_index, drop_lexical_index
+from src.vectorstorage.manifest import drop_manifest
+from dataclasses import asdict, fields
+from typing import Any, Dict, Optional
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import tempfile
+import tarfile
+import logging
+import shutil
+import json
+import time
+import io
+import os
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT = 1
+# Rows read from Chroma / the archive per round trip
+ARCHIVE_PAGE = int(os.environ.get("NOTATE_ARCHIVE_PAGE", "5000"))
+
+RECORDS_SCHEMA = pa.schema([("id", pa.string()), ("document", pa.string()), ("metadata", pa.string())])
+
+
+def export_collection(collection_name: str, archive_path: str) -> Dict[str, Any]:
+    """
+    Write a collection to an uncompressed tar holding manifest.json (counts,
+    Chroma metadata, collection settings), vectors.npy and records.parquet
+    (ID, document and JSON metadata per row, in the same order as the vectors).
+    Writes to the collection wait while it is exported; queries don't.
+    """
+    start = time.perf_counter()
+    collection = chroma_manager.get_client().get_collection(collection_name)
+    config = get_collection_config(collection_name)
+    # Chroma stores float32, so the archive holds exactly what was stored
+    dtype = np.float32
+    archive_dir = os.path.dirname(os.path.abspath(archive_path))
+    os.makedirs(archive_dir, exist_ok=True)
+
+    with chroma_manager.write_lock(collection_name), tempfile.TemporaryDirectory(dir=archive_dir) as work:
+        count = collection.count()
+        vectors_path = os.path.join(work, "vectors.npy")
+        records_path = os.path.join(work, "records.parquet")
+        vectors = None
+        dim = 0
+        written = 0
+        with pq.ParquetWriter(records_path, RECORDS_SCHEMA) as writer:
+            while written < count:
+                batch = collection.get(include=["embeddings", "documents", "metadatas"], limit=ARCHIVE_PAGE, offset=written)
+                if not batch["ids"]:
+                    break
+                page = np.asarray(batch["embeddings"], dtype=np.float32)
+                if vectors is None:
+                    dim = page.shape[1]
+                    vectors = np.lib.format.open_memmap(vectors_path, mode="w+", dtype=dtype, shape=(count, dim))
+                vectors[written:written + len(page)] = page
+                writer.write_table(pa.table({
+                    "id": batch["ids"],
+                    "document": batch["documents"],
+                    "metadata": [json.dumps(metadata) if metadata else None for metadata in batch["metadatas"]],
+                }, schema=RECORDS_SCHEMA))
+                written += len(page)
+        if vectors is None:
+            np.save(vectors_path, np.empty((0, 0), dtype=dtype))
+        else:
+            vectors.flush()
+            del vectors
+
+        manifest = {
+            "format": ARCHIVE_FORMAT,
+            "collection_name": collection_name,
+            "count": written,
+            "dim": int(dim),
+            "vector_dtype": np.dtype(dtype).name,
+            "collection_metadata": collection.metadata or {},
+            "config": asdict(config),
+            "exported_at": time.time(),
+        }
+        manifest_bytes = json.dumps(manifest, indent=2).encode("utf-8")
+
+        tmp_path = f"{archive_path}.tmp"
+        with tarfile.open(tmp_path, "w") as tar:
+            info = tarfile.TarInfo("manifest.json")
+            info.size = len(manifest_bytes)
+            info.mtime = int(manifest["exported_at"])
+            tar.addfile(info, io.BytesIO(manifest_bytes))
+            tar.add(vectors_path, arcname="vectors.npy")
+            tar.add(records_path, arcname="records.parquet")
+        os.replace(tmp_path, archive_path)
+
+    logger.info(f"Exported {collection_name}: {written} rows to {archive_path} in {time.perf_counter() - start:.1f}s")
+    return manifest
+
+
+def open_vectors(archive_path: str, member: tarfile.TarInfo) -> np.memmap:
+    """Map vectors.npy straight out of the (uncompressed) archive, without copying it."""
+    with open(archive_path, "rb") as f:
+        f.seek(member.offset_data)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        else:
+            raise ValueError(f"Unsupported .npy version {version}")
+        offset = f.tell()
+    if shape[0] == 0:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(archive_path, dtype=dtype, mode="r", shape=shape, offset=offset, order="F" if fortran_order else "C")
+
+
+def import_collection(archive_path: str, collection_name: Optional[str] = None, replace: bool = False) -> Dict[str, Any]:
+    """
+    Load an exported collection under its original or a new name, using the
+    stored vectors as-is (no embedding model runs) and rebuilding its lexical
+    index from the documents. An existing non-empty collection is only
+    replaced when replace is set.
+    """
+    start = time.perf_counter()
+    with tarfile.open(archive_path, "r:") as tar:
+        manifest = json.load(tar.extractfile("manifest.json"))
+        if manifest.get("format") != ARCHIVE_FORMAT:
+            raise ValueError(f"Unsupported archive format: {manifest.get('format')}")
+        collection_name = collection_name or manifest["collection_name"]
+        vectors = open_vectors(archive_path, tar.getmember("vectors.npy"))
+        if len(vectors) != manifest["count"]:
+            raise ValueError(f"Archive holds {len(vectors)} vectors but {manifest['count']} records")
+
+        client = chroma_manager.get_client()
+        with chroma_manager.write_lock(collection_name):
+            if collection_name in set(client.list_collections()):
+                if client.get_collection(collection_name).count() and not replace:
+                    raise ValueError(f"Collection {collection_name} already exists and is not empty")
+                chroma_manager.delete_collection(collection_name)
+                drop_manifest(collection_name)
+                drop_lexical_index(collection_name)
+                drop_collection_config(collection_name)
+                shutil.rmtree(get_collection_dir(collection_name), ignore_errors=True)
+
+            known = {field.name for field in fields(CollectionConfig)}
+            save_collection_config(collection_name, CollectionConfig(**{k: v for k, v in manifest["config"].items() if k in known}))
+            collection = client.create_collection(collection_name, metadata=manifest["collection_metadata"] or None, embedding_function=None)
+            index = get_lexical_index(collection_name)
+            try:
+                max_batch = min(client.get_max_batch_size(), ARCHIVE_PAGE)
+            except Exception:
+                max_batch = ARCHIVE_PAGE
+
+            loaded = 0
+            records = pq.ParquetFile(tar.extractfile("records.parquet"))
+            for batch in records.iter_batches(batch_size=max_batch):
+                ids = batch.column("id").to_pylist()
+                documents = batch.column("document").to_pylist()
+                metadatas = [json.loads(metadata) if metadata else None for metadata in batch.column("metadata").to_pylist()]
+                page = vectors[loaded:loaded + len(ids)]
+                collection.add(
+                    ids=ids,
+                    # float32 pages are slices of the mapped file; Chroma converts them on insert
+                    embeddings=page if page.dtype == np.float32 else page.astype(np.float32),
+                    documents=documents,
+                    metadatas=metadatas,
+                )
+                index.add(ids, documents, [(metadata or {}).get("source") for metadata in metadatas])
+                loaded += len(ids)
+            index.mark_backfilled()
+            chroma_manager.invalidate(collection_name)
+
+    logger.info(f"Imported {loaded} rows into {collection_name} from {archive_path} in {time.perf_counter() - start:.1f}s")
+    return {"collection_name": collection_name, "count": loaded, "dim": manifest["dim"], "seconds": round(time.perf_counter() - start, 2)}
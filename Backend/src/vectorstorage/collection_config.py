@@ -0,0 +1,90 @@
+from src.vectorstorage.vectorstore import get_collection_dir
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, Optional
+import threading
+import logging
+import json
+import os
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+DEFAULT_EMBEDDING_BACKEND = os.environ.get("NOTATE_EMBEDDING_BACKEND", "torch")
+# Config field -> Chroma collection metadata key
+HNSW_METADATA_KEYS = {
+    "hnsw_m": "hnsw:M",
+    "hnsw_construction_ef": "hnsw:construction_ef",
+    "hnsw_search_ef": "hnsw:search_ef",
+}
+
+
+@dataclass
+class CollectionConfig:
+    """Backend-side settings of a collection, stored next to its manifest."""
+    embedding_backend: str = DEFAULT_EMBEDDING_BACKEND
+    # Storage footprint: leading dimensions kept (None = full width). It fixes the
+    # stored vectors, so it can only change while the collection is empty.
+    embedding_dim: Optional[int] = None
+    # HNSW index parameters, None = Chroma's default (M 16, construction_ef 100, search_ef 10).
+    # M and construction_ef are fixed when the index is built; search_ef can change later.
+    hnsw_m: Optional[int] = None
+    hnsw_construction_ef: Optional[int] = None
+    hnsw_search_ef: Optional[int] = None
+
+    def hnsw_metadata(self) -> Optional[Dict[str, Any]]:
+        """Chroma collection metadata for the HNSW parameters that are set."""
+        metadata = {key: getattr(self, field) for field, key in HNSW_METADATA_KEYS.items() if getattr(self, field) is not None}
+        return metadata or None
+
+
+_configs: Dict[str, CollectionConfig] = {}
+_configs_lock = threading.Lock()
+
+
+def _config_path(collection_name: str) -> str:
+    return os.path.join(get_collection_dir(collection_name), "config.json")
+
+
+def get_collection_config(collection_name: str) -> CollectionConfig:
+    """Return a collection's settings, falling back to defaults for unset fields."""
+    with _configs_lock:
+        config = _configs.get(collection_name)
+        if config is not None:
+            return config
+        values = {}
+        path = _config_path(collection_name)
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+                known = {field.name for field in fields(CollectionConfig)}
+                values = {k: v for k, v in stored.items() if k in known}
+            except Exception as e:
+                logger.error(f"Error reading config for {collection_name}, using defaults: {str(e)}")
+        config = CollectionConfig(**values)
+        _configs[collection_name] = config
+        return config
+
+
+def save_collection_config(collection_name: str, config: CollectionConfig) -> None:
+    if config.embedding_backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {config.embedding_backend}")
+    if config.embedding_dim is not None and config.embedding_dim < 1:
+        raise ValueError(f"Invalid embedding dimension: {config.embedding_dim}")
+    for field, minimum in (("hnsw_m", 2), ("hnsw_construction_ef", 1), ("hnsw_search_ef", 1)):
+        value = getattr(config, field)
+        if value is not None and value < minimum:
+            raise ValueError(f"Invalid {field}: {value}")
+    with _configs_lock:
+        path = _config_path(collection_name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(config), f, indent=2)
+        os.replace(tmp_path, path)
+        _configs[collection_name] = config
+
+
+def drop_collection_config(collection_name: str) -> None:
+    """Forget the in-memory config, e.g. after the collection is deleted."""
+    with _configs_lock:
+        _configs.pop(collection_name, None)
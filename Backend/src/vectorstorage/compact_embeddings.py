@@ -0,0 +1,66 @@
+from langchain_core.embeddings import Embeddings
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import numpy as np
+import threading
+
+# Wrappers are reused so the Chroma handle cache sees the same embedding object per collection
+_WRAPPER_CACHE_SIZE = 16
+_wrappers: "OrderedDict[Tuple[int, Optional[int]], CompactEmbeddings]" = OrderedDict()
+_wrappers_lock = threading.Lock()
+
+
+def compact_vectors(vectors, dim: Optional[int] = None) -> np.ndarray:
+    """
+    Truncate vectors to their first dim components (Matryoshka) and
+    renormalize. Returns a float32 array.
+    """
+    array = np.asarray(vectors, dtype=np.float32)
+    if dim and dim < array.shape[-1]:
+        array = array[..., :dim]
+        norms = np.linalg.norm(array, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        array = array / norms
+    return array
+
+
+class CompactEmbeddings(Embeddings):
+    """
+    Embedding function for collections with a reduced storage footprint.
+    Wraps the collection's model so ingest and query vectors are compacted the
+    same way. Only meaningful for Matryoshka-trained models, whose leading
+    dimensions carry most of the signal.
+    """
+
+    def __init__(self, base: Embeddings, dim: Optional[int] = None):
+        self.base = base
+        self.dim = dim
+
+    def compact(self, vectors) -> List[List[float]]:
+        """Apply this collection's compaction to vectors produced by the base model."""
+        return compact_vectors(vectors, self.dim).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self.compact(self.base.embed_documents(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return compact_vectors(self.base.embed_query(text), self.dim).tolist()
+
+
+def compact_embeddings(base: Embeddings, dim: Optional[int] = None) -> Embeddings:
+    """Return base unchanged for full-width storage, else a shared CompactEmbeddings wrapper."""
+    if not dim:
+        return base
+    key = (id(base), dim)
+    with _wrappers_lock:
+        wrapper = _wrappers.get(key)
+        if wrapper is not None and wrapper.base is base:
+            _wrappers.move_to_end(key)
+            return wrapper
+        wrapper = CompactEmbeddings(base, dim)
+        _wrappers[key] = wrapper
+        while len(_wrappers) > _WRAPPER_CACHE_SIZE:
+            _wrappers.popitem(last=False)
+        return wrapper
@@ -0,0 +1,220 @@
+from src.vectorstorage.vectorstore import chroma_manager, chroma_db_path, collection_config, get_collection_dir
+from src.vectorstorage.lexical_index import get_lexical_index
+from typing import Any, Dict, List, Optional
+import numpy as np
+import threading
+import logging
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+# Rows copied per get/add round trip
+COMPACTION_PAGE = int(os.environ.get("NOTATE_COMPACTION_PAGE", "2000"))
+# How long the replaced collection stays around for queries that already hold it
+COMPACTION_GRACE_SECONDS = float(os.environ.get("NOTATE_COMPACTION_GRACE_SECONDS", "30"))
+# Stored vectors replayed as queries for the before/after latency
+LATENCY_QUERIES = 50
+
+
+def _work_name(collection_name: str, kind: str, stamp: int) -> str:
+    # Chroma names are at most 63 characters and must end alphanumeric
+    return f"{collection_name[:40]}-{kind}-{stamp}"
+
+
+def _work_file(collection_name: str) -> str:
+    return os.path.join(get_collection_dir(collection_name), "compaction_work.json")
+
+
+def _record_work(collection_name: str, names: List[str]) -> None:
+    """Persist the work collections a compaction is about to create, so a restart can clean them up."""
+    path = _work_file(collection_name)
+    if not names:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"collections": names}, f)
+    os.replace(tmp_path, path)
+
+
+def dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def query_latency(collection, probes: List[List[float]], k: int = 10) -> Optional[Dict[str, float]]:
+    """p50/p99 in ms of single-vector queries against a collection."""
+    if not probes:
+        return None
+    latencies = []
+    for vector in probes:
+        start = time.perf_counter()
+        collection.query(query_embeddings=[vector], n_results=k, include=[])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {"p50_ms": round(float(np.percentile(latencies, 50)), 3), "p99_ms": round(float(np.percentile(latencies, 99)), 3)}
+
+
+def _all_ids(collection) -> List[str]:
+    ids = []
+    offset = 0
+    while True:
+        batch = collection.get(include=[], limit=COMPACTION_PAGE * 10, offset=offset)
+        if not batch["ids"]:
+            return ids
+        ids.extend(batch["ids"])
+        offset += len(batch["ids"])
+
+
+def _copy(source, target, ids: Optional[List[str]] = None) -> int:
+    """Copy rows (all of them, or the given IDs) with their stored vectors."""
+    copied = 0
+    offset = 0
+    while True:
+        if ids is None:
+            batch = source.get(include=["embeddings", "documents", "metadatas"], limit=COMPACTION_PAGE, offset=offset)
+        else:
+            page_ids = ids[offset:offset + COMPACTION_PAGE]
+            batch = source.get(ids=page_ids, include=["embeddings", "documents", "metadatas"]) if page_ids else {"ids": []}
+        if not batch["ids"]:
+            return copied
+        target.upsert(ids=batch["ids"], embeddings=batch["embeddings"], documents=batch["documents"], metadatas=batch["metadatas"])
+        copied += len(batch["ids"])
+        offset += COMPACTION_PAGE if ids is not None else len(batch["ids"])
+
+
+class Compactor:
+    """
+    Background rewrite of a collection into a fresh one, dropping the deleted
+    entries and fragmented graph an HNSW index accumulates under deletes and
+    re-ingests. Live rows are copied with their stored vectors (no embedding
+    model runs) while queries and ingests continue on the original; writes
+    made during the copy are replayed under the collection's write lock, then
+    the new collection takes over the name. The old one is kept for a grace
+    period so queries already running on it finish, then deleted.
+    The new index is built with the collection's configured HNSW parameters.
+    """
+
+    def __init__(self, grace_seconds: float = COMPACTION_GRACE_SECONDS):
+        self.grace_seconds = grace_seconds
+        self._lock = threading.Lock()
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+    def start(self, collection_name: str) -> bool:
+        """Start compacting a collection. Returns False if it's already being compacted."""
+        with self._lock:
+            job = self.jobs.get(collection_name)
+            if job is not None and job["state"] not in ("done", "failed"):
+                return False
+            self.jobs[collection_name] = {
+                "state": "starting", "rows": None, "copied": 0, "started_at": time.time(),
+                "finished_at": None, "error": None, "disk_bytes_before": None, "disk_bytes_after": None,
+                "reclaimed_bytes": None, "latency_before": None, "latency_after": None,
+            }
+        threading.Thread(target=self._run, args=(collection_name,), name=f"compact-{collection_name}", daemon=True).start()
+        return True
+
+    def _update(self, collection_name: str, **values) -> None:
+        with self._lock:
+            self.jobs[collection_name].update(values)
+
+    def _run(self, collection_name: str) -> None:
+        client = chroma_manager.get_client()
+        stamp = int(time.time())
+        temp_name = _work_name(collection_name, "compact", stamp)
+        retired_name = _work_name(collection_name, "retired", stamp)
+        replacement = None
+        swapped = False
+        try:
+            self._drop_leftovers(collection_name)
+            source = client.get_collection(collection_name)
+            _record_work(collection_name, [temp_name, retired_name])
+            metadata = dict(source.metadata or {})
+            metadata.update(collection_config(collection_name).hnsw_metadata() or {})
+            probes = source.get(include=["embeddings"], limit=LATENCY_QUERIES)["embeddings"]
+            probes = [list(vector) for vector in probes]
+            self._update(collection_name, state="copying", rows=source.count(),
+                         disk_bytes_before=dir_size(chroma_db_path), latency_before=query_latency(source, probes))
+
+            # Bulk copy without holding the write lock: ingests keep going into the source
+            replacement = client.create_collection(temp_name, metadata=metadata, embedding_function=None)
+            copied = _copy(source, replacement)
+            self._update(collection_name, copied=copied, state="swapping")
+
+            with chroma_manager.write_lock(collection_name):
+                # Catch up with writes and deletes made during the copy, then swap
+                source_ids = _all_ids(source)
+                copied_ids = set(_all_ids(replacement))
+                missing = [chunk_id for chunk_id in source_ids if chunk_id not in copied_ids]
+                removed = list(copied_ids - set(source_ids))
+                _copy(source, replacement, missing)
+                if removed:
+                    replacement.delete(ids=removed)
+                retired = chroma_manager.swap_collection(collection_name, replacement, retired_name)
+                swapped = True
+            self._update(collection_name, copied=copied + len(missing), rows=len(source_ids),
+                         state="retiring", latency_after=query_latency(replacement, probes))
+            get_lexical_index(collection_name).optimize()
+            logger.info(f"Swapped compacted {collection_name}: {len(source_ids)} rows, "
+                        f"{len(missing)} caught up, {len(removed)} dropped")
+
+            time.sleep(self.grace_seconds)
+            client.delete_collection(retired.name)
+            _record_work(collection_name, [])
+            disk_after = dir_size(chroma_db_path)
+            with self._lock:
+                job = self.jobs[collection_name]
+                job.update(state="done", finished_at=time.time(), disk_bytes_after=disk_after,
+                           reclaimed_bytes=job["disk_bytes_before"] - disk_after)
+        except Exception as e:
+            logger.error(f"Error compacting {collection_name}: {str(e)}")
+            if replacement is not None and not swapped:
+                try:
+                    client.delete_collection(temp_name)
+                    _record_work(collection_name, [])
+                except Exception:
+                    pass
+            self._update(collection_name, state="failed", error=str(e), finished_at=time.time())
+
+    def _drop_leftovers(self, collection_name: str) -> None:
+        """
+        Delete work collections an interrupted compaction of this collection
+        recorded before creating them. Nothing else is touched, whatever its
+        name; and nothing at all if the collection itself is missing, since
+        its rows may then only survive in the retired copy.
+        """
+        path = _work_file(collection_name)
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            recorded = json.load(f).get("collections", [])
+        client = chroma_manager.get_client()
+        existing = set(client.list_collections())
+        if collection_name not in existing:
+            logger.warning(f"Not cleaning up compaction of {collection_name}: the collection is missing, "
+                           f"its rows may be in {', '.join(recorded)}")
+            return
+        for name in recorded:
+            if name != collection_name and name in existing:
+                logger.info(f"Deleting leftover compaction collection {name}")
+                client.delete_collection(name)
+        _record_work(collection_name, [])
+
+    def status(self, collection_name: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            if collection_name is not None:
+                job = self.jobs.get(collection_name)
+                return dict(job) if job is not None else {"state": "idle"}
+            return {name: dict(job) for name, job in self.jobs.items()}
+
+
+# Global compactor instance
+compactor = Compactor()
@@ -0,0 +1,193 @@
+from src.vectorstorage.init_store import get_models_dir
+from src.vectorstorage.onnx_backend import ensure_onnx_model, onnx_model_bytes
+from langchain_huggingface import HuggingFaceEmbeddings
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import threading
+import logging
+import torch
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+# RAM budget for resident embedding models, in MB (0 disables eviction)
+EMBEDDING_RAM_BUDGET_MB = int(os.environ.get("NOTATE_EMBEDDING_RAM_BUDGET_MB", "4096"))
+
+DEFAULT_ENCODE_KWARGS = {
+    "normalize_embeddings": True,
+    "max_seq_length": 512
+}
+
+_device = None
+
+
+def get_embedding_device() -> str:
+    """Probe torch once per process for the best available device."""
+    global _device
+    if _device is None:
+        if torch.cuda.is_available():
+            _device = "cuda"
+        elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
+            _device = "mps"
+        else:
+            _device = "cpu"
+        logger.info(f"Using device: {_device}")
+    return _device
+
+
+def _estimate_model_bytes(embeddings: HuggingFaceEmbeddings) -> int:
+    """Estimate resident size of a loaded model from its parameters and buffers."""
+    client = getattr(embeddings, "_client", None) or getattr(embeddings, "client", None)
+    if client is None or not hasattr(client, "parameters"):
+        return 0
+    total = sum(p.numel() * p.element_size() for p in client.parameters())
+    total += sum(b.numel() * b.element_size() for b in client.buffers())
+    return total
+
+
+class EmbeddingRegistry:
+    """
+    Process-wide cache of local embedding models.
+    Models are keyed by (model name, device, backend, encode kwargs), loaded
+    once and evicted least-recently-used first when the RAM budget is exceeded.
+    The "onnx" and "onnx-int8" backends run an exported copy of the model on
+    ONNX Runtime (CPU) and fall back to PyTorch if the export can't be used.
+    """
+
+    def __init__(self, ram_budget_mb: int = EMBEDDING_RAM_BUDGET_MB):
+        self.ram_budget_bytes = ram_budget_mb * 1024 * 1024
+        self._models: "OrderedDict[Tuple, Tuple[HuggingFaceEmbeddings, int]]" = OrderedDict()
+        self._lock = threading.RLock()
+        # Per-key locks so concurrent requests for a model that is loading wait for one load
+        self._loading: Dict[Tuple, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_time_total = 0.0
+        self.last_load_time = 0.0
+
+    @staticmethod
+    def make_key(model_name: str, device: str, encode_kwargs: Dict[str, Any], backend: str = "torch") -> Tuple:
+        return (model_name, device, backend, tuple(sorted(encode_kwargs.items())))
+
+    def get(self, model_name: str, device: Optional[str] = None, encode_kwargs: Optional[Dict[str, Any]] = None, backend: str = "torch") -> HuggingFaceEmbeddings:
+        """Return a loaded embedding model, loading it on first use."""
+        # ONNX Runtime is only used for CPU inference here
+        device = "cpu" if backend != "torch" else (device or get_embedding_device())
+        encode_kwargs = dict(DEFAULT_ENCODE_KWARGS if encode_kwargs is None else encode_kwargs)
+        key = self.make_key(model_name, device, encode_kwargs, backend)
+
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        # Loads can take minutes; only callers of the same key wait for this one
+        with load_lock:
+            try:
+                with self._lock:
+                    entry = self._models.get(key)
+                    if entry is not None:
+                        # Loaded by a concurrent caller while we waited
+                        self._models.move_to_end(key)
+                        return entry[0]
+                try:
+                    embeddings = self._load(model_name, device, encode_kwargs, backend)
+                except Exception as e:
+                    logger.error(f"Error initializing {backend} embeddings with {device}: {str(e)}")
+                    if backend != "torch":
+                        logger.info("Falling back to the PyTorch backend")
+                        embeddings = self.get(model_name, None, encode_kwargs)
+                    elif device != "cpu":
+                        logger.info("Falling back to CPU")
+                        embeddings = self.get(model_name, "cpu", encode_kwargs)
+                    else:
+                        raise
+                    # Alias the failed key to the fallback model so we don't retry the load on every call
+                    with self._lock:
+                        self._models[key] = (embeddings, 0)
+                    return embeddings
+
+                size = _estimate_model_bytes(embeddings) or onnx_model_bytes(model_name, backend)
+                with self._lock:
+                    self._models[key] = (embeddings, size)
+                    self._evict(keep=key)
+                return embeddings
+            finally:
+                with self._lock:
+                    if self._loading.get(key) is load_lock:
+                        del self._loading[key]
+
+    def _load(self, model_name: str, device: str, encode_kwargs: Dict[str, Any], backend: str = "torch") -> HuggingFaceEmbeddings:
+        models_dir = get_models_dir()
+        logger.info(f"Loading local embedding model {model_name} ({backend}) on {device} from {models_dir}")
+        start = time.perf_counter()
+        if backend == "torch":
+            embeddings = HuggingFaceEmbeddings(
+                model_name=model_name,
+                model_kwargs={"device": device},
+                encode_kwargs={"device": device, **encode_kwargs},
+                cache_folder=models_dir
+            )
+        else:
+            export_dir, file_name = ensure_onnx_model(model_name, backend)
+            embeddings = HuggingFaceEmbeddings(
+                model_name=export_dir,
+                model_kwargs={"device": device, "backend": "onnx", "model_kwargs": {"file_name": file_name}},
+                encode_kwargs={"device": device, **encode_kwargs},
+            )
+        self.last_load_time = time.perf_counter() - start
+        self.load_time_total += self.last_load_time
+        logger.info(f"Loaded {model_name} in {self.last_load_time:.2f}s")
+        return embeddings
+
+    def _evict(self, keep: Tuple) -> None:
+        """Drop least-recently-used models until the budget is met, never the one just loaded."""
+        if self.ram_budget_bytes <= 0:
+            return
+        evicted = False
+        while self.resident_bytes() > self.ram_budget_bytes and len(self._models) > 1:
+            key = next(k for k in self._models if k != keep)
+            embeddings, size = self._models.pop(key)
+            for alias in [k for k, (e, _) in self._models.items() if e is embeddings and k != keep]:
+                del self._models[alias]
+            self.evictions += 1
+            evicted = True
+            logger.info(f"Evicting embedding model {key[0]} ({size / (1024*1024):.1f}MB)")
+            del embeddings
+        if evicted and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def resident_bytes(self) -> int:
+        return sum(size for _, size in self._models.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "models": [
+                    {"model_name": k[0], "device": k[1], "backend": k[2], "size_mb": round(size / (1024*1024), 1)}
+                    for k, (_, size) in self._models.items()
+                ],
+                "resident_mb": round(self.resident_bytes() / (1024*1024), 1),
+                "ram_budget_mb": round(self.ram_budget_bytes / (1024*1024), 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "load_time_total": round(self.load_time_total, 3),
+                "last_load_time": round(self.last_load_time, 3),
+            }
+
+
+# Global embedding registry instance
+embedding_registry = EmbeddingRegistry()
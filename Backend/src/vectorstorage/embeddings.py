@@ -1,66 +1,221 @@
+from src.vectorstorage.lexical_index import get_lexical_index
+from src.vectorstorage.vectorstore import chroma_manager
+from src.vectorstorage.compact_embeddings import CompactEmbeddings
+from langchain_core.documents import Document
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import threading
+import hashlib
+import logging
 import time
+import os
 
+# Documents per embed_documents call; large batches keep the model busy between writes
+EMBED_BATCH_SIZE = int(os.environ.get("NOTATE_EMBED_BATCH_SIZE", "256"))
+# Largest batch the model runs in one forward pass; bigger tuned batches are sub-batched
+EMBED_MAX_FORWARD_BATCH = int(os.environ.get("NOTATE_EMBED_MAX_FORWARD_BATCH", "256"))
+# Fallback when the Chroma client can't report its own limit
+DEFAULT_MAX_WRITE_BATCH = 5000
 
-def chunk_list(lst, n):
-    """Yield successive n-sized chunks from lst."""
-    for i in range(0, len(lst), n):
-        yield lst[i:i + n]
+logger = logging.getLogger(__name__)
 
 
-def embed_chunk(args):
-    """Embed a chunk of documents."""
-    vectordb, chunk, chunk_num, total_chunks, start_time, time_history = args
-    try:
-        vectordb.add_documents(chunk)
-
-        # Calculate time taken for this chunk
-        current_time = time.time()
-        chunk_time = current_time - start_time
-        time_history.append(chunk_time)
-
-        # Keep only last 5 times
-        if len(time_history) > 5:
-            time_history.popleft()
-
-        # Basic stats to return for all chunks
-        result = {
-            "chunk": chunk_num,
-            "total_chunks": total_chunks,
-            "docs_in_chunk": len(chunk),
-            "percent_complete": round((chunk_num / total_chunks * 100), 2),
-            "elapsed_time": current_time - start_time,
-        }
-
-        # Only add time estimates after 20 chunks and if we have enough data points
-        if chunk_num >= 20 and len(time_history) >= 3:
-            current_avg_time = sum(time_history) / len(time_history)
-
-            # Store the lowest average time seen so far
-            if not hasattr(embed_chunk, 'lowest_avg_time') or current_avg_time < embed_chunk.lowest_avg_time:
-                embed_chunk.lowest_avg_time = current_avg_time
-
-            remaining_chunks = total_chunks - chunk_num
-            est_remaining_time = remaining_chunks * embed_chunk.lowest_avg_time
-            est_finish_time = time.strftime(
-                '%H:%M:%S', time.localtime(current_time + est_remaining_time))
-            est_remaining_time_formatted = time.strftime(
-                '%H:%M:%S', time.gmtime(est_remaining_time))
-
-            result.update({
-                "est_finish_time": est_finish_time,
-                "time_per_chunk": embed_chunk.lowest_avg_time,
-                "remaining_chunks": remaining_chunks,
-                "est_remaining_time": est_remaining_time_formatted
-            })
+def chunk_id(doc: Document) -> str:
+    """Deterministic chunk ID from the chunk's source and content hash."""
+    source = str(doc.metadata.get("source", ""))
+    return hashlib.sha256(f"{source}\0{doc.page_content}".encode("utf-8")).hexdigest()
+
+
+def clean_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Coerce metadata to the scalar types Chroma accepts."""
+    cleaned = {}
+    for key, value in (metadata or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, (str, int, float, bool)):
+            cleaned[key] = value
         else:
-            result.update({
-                "est_finish_time": "calculating...",
-                "time_per_chunk": "calculating...",
-                "remaining_chunks": total_chunks - chunk_num,
-                "est_remaining_time": "calculating..."
-            })
-
-        return result
-    except Exception as e:
-        raise Exception(
-            f"Error embedding chunk {chunk_num}/{total_chunks}: {str(e)}")
+            cleaned[key] = str(value)
+    # Chroma rejects empty metadata dicts
+    return cleaned or {"source": ""}
+
+
+def split_new_chunks(vectordb, docs: List[Document]) -> Tuple[List[str], List[str], List[Document]]:
+    """
+    Assign deterministic IDs and drop chunks the collection already holds.
+    Returns (ids of all unique chunks, ids of new chunks, new chunks).
+    """
+    unique = {}
+    for doc in docs:
+        unique.setdefault(chunk_id(doc), doc)
+    ids = list(unique.keys())
+    if not ids:
+        return [], [], []
+    existing = set(chroma_manager.current_collection(vectordb._collection).get(ids=ids, include=[])["ids"])
+    new_ids = [i for i in ids if i not in existing]
+    return ids, new_ids, [unique[i] for i in new_ids]
+
+
+def encode_documents(embeddings, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+    """
+    embed_documents with the model's forward batch size set to batch_size.
+    Local SentenceTransformer models otherwise re-batch every call at their
+    default of 32; other models ignore batch_size.
+    """
+    if isinstance(embeddings, CompactEmbeddings):
+        return embeddings.compact(encode_documents(embeddings.base, texts, batch_size))
+    client = getattr(embeddings, "_client", None)
+    encode_kwargs = getattr(embeddings, "encode_kwargs", None)
+    if batch_size and client is not None and hasattr(client, "encode") and isinstance(encode_kwargs, dict):
+        # Same preprocessing as HuggingFaceEmbeddings.embed_documents, so queries and chunks match
+        texts = [text.replace("\n", " ") for text in texts]
+        try:
+            return client.encode(texts, show_progress_bar=False, **{**encode_kwargs, "batch_size": batch_size}).tolist()
+        except (RuntimeError, MemoryError) as e:
+            # e.g. out of device or host memory at this batch size; the model's own sub-batching still fits
+            logger.warning(f"Encoding {len(texts)} texts in one batch failed, using the default batch size: {str(e)}")
+    return embeddings.embed_documents(texts)
+
+
+def embed_texts(embeddings, docs: List[Document], batch_size: Optional[int] = None) -> List[List[float]]:
+    """
+    Stage 1: run the embedding model over a batch of documents.
+    Texts are encoded shortest-first so each model sub-batch pads to a similar
+    length; vectors are returned in the input order. batch_size sets the
+    model's forward batch (see encode_documents).
+    """
+    order = sorted(range(len(docs)), key=lambda i: len(docs[i].page_content))
+    sorted_vectors = encode_documents(embeddings, [docs[i].page_content for i in order], batch_size)
+    vectors = [None] * len(docs)
+    for position, index in enumerate(order):
+        vectors[index] = sorted_vectors[position]
+    return vectors
+
+
+def write_embeddings(vectordb, ids: List[str], vectors: List[List[float]], docs: List[Document]) -> None:
+    """
+    Stage 2: bulk-upsert precomputed vectors, bypassing the wrapper's embedding
+    call, and add the chunks to the collection's lexical index.
+    """
+    try:
+        max_batch = vectordb._client.get_max_batch_size()
+    except Exception:
+        max_batch = DEFAULT_MAX_WRITE_BATCH
+    name = vectordb._collection.name
+    with chroma_manager.write_lock(name):
+        collection = chroma_manager.current_collection(vectordb._collection)
+        for start in range(0, len(ids), max_batch):
+            end = start + max_batch
+            collection.upsert(
+                ids=ids[start:end],
+                embeddings=vectors[start:end],
+                documents=[doc.page_content for doc in docs[start:end]],
+                metadatas=[clean_metadata(doc.metadata) for doc in docs[start:end]],
+            )
+    get_lexical_index(name).add(ids, [doc.page_content for doc in docs], [doc.metadata.get("source") for doc in docs])
+
+
+def add_documents_dedup(vectordb, docs: List[Document]) -> Tuple[List[str], int]:
+    """
+    Add documents under deterministic IDs, skipping chunks already in the collection.
+    Existing IDs are checked before any embedding work runs.
+    Returns (ids of all chunks in docs, number of chunks skipped).
+    """
+    ids, new_ids, new_docs = split_new_chunks(vectordb, docs)
+    for start in range(0, len(new_docs), EMBED_BATCH_SIZE):
+        batch_ids = new_ids[start:start + EMBED_BATCH_SIZE]
+        batch_docs = new_docs[start:start + EMBED_BATCH_SIZE]
+        write_embeddings(vectordb, batch_ids, embed_texts(vectordb.embeddings, batch_docs), batch_docs)
+    return ids, len(docs) - len(new_ids)
+
+
+def delete_chunks(vectordb, ids: List[str]) -> None:
+    """Remove chunks from a collection and its lexical index by ID."""
+    if ids:
+        name = vectordb._collection.name
+        with chroma_manager.write_lock(name):
+            chroma_manager.current_collection(vectordb._collection).delete(ids=list(ids))
+        get_lexical_index(name).remove(list(ids))
+
+
+class IngestProgress:
+    """
+    Tracks per-stage timings of an ingest job and renders progress events.
+    total_docs may be unknown for streamed sources; fraction_hint (e.g. bytes
+    read / file size) is then used for the completion percentage.
+    """
+
+    def __init__(self, total_docs: Optional[int] = None, fraction_hint: Optional[Callable[[], float]] = None):
+        self.total_docs = total_docs
+        self.fraction_hint = fraction_hint
+        self.start_time = time.time()
+        self.batches_queued = 0
+        self.docs_embedded = 0
+        self.docs_written = 0
+        self.docs_skipped = 0
+        self.batches_written = 0
+        self.embed_seconds = 0.0
+        self.write_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def queued(self, skipped: int) -> None:
+        with self._lock:
+            self.batches_queued += 1
+            self.docs_skipped += skipped
+
+    def timed_embed(self, embeddings, docs: List[Document], batch_size: Optional[int] = None) -> List[List[float]]:
+        start = time.perf_counter()
+        vectors = embed_texts(embeddings, docs, batch_size)
+        with self._lock:
+            self.embed_seconds += time.perf_counter() - start
+            self.docs_embedded += len(docs)
+        return vectors
+
+    def timed_write(self, vectordb, ids: List[str], vectors: List[List[float]], docs: List[Document]) -> None:
+        start = time.perf_counter()
+        write_embeddings(vectordb, ids, vectors, docs)
+        with self._lock:
+            self.write_seconds += time.perf_counter() - start
+            self.docs_written += len(docs)
+            self.batches_written += 1
+
+    def _fraction(self) -> Optional[float]:
+        done = self.docs_written + self.docs_skipped
+        if self.total_docs:
+            return min(1.0, done / self.total_docs)
+        if self.total_docs == 0:
+            return 1.0
+        if self.fraction_hint is not None:
+            return min(1.0, self.fraction_hint())
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            current_time = time.time()
+            elapsed = current_time - self.start_time
+            fraction = self._fraction()
+            result = {
+                "chunk": self.batches_written,
+                "total_chunks": max(self.batches_queued, self.batches_written),
+                "docs_written": self.docs_written,
+                "docs_skipped": self.docs_skipped,
+                "total_docs": self.total_docs,
+                "percent_complete": round(fraction * 100, 2) if fraction is not None else "calculating...",
+                "elapsed_time": elapsed,
+                # Per-stage throughput in chunks (documents) per second of stage time
+                "embed_rate": round(self.docs_embedded / self.embed_seconds, 1) if self.embed_seconds else 0.0,
+                "write_rate": round(self.docs_written / self.write_seconds, 1) if self.write_seconds else 0.0,
+            }
+
+            # Only estimate once a few batches have gone through
+            if self.batches_written >= 3 and fraction:
+                est_remaining_time = elapsed * (1 - fraction) / fraction
+                result.update({
+                    "est_finish_time": time.strftime('%H:%M:%S', time.localtime(current_time + est_remaining_time)),
+                    "est_remaining_time": time.strftime('%H:%M:%S', time.gmtime(est_remaining_time)),
+                })
+            else:
+                result.update({
+                    "est_finish_time": "calculating...",
+                    "est_remaining_time": "calculating...",
+                })
+            return result
@@ -0,0 +1,54 @@
+from typing import Any, Dict, Optional
+
+COMPARISON_OPERATORS = {"$eq", "$ne", "$gt", "$gte", "$lt", "$lte", "$in", "$nin"}
+LOGICAL_OPERATORS = {"$and", "$or"}
+SCALAR_TYPES = (str, int, float, bool)
+
+
+def _check_value(field: str, value: Any) -> Any:
+    if isinstance(value, SCALAR_TYPES):
+        return value
+    if isinstance(value, dict):
+        if len(value) != 1:
+            raise ValueError(f"Condition on '{field}' must have exactly one operator")
+        operator, operand = next(iter(value.items()))
+        if operator not in COMPARISON_OPERATORS:
+            raise ValueError(f"Unsupported operator '{operator}' on '{field}'")
+        if operator in ("$in", "$nin"):
+            if not isinstance(operand, list) or not operand or not all(isinstance(v, SCALAR_TYPES) for v in operand):
+                raise ValueError(f"'{operator}' on '{field}' needs a non-empty list of values")
+        elif operator in ("$gt", "$gte", "$lt", "$lte"):
+            if isinstance(operand, bool) or not isinstance(operand, (int, float)):
+                raise ValueError(f"'{operator}' on '{field}' needs a number")
+        elif not isinstance(operand, SCALAR_TYPES):
+            raise ValueError(f"'{operator}' on '{field}' needs a string, number or boolean")
+        return {operator: operand}
+    raise ValueError(f"Unsupported filter value for '{field}'")
+
+
+def build_where_clause(filter_expr: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Validate a metadata filter and turn it into a Chroma where clause.
+    Accepts Chroma's syntax ({"source": "a.pdf"}, {"page": {"$gte": 3}},
+    {"$or": [...]}) and wraps several top-level fields in an implicit $and,
+    which Chroma requires. Returns None for an empty filter.
+    """
+    if not filter_expr:
+        return None
+    if not isinstance(filter_expr, dict):
+        raise ValueError("Filter must be an object")
+
+    conditions = []
+    for key, value in filter_expr.items():
+        if key in LOGICAL_OPERATORS:
+            if not isinstance(value, list) or len(value) < 2:
+                raise ValueError(f"'{key}' needs a list of at least two conditions")
+            clauses = [build_where_clause(item) for item in value]
+            if any(clause is None for clause in clauses):
+                raise ValueError(f"'{key}' conditions can't be empty")
+            conditions.append({key: clauses})
+        elif key.startswith("$"):
+            raise ValueError(f"Unsupported operator '{key}'")
+        else:
+            conditions.append({key: _check_value(key, value)})
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
@@ -0,0 +1,96 @@
+from src.vectorstorage.lexical_index import get_lexical_index
+from typing import Any, Dict, List, Optional, Tuple
+import os
+
+# Standard RRF constant: damps the influence of the very top ranks of either list
+RRF_K = 60
+# Candidates taken from each retriever before fusion
+HYBRID_CANDIDATES = int(os.environ.get("NOTATE_HYBRID_CANDIDATES", "50"))
+# Deepest BM25 ranking searched for candidates that match a query's filter
+HYBRID_MAX_CANDIDATES = int(os.environ.get("NOTATE_HYBRID_MAX_CANDIDATES", "2000"))
+
+Hit = Tuple[str, str, Dict[str, Any]]  # (chunk id, content, metadata)
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Fuse ranked ID lists: score(id) = sum over lists of 1 / (k + rank)."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def dense_candidates(collection, query_vectors: List[List[float]], n: int, where: Optional[Dict[str, Any]] = None) -> List[List[Hit]]:
+    """Nearest neighbours for several query vectors in one Chroma call, restricted to chunks matching where."""
+    response = collection.query(
+        query_embeddings=query_vectors,
+        n_results=n,
+        where=where,
+        include=["documents", "metadatas"],
+    )
+    return [
+        [(chunk_id, content, metadata or {}) for chunk_id, content, metadata in zip(ids, documents, metadatas)]
+        for ids, documents, metadatas in zip(response["ids"], response["documents"], response["metadatas"])
+    ]
+
+
+def source_filter(where: Optional[Dict[str, Any]]) -> Optional[List[str]]:
+    """
+    The sources a where clause limits chunks to, when it does so by equality
+    or $in on "source" (alone or in a top-level $and); None if it doesn't.
+    """
+    if not where:
+        return None
+    sources = None
+    for condition in where["$and"] if "$and" in where else [where]:
+        value = condition.get("source")
+        if isinstance(value, dict):
+            value = value.get("$eq", value.get("$in"))
+        values = value if isinstance(value, list) else [value]
+        if value is None or not all(isinstance(v, str) for v in values):
+            continue
+        sources = set(values) if sources is None else sources & set(values)
+    return sorted(sources) if sources is not None else None
+
+
+def lexical_candidates(collection, index, query: str, n: int, where: Optional[Dict[str, Any]], known: Dict[str, Hit]) -> List[str]:
+    """
+    Up to n BM25 chunk IDs that match where, best first; known (hits already
+    known to match) is filled in with the ones loaded here. A source filter
+    is applied in the index; other conditions are checked against Chroma,
+    searching deeper until n candidates survive or the index runs out.
+    IDs the index still holds after a delete drop out here too.
+    """
+    sources = source_filter(where)
+    checked = set(known)
+    limit = n
+    while True:
+        ranked = [chunk_id for chunk_id, _ in index.search(query, limit, sources)]
+        unchecked = [chunk_id for chunk_id in ranked if chunk_id not in checked]
+        if unchecked:
+            stored = collection.get(ids=unchecked, where=where, include=["documents", "metadatas"])
+            for chunk_id, content, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+                known[chunk_id] = (chunk_id, content, metadata or {})
+            checked.update(unchecked)
+        in_scope = [chunk_id for chunk_id in ranked if chunk_id in known]
+        if len(in_scope) >= n or len(ranked) < limit or limit >= HYBRID_MAX_CANDIDATES:
+            return in_scope[:n]
+        limit = min(limit * 4, HYBRID_MAX_CANDIDATES)
+
+
+def hybrid_search(collection, query: str, dense_hits: List[Hit], top_k: int, where: Optional[Dict[str, Any]] = None) -> List[Hit]:
+    """
+    Fuse dense hits with BM25 hits from the collection's lexical index. While
+    the index is still being backfilled in the background it would only know
+    recent chunks, so the dense hits are returned alone until it's complete.
+    """
+    index = get_lexical_index(collection.name)
+    if not index.start_backfill(collection):
+        return dense_hits[:top_k]
+    known = {hit[0]: hit for hit in dense_hits}
+    # Only hits that match the filter, so out-of-scope ones can't take fused slots
+    lexical_ids = lexical_candidates(collection, index, query, max(HYBRID_CANDIDATES, top_k), where, known)
+
+    fused = reciprocal_rank_fusion([[hit[0] for hit in dense_hits], lexical_ids])[:top_k]
+    return [known[chunk_id] for chunk_id, _ in fused]
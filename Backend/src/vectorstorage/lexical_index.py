@@ -0,0 +1,184 @@
+from src.vectorstorage.vectorstore import get_collection_dir
+from typing import Dict, List, Optional, Tuple
+import threading
+import sqlite3
+import logging
+import time
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(query: str) -> str:
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+    Each whitespace-separated term becomes a quoted token, or a phrase when it
+    holds several tokens (so "AB-1234" or "E_CONN.REFUSED" match as written);
+    terms are OR-ed and BM25 ranks chunks matching more of them higher.
+    """
+    terms = []
+    for term in query.split():
+        tokens = _TOKEN.findall(term)
+        if tokens:
+            terms.append('"' + " ".join(tokens) + '"')
+    return " OR ".join(dict.fromkeys(terms))
+
+
+class LexicalIndex:
+    """
+    On-disk BM25 index of a collection's chunks (SQLite FTS5), kept in step
+    with Chroma by chunk ID. Each chunk's source is kept in an indexed column
+    so searches can be limited to some files. Lives next to the collection's
+    manifest.
+    """
+
+    def __init__(self, collection_name: str):
+        self.collection_name = collection_name
+        self.path = os.path.join(get_collection_dir(collection_name), "lexical.db")
+        self._lock = threading.Lock()
+        self._backfilled = False
+        self._backfill_thread: Optional[threading.Thread] = None
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value TEXT)")
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(chunk_map)")}
+            if columns and "source" not in columns:
+                # Built before chunks carried their source: start over, the backfill refills it
+                logger.info(f"Rebuilding lexical index for {collection_name} with chunk sources")
+                self._conn.execute("DROP TABLE chunk_map")
+                self._conn.execute("DROP TABLE IF EXISTS chunks_fts")
+                self._conn.execute("DELETE FROM index_meta")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS chunk_map (rowid INTEGER PRIMARY KEY, chunk_id TEXT UNIQUE NOT NULL, source TEXT)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS chunk_map_source ON chunk_map (source)")
+            self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(content, tokenize = 'unicode61 remove_diacritics 2')")
+
+    def add(self, ids: List[str], texts: List[str], sources: Optional[List[Optional[str]]] = None) -> int:
+        """Index chunks not indexed yet, with their source files. Returns how many were added."""
+        added = 0
+        with self._lock, self._conn:
+            for chunk_id, text, source in zip(ids, texts, sources or [None] * len(ids)):
+                cursor = self._conn.execute("INSERT OR IGNORE INTO chunk_map (chunk_id, source) VALUES (?, ?)",
+                                            (chunk_id, source if isinstance(source, str) else None))
+                if cursor.rowcount:
+                    # Chunk IDs are content hashes, so an existing ID already has the right text
+                    self._conn.execute("INSERT INTO chunks_fts (rowid, content) VALUES (?, ?)", (cursor.lastrowid, text or ""))
+                    added += 1
+        return added
+
+    def remove(self, ids: List[str]) -> None:
+        with self._lock, self._conn:
+            for chunk_id in ids:
+                row = self._conn.execute("SELECT rowid FROM chunk_map WHERE chunk_id = ?", (chunk_id,)).fetchone()
+                if row:
+                    self._conn.execute("DELETE FROM chunks_fts WHERE rowid = ?", row)
+                    self._conn.execute("DELETE FROM chunk_map WHERE rowid = ?", row)
+
+    def search(self, query: str, k: int, sources: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """Top-k chunk IDs by BM25, best first, with their (positive) scores; optionally only from the given sources."""
+        match = build_match_query(query)
+        if not match or sources == []:
+            return []
+        scope = f" AND m.source IN ({', '.join('?' * len(sources))})" if sources else ""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT m.chunk_id, -f.rank FROM chunks_fts f JOIN chunk_map m ON m.rowid = f.rowid "
+                f"WHERE chunks_fts MATCH ?{scope} ORDER BY f.rank LIMIT ?",
+                (match, *(sources or []), k),
+            ).fetchall()
+        return [(chunk_id, score) for chunk_id, score in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunk_map").fetchone()[0]
+
+    def _meta(self, key: str):
+        row = self._conn.execute("SELECT value FROM index_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def is_backfilled(self) -> bool:
+        """Whether the index holds every chunk of the collection."""
+        if not self._backfilled:
+            with self._lock:
+                self._backfilled = self._meta("backfilled") is not None
+        return self._backfilled
+
+    def backfill(self, collection, page: int = 5000) -> None:
+        """
+        Index chunks stored before the index existed. Runs once per collection;
+        later writes keep the index current.
+        """
+        if self.is_backfilled():
+            return
+        start = time.perf_counter()
+        added = 0
+        offset = 0
+        while True:
+            batch = collection.get(include=["documents", "metadatas"], limit=page, offset=offset)
+            if not batch["ids"]:
+                break
+            added += self.add(batch["ids"], batch["documents"], [(m or {}).get("source") for m in batch["metadatas"]])
+            offset += len(batch["ids"])
+        self.mark_backfilled()
+        logger.info(f"Backfilled lexical index for {self.collection_name}: {added} chunks in {time.perf_counter() - start:.1f}s")
+
+    def start_backfill(self, collection) -> bool:
+        """
+        Backfill on a background thread unless the index is complete or a
+        backfill is already running. Returns whether the index is complete.
+        """
+        if self.is_backfilled():
+            return True
+        with self._lock:
+            if self._backfill_thread is None or not self._backfill_thread.is_alive():
+                self._backfill_thread = threading.Thread(
+                    target=self._run_backfill, args=(collection,), name=f"lexical-backfill-{self.collection_name}", daemon=True)
+                self._backfill_thread.start()
+        return False
+
+    def _run_backfill(self, collection) -> None:
+        try:
+            self.backfill(collection)
+        except Exception as e:
+            logger.error(f"Error backfilling lexical index for {self.collection_name}: {str(e)}")
+
+    def mark_backfilled(self) -> None:
+        """Record that the index holds every chunk of the collection."""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES ('backfilled', ?)", (str(time.time()),))
+            self._backfilled = True
+
+    def optimize(self) -> None:
+        """Merge FTS5 segments; worth running after large ingests."""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('optimize')")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_indexes: Dict[str, LexicalIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_lexical_index(collection_name: str) -> LexicalIndex:
+    """Return the shared lexical index for a collection."""
+    with _indexes_lock:
+        index = _indexes.get(collection_name)
+        if index is None:
+            index = LexicalIndex(collection_name)
+            _indexes[collection_name] = index
+        return index
+
+
+def drop_lexical_index(collection_name: str) -> None:
+    """Close a collection's index, e.g. before its files are removed."""
+    with _indexes_lock:
+        index = _indexes.pop(collection_name, None)
+    if index is not None:
+        index.close()
@@ -0,0 +1,134 @@
+from src.vectorstorage.vectorstore import get_collection_dir
+from typing import Any, Dict, List, Optional, Tuple
+import threading
+import hashlib
+import logging
+import json
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def file_hash(path: str, block_size: int = 1024 * 1024) -> str:
+    """Stream a file through sha256 without reading it into memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def metadata_fingerprint(metadata: Optional[Dict[str, Any]]) -> str:
+    """Hash of the request metadata a file was ingested with ("" for none)."""
+    if not metadata:
+        return ""
+    return hashlib.sha256(json.dumps(metadata, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class CollectionManifest:
+    """
+    Record of the source files ingested into a collection: path, size, mtime,
+    content hash, the metadata it was ingested with and the chunk IDs each
+    file produced. Lets ingestion skip unchanged files and remove chunks of
+    files that changed or disappeared.
+    """
+
+    def __init__(self, collection_name: str):
+        self.collection_name = collection_name
+        self.path = os.path.join(get_collection_dir(collection_name), "manifest.json")
+        self._lock = threading.RLock()
+        self.files: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.files = json.load(f).get("files", {})
+            except Exception as e:
+                logger.error(f"Error reading manifest for {collection_name}, starting empty: {str(e)}")
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.abspath(path)
+
+    def check(self, path: str, metadata: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Compare a file on disk, and the metadata it is about to be ingested
+        with, with its manifest entry.
+        Returns ("new" | "changed" | "metadata_changed" | "unchanged", current file info);
+        "metadata_changed" means the content is the same but the metadata is not.
+        Size and mtime are checked first; the file is hashed only when they differ.
+        """
+        stat = os.stat(path)
+        info = {"size": stat.st_size, "mtime": stat.st_mtime, "metadata": metadata_fingerprint(metadata)}
+        with self._lock:
+            entry = self.files.get(self._key(path))
+        if entry is None:
+            info["hash"] = file_hash(path)
+            return "new", info
+        if entry["size"] == info["size"] and entry["mtime"] == info["mtime"]:
+            info["hash"] = entry["hash"]
+        else:
+            info["hash"] = file_hash(path)
+            if info["hash"] != entry["hash"]:
+                return "changed", info
+            # Touched but not modified: refresh the stat so the next check is cheap
+            with self._lock:
+                entry.update(size=info["size"], mtime=info["mtime"])
+        if entry.get("metadata", "") != info["metadata"]:
+            return "metadata_changed", info
+        return "unchanged", info
+
+    def chunk_ids(self, path: str) -> List[str]:
+        with self._lock:
+            entry = self.files.get(self._key(path))
+            return list(entry["chunk_ids"]) if entry else []
+
+    def record(self, path: str, info: Dict[str, Any], chunk_ids: List[str]) -> None:
+        with self._lock:
+            self.files[self._key(path)] = {
+                "size": info["size"],
+                "mtime": info["mtime"],
+                "hash": info["hash"],
+                "metadata": info.get("metadata", ""),
+                "chunk_ids": list(chunk_ids),
+            }
+
+    def remove(self, path: str) -> List[str]:
+        """Forget a file and return the chunk IDs it owned."""
+        with self._lock:
+            entry = self.files.pop(self._key(path), None)
+            return entry["chunk_ids"] if entry else []
+
+    def missing_files(self, under: Optional[str] = None) -> List[str]:
+        """Recorded files that no longer exist on disk, optionally limited to a directory."""
+        prefix = os.path.join(os.path.abspath(under), "") if under else None
+        with self._lock:
+            paths = list(self.files.keys())
+        return [p for p in paths if (prefix is None or p.startswith(prefix)) and not os.path.exists(p)]
+
+    def save(self) -> None:
+        """Write the manifest atomically so a crash never leaves it half-written."""
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"files": self.files}, f)
+            os.replace(tmp_path, self.path)
+
+
+_manifests: Dict[str, CollectionManifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def get_manifest(collection_name: str) -> CollectionManifest:
+    """Return the shared manifest for a collection."""
+    with _manifests_lock:
+        manifest = _manifests.get(collection_name)
+        if manifest is None:
+            manifest = CollectionManifest(collection_name)
+            _manifests[collection_name] = manifest
+        return manifest
+
+
+def drop_manifest(collection_name: str) -> None:
+    """Forget the in-memory manifest, e.g. after the collection is deleted."""
+    with _manifests_lock:
+        _manifests.pop(collection_name, None)
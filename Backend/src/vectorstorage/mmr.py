@@ -0,0 +1,49 @@
+from src.vectorstorage.hybrid import Hit
+from typing import List
+import numpy as np
+
+
+def maximal_marginal_relevance(query_vector, candidates, k: int, lambda_mult: float = 0.5) -> List[int]:
+    """
+    Indices of k candidates chosen by maximal marginal relevance.
+
+    Relevance to the query and the candidate-candidate similarity matrix are
+    computed once as matrix products; each selection step is then a vector
+    update of every candidate's similarity to the closest already-selected one.
+    lambda_mult=1 is plain relevance order, lower values favour diversity.
+    """
+    candidates = np.asarray(candidates, dtype=np.float32)
+    if candidates.size == 0 or k <= 0:
+        return []
+    query = np.asarray(query_vector, dtype=np.float32)
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+    k = min(k, len(candidates))
+
+    first = int(np.argmax(relevance))
+    selected = [first]
+    max_similarity = similarity[first].copy()
+    available = np.ones(len(candidates), dtype=bool)
+    available[first] = False
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        chosen = int(np.argmax(scores))
+        selected.append(chosen)
+        available[chosen] = False
+        np.maximum(max_similarity, similarity[chosen], out=max_similarity)
+    return selected
+
+
+def mmr_select(collection, query_vector, hits: List[Hit], k: int, lambda_mult: float = 0.5) -> List[Hit]:
+    """Pick k diverse hits, loading their stored vectors in one Chroma call."""
+    if len(hits) <= 1:
+        return hits[:k]
+    stored = collection.get(ids=[hit[0] for hit in hits], include=["embeddings"])
+    vectors = dict(zip(stored["ids"], stored["embeddings"]))
+    hits = [hit for hit in hits if hit[0] in vectors]
+    order = maximal_marginal_relevance(query_vector, [vectors[hit[0]] for hit in hits], k, lambda_mult)
+    return [hits[i] for i in order]
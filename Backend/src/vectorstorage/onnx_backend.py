@@ -0,0 +1,140 @@
+from src.vectorstorage.init_store import get_models_dir
+from typing import Any, Dict, List, Tuple
+import numpy as np
+import threading
+import platform
+import logging
+import json
+import glob
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+# Minimum cosine similarity between ONNX and PyTorch vectors of the same text.
+# fp32 ONNX is numerically the same model; dynamic int8 trades a little accuracy for speed.
+ONNX_TOLERANCE = {
+    "onnx": 0.9999,
+    "onnx-int8": 0.99,
+}
+
+# Probe texts for the compatibility check, mixing languages and lengths like real chunks
+PROBE_TEXTS = [
+    "What is the capital of France?",
+    "Vector databases store embeddings and answer nearest-neighbour queries.",
+    "Die Katze schläft auf dem Sofa, während draußen der Regen fällt.",
+    "机器学习模型将文本转换为向量表示。",
+    "def chunk_list(lst, n):\n    for i in range(0, len(lst), n):\n        yield lst[i:i + n]",
+    " ".join(["Quarterly revenue grew in every region except the north-east."] * 12),
+]
+
+_export_lock = threading.Lock()
+
+
+def onnx_model_dir(model_name: str, backend: str) -> str:
+    """Where the exported artifacts of a model live, under the embedding models directory."""
+    return os.path.join(get_models_dir(), "onnx", model_name.replace("/", "--"), backend)
+
+
+def quantization_target() -> str:
+    """Pick the dynamic quantization config for this CPU (override with NOTATE_ONNX_QUANTIZATION)."""
+    override = os.environ.get("NOTATE_ONNX_QUANTIZATION")
+    if override:
+        return override
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "arm64"
+    flags = ""
+    if os.path.exists("/proc/cpuinfo"):
+        with open("/proc/cpuinfo", "r", encoding="utf-8", errors="ignore") as f:
+            flags = f.read()
+    if "avx512_vnni" in flags:
+        return "avx512_vnni"
+    if "avx512f" in flags:
+        return "avx512"
+    return "avx2"
+
+
+def _cosines(a: List[List[float]], b: List[List[float]]) -> np.ndarray:
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    a /= np.linalg.norm(a, axis=1, keepdims=True)
+    b /= np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def _export(model_name: str, backend: str, export_dir: str) -> str:
+    """Export a model to ONNX (optionally int8) and return the model file relative to export_dir."""
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    logger.info(f"Exporting {model_name} to ONNX ({backend}) in {export_dir}")
+    # Exports on load when the hub repo doesn't ship an ONNX file
+    model = SentenceTransformer(model_name, device="cpu", backend="onnx", cache_folder=get_models_dir())
+    model.save_pretrained(export_dir)
+    if backend == "onnx-int8":
+        export_dynamic_quantized_onnx_model(model, quantization_target(), export_dir)
+        candidates = glob.glob(os.path.join(export_dir, "**", "*qint8*.onnx"), recursive=True)
+    else:
+        candidates = [p for p in glob.glob(os.path.join(export_dir, "**", "*.onnx"), recursive=True) if "qint8" not in p]
+    if not candidates:
+        raise RuntimeError(f"ONNX export of {model_name} produced no model file")
+    return os.path.relpath(candidates[0], export_dir).replace(os.sep, "/")
+
+
+def _check_compatibility(model_name: str, backend: str, export_dir: str, file_name: str) -> float:
+    """Encode the probe texts with both backends and return the worst cosine similarity."""
+    from sentence_transformers import SentenceTransformer
+
+    reference = SentenceTransformer(model_name, device="cpu", cache_folder=get_models_dir())
+    exported = SentenceTransformer(export_dir, device="cpu", backend="onnx", model_kwargs={"file_name": file_name})
+    expected = reference.encode(PROBE_TEXTS, normalize_embeddings=True)
+    actual = exported.encode(PROBE_TEXTS, normalize_embeddings=True)
+    return float(_cosines(expected, actual).min())
+
+
+def ensure_onnx_model(model_name: str, backend: str) -> Tuple[str, str]:
+    """
+    Export a model on first use and verify it against PyTorch.
+    Returns (export directory, model file relative to it). Raises if the
+    export fails or its vectors fall outside the documented tolerance.
+    """
+    if backend not in ONNX_TOLERANCE:
+        raise ValueError(f"Not an ONNX backend: {backend}")
+    export_dir = onnx_model_dir(model_name, backend)
+    meta_path = os.path.join(export_dir, "notate_export.json")
+    with _export_lock:
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        else:
+            os.makedirs(export_dir, exist_ok=True)
+            start = time.perf_counter()
+            file_name = _export(model_name, backend, export_dir)
+            min_cosine = _check_compatibility(model_name, backend, export_dir, file_name)
+            meta = {
+                "model_name": model_name,
+                "backend": backend,
+                "file_name": file_name,
+                "min_cosine": min_cosine,
+                "tolerance": ONNX_TOLERANCE[backend],
+                "export_seconds": round(time.perf_counter() - start, 1),
+            }
+            # Written last: a half-finished export is redone on the next load
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=2)
+            logger.info(f"Exported {model_name} ({backend}), min cosine vs PyTorch {min_cosine:.5f}")
+    if meta["min_cosine"] < ONNX_TOLERANCE[backend]:
+        raise ValueError(
+            f"{backend} export of {model_name} is outside tolerance "
+            f"(min cosine {meta['min_cosine']:.5f} < {ONNX_TOLERANCE[backend]})")
+    return export_dir, meta["file_name"]
+
+
+def onnx_model_bytes(model_name: str, backend: str) -> int:
+    """Size of the exported model file, as a stand-in for its resident size."""
+    meta_path = os.path.join(onnx_model_dir(model_name, backend), "notate_export.json")
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta: Dict[str, Any] = json.load(f)
+        return os.path.getsize(os.path.join(onnx_model_dir(model_name, backend), meta["file_name"]))
+    except Exception:
+        return 0
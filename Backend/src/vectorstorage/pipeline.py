@@ -0,0 +1,258 @@
+from src.vectorstorage.embeddings import EMBED_BATCH_SIZE, EMBED_MAX_FORWARD_BATCH, IngestProgress, chunk_id, split_new_chunks
+from src.vectorstorage.batch_tuner import AdaptiveBatchSizer, estimate_tokens
+from langchain_core.documents import Document
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List, Optional
+import threading
+import asyncio
+import logging
+import queue
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+EMBED_WORKERS = int(os.environ.get("NOTATE_EMBED_WORKERS", "2"))
+# Batches allowed to wait between two stages before the upstream stage blocks
+INGEST_QUEUE_DEPTH = int(os.environ.get("NOTATE_INGEST_QUEUE_DEPTH", "4"))
+
+# Upper bound on documents per batch when batches are sized by tokens
+MAX_DOCS_PER_BATCH = 8192
+# Batches' worth of documents gathered and sorted by length before batches are cut (1 disables)
+BUCKET_WINDOW = int(os.environ.get("NOTATE_EMBED_BUCKET_WINDOW", "4"))
+
+_DONE = object()
+
+
+class IngestPipeline:
+    """
+    Staged ingest: documents -> batch + dedup -> embed (N workers) -> write (1 writer).
+
+    Stages are connected by bounded queues, so a producer that outpaces the
+    model blocks instead of buffering the whole input, and memory stays
+    proportional to batch size x (queue depth + bucket window). Progress
+    events are emitted by the writer as batches actually land in Chroma.
+
+    The batcher collects a window of several batches, sorts it by length and
+    cuts batches from the sorted run, so each batch holds chunks of similar
+    length and the encoder pads less.
+
+    on_done, if given, is called with the chunk IDs of every batch once it is
+    settled: written or already stored (error None), or dropped (the error).
+    """
+
+    def __init__(self, vectordb, progress: IngestProgress, workers: int = EMBED_WORKERS, batch_size: int = EMBED_BATCH_SIZE, queue_depth: int = INGEST_QUEUE_DEPTH, sizer: Optional[AdaptiveBatchSizer] = None, bucket_window: int = BUCKET_WINDOW, on_done: Optional[Callable[[List[str], Optional[str]], None]] = None):
+        self.vectordb = vectordb
+        self.embeddings = vectordb.embeddings
+        self.progress = progress
+        self.workers = max(1, workers)
+        # With a sizer, batches are cut by estimated tokens and batch_size no longer applies
+        self.sizer = sizer
+        self.batch_size = MAX_DOCS_PER_BATCH if sizer else batch_size
+        self.bucket_window = max(1, bucket_window)
+        self.on_done = on_done
+        self.events: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self.failed_batches = 0
+        self._embed_queue = queue.Queue(maxsize=queue_depth)
+        self._write_queue = queue.Queue(maxsize=queue_depth)
+        self._batch: List[Document] = []
+        self._batch_tokens = 0
+        self._ids: Dict[str, None] = {}
+        self._batch_lock = threading.Lock()
+        self._active_workers = self.workers
+        self._workers_lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._closed = False
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def chunk_ids(self) -> List[str]:
+        """IDs of every chunk fed through the pipeline, including skipped duplicates."""
+        return list(self._ids)
+
+    def start(self) -> "IngestPipeline":
+        for i in range(self.workers):
+            self._spawn(self._embed_worker, f"embed-worker-{i}")
+        self._spawn(self._writer, "embed-writer")
+        return self
+
+    def _spawn(self, target, name: str) -> None:
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        """Blocking put that gives up when the pipeline is cancelled."""
+        while not self._cancelled.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._cancelled.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _error(self, message: str, ids: Optional[List[str]] = None) -> None:
+        logger.error(message)
+        with self._workers_lock:
+            self.failed_batches += 1
+        self.events.put({"status": "error", "message": message})
+        if ids:
+            self._settled(ids, message)
+
+    def _settled(self, ids: List[str], error: Optional[str] = None) -> None:
+        if self.on_done is not None and ids:
+            try:
+                self.on_done(ids, error)
+            except Exception as e:
+                logger.error(f"Error in ingest callback: {str(e)}")
+
+    # Stage 1: batching and dedup, runs on the caller's (feeding) thread
+
+    def add(self, doc: Document) -> None:
+        """Queue one document. Blocks while downstream stages are saturated."""
+        with self._batch_lock:
+            self._batch.append(doc)
+            self._batch_tokens += estimate_tokens(doc.page_content)
+            if len(self._batch) < self.batch_size * self.bucket_window and (
+                    self.sizer is None or self._batch_tokens < self.sizer.token_budget * self.bucket_window):
+                return
+            window, self._batch = self._batch, []
+            self._batch_tokens = 0
+        for batch in self._cut_batches(window):
+            self._submit(batch)
+
+    def _cut_batches(self, window: List[Document]) -> List[List[Document]]:
+        """Sort a window by length and cut it into batches of similar-length chunks."""
+        if self.bucket_window > 1:
+            window = sorted(window, key=lambda doc: len(doc.page_content))
+        budget = self.sizer.token_budget if self.sizer is not None else None
+        batches, batch, tokens = [], [], 0
+        for doc in window:
+            batch.append(doc)
+            tokens += estimate_tokens(doc.page_content)
+            if len(batch) >= self.batch_size or (budget is not None and tokens >= budget):
+                batches.append(batch)
+                batch, tokens = [], 0
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def add_many(self, docs: Iterable[Document]) -> None:
+        for doc in docs:
+            if self._cancelled.is_set():
+                return
+            self.add(doc)
+
+    def _submit(self, batch: List[Document]) -> None:
+        try:
+            ids, new_ids, new_docs = split_new_chunks(self.vectordb, batch)
+        except Exception as e:
+            self._error(f"Error checking existing chunks: {str(e)}", [chunk_id(doc) for doc in batch])
+            return
+        for i in ids:
+            self._ids[i] = None
+        self.progress.queued(skipped=len(batch) - len(new_docs))
+        if self.on_done is not None and len(new_ids) < len(ids):
+            new = set(new_ids)
+            self._settled([i for i in ids if i not in new])
+        if new_docs:
+            budget = self.sizer.token_budget if self.sizer is not None else None
+            self._put(self._embed_queue, (new_ids, new_docs, budget))
+
+    def close(self) -> None:
+        """Flush the last partial batch and let the stages drain."""
+        with self._batch_lock:
+            if self._closed:
+                return
+            self._closed = True
+            window, self._batch = self._batch, []
+            self._batch_tokens = 0
+        for batch in self._cut_batches(window):
+            self._submit(batch)
+        for _ in range(self.workers):
+            self._put(self._embed_queue, _DONE)
+
+    def feed(self, docs: Iterable[Document]) -> None:
+        """Consume an iterable of documents, then close the pipeline."""
+        try:
+            self.add_many(docs)
+        except Exception as e:
+            self._error(f"Error reading documents: {str(e)}")
+        finally:
+            self.close()
+
+    def feed_in_background(self, docs: Iterable[Document]) -> None:
+        self._spawn(lambda: self.feed(docs), "embed-feeder")
+
+    async def feed_async(self, docs: AsyncIterable[Document]) -> None:
+        """Consume an async stream of documents (e.g. pages as they are extracted), then close the pipeline."""
+        try:
+            async for doc in docs:
+                if self._cancelled.is_set():
+                    break
+                # add blocks while the embed stage is saturated
+                await asyncio.to_thread(self.add, doc)
+        except Exception as e:
+            self._error(f"Error reading documents: {str(e)}")
+        finally:
+            await asyncio.to_thread(self.close)
+
+    # Stage 2: embedding workers
+
+    def _embed_worker(self) -> None:
+        while True:
+            item = self._get(self._embed_queue)
+            if item is _DONE:
+                break
+            ids, docs, budget = item
+            start = time.perf_counter()
+            try:
+                # The sizer tunes tokens per pipeline batch; the forward pass stays capped so activations fit in memory
+                forward_batch = min(len(docs), EMBED_MAX_FORWARD_BATCH) if self.sizer is not None else None
+                vectors = self.progress.timed_embed(self.embeddings, docs, forward_batch)
+            except Exception as e:
+                self._error(f"Error embedding batch: {str(e)}", ids)
+                continue
+            if self.sizer is not None:
+                tokens = sum(estimate_tokens(doc.page_content) for doc in docs)
+                self.sizer.record(len(docs), tokens, time.perf_counter() - start, budget)
+            if not self._put(self._write_queue, (ids, vectors, docs)):
+                break
+        with self._workers_lock:
+            self._active_workers -= 1
+            last = self._active_workers == 0
+        if last:
+            self._put(self._write_queue, _DONE)
+
+    # Stage 3: single writer, SQLite/HNSW writes don't benefit from concurrency
+
+    def _writer(self) -> None:
+        while True:
+            item = self._get(self._write_queue)
+            if item is _DONE:
+                break
+            ids, vectors, docs = item
+            try:
+                self.progress.timed_write(self.vectordb, ids, vectors, docs)
+            except Exception as e:
+                self._error(f"Error writing batch: {str(e)}", ids)
+                continue
+            self._settled(ids)
+            self.events.put({"status": "progress", "data": self.progress.snapshot()})
+        self.events.put(None)
+
+    def cancel(self) -> None:
+        """Stop all stages; queued work is dropped."""
+        self._cancelled.set()
+        self.events.put(None)
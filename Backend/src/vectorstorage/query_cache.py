@@ -0,0 +1,123 @@
+from src.vectorstorage.vectorstore import get_app_data_dir
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import unicodedata
+import threading
+import logging
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+QUERY_CACHE_SIZE = int(os.environ.get("NOTATE_QUERY_CACHE_SIZE", "2048"))
+QUERY_CACHE_TTL = float(os.environ.get("NOTATE_QUERY_CACHE_TTL", "3600"))  # seconds, 0 disables expiry
+QUERY_CACHE_DISK = os.environ.get("NOTATE_QUERY_CACHE_DISK") == "1"
+QUERY_CACHE_DISK_LIMIT_MB = int(os.environ.get("NOTATE_QUERY_CACHE_DISK_LIMIT_MB", "256"))
+
+
+def normalize_query(text: str) -> str:
+    """Canonical form used for cache keys: NFKC, trimmed, single-spaced."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class QueryEmbeddingCache:
+    """
+    LRU cache of query vectors keyed by (embedding model, normalized query text),
+    with a TTL and an optional on-disk tier shared across restarts.
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL, disk_path: Optional[str] = None, disk_limit_mb: int = QUERY_CACHE_DISK_LIMIT_MB):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        if disk_path:
+            try:
+                import diskcache
+                self._disk = diskcache.Cache(disk_path, size_limit=disk_limit_mb * 1024 * 1024)
+                logger.info(f"Query embedding disk cache at {disk_path}")
+            except Exception as e:
+                logger.warning(f"Query embedding disk cache disabled: {str(e)}")
+
+    def _is_fresh(self, created: float) -> bool:
+        return self.ttl <= 0 or time.time() - created < self.ttl
+
+    def get(self, model_id: str, query: str) -> Optional[List[float]]:
+        key = (model_id, normalize_query(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                vector, created = entry
+                if self._is_fresh(created):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector.tolist()
+                del self._entries[key]
+                self.expired += 1
+
+        if self._disk is not None:
+            vector = self._disk.get(key)
+            if vector is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._store(key, vector)
+                return vector.tolist()
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, model_id: str, query: str, vector: List[float]) -> None:
+        key = (model_id, normalize_query(query))
+        array = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._store(key, array)
+        if self._disk is not None:
+            self._disk.set(key, array, expire=self.ttl if self.ttl > 0 else None)
+
+    def _store(self, key: Tuple[str, str], vector: np.ndarray) -> None:
+        self._entries[key] = (vector, time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_compute(self, model_id: str, query: str, embed_query: Callable[[str], List[float]]) -> List[float]:
+        """Return the cached vector for a query, embedding and caching it on a miss."""
+        vector = self.get(model_id, query)
+        if vector is None:
+            vector = embed_query(query)
+            self.put(model_id, query, vector)
+        return vector
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "disk_enabled": self._disk is not None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Global query embedding cache instance
+query_cache = QueryEmbeddingCache(
+    disk_path=os.path.join(get_app_data_dir(), "query_cache") if QUERY_CACHE_DISK else None
+)
@@ -0,0 +1,156 @@
+from src.vectorstorage.init_store import get_models_dir
+from src.vectorstorage.query_cache import normalize_query
+from src.vectorstorage.hybrid import Hit
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import threading
+import logging
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+RERANK_MODEL = os.environ.get("NOTATE_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_DEVICE = os.environ.get("NOTATE_RERANK_DEVICE", "cpu")
+# Candidates fetched for reranking when the request doesn't say
+RERANK_CANDIDATES = int(os.environ.get("NOTATE_RERANK_CANDIDATES", "20"))
+# Default latency budget for the rerank stage in ms (0 disables the budget)
+RERANK_BUDGET_MS = float(os.environ.get("NOTATE_RERANK_BUDGET_MS", "300"))
+RERANK_CACHE_SIZE = int(os.environ.get("NOTATE_RERANK_CACHE_SIZE", "20000"))
+RERANK_BATCH_SIZE = 32
+# Seconds after a failed model load before another attempt is made
+RERANK_RETRY_SECONDS = float(os.environ.get("NOTATE_RERANK_RETRY_SECONDS", "60"))
+
+
+class Reranker:
+    """
+    Cross-encoder reranking of retrieved chunks.
+
+    Scores are cached per (query, chunk ID); chunk IDs are content hashes, so a
+    cached score stays valid as long as the chunk exists. The cost per scored
+    pair is tracked, and a rerank whose uncached pairs would overrun the
+    latency budget is skipped, returning the retrieval order instead. The model
+    loads in the background on first use; requests skip reranking until it is
+    ready rather than waiting on the load. A failed load is retried after
+    RERANK_RETRY_SECONDS, or right away by a caller that waits for the model.
+    """
+
+    def __init__(self, model_name: str = RERANK_MODEL, device: str = RERANK_DEVICE, cache_size: int = RERANK_CACHE_SIZE):
+        self.model_name = model_name
+        self.device = device
+        self.cache_size = cache_size
+        self._model = None
+        self._loading = False
+        self._load_error: Optional[str] = None
+        self._load_failed_at: Optional[float] = None
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.ms_per_pair: Optional[float] = None
+        self.reranked = 0
+        self.skipped = 0
+        self.cache_hits = 0
+        self.pairs_scored = 0
+
+    def _load(self) -> None:
+        try:
+            from sentence_transformers import CrossEncoder
+            start = time.perf_counter()
+            model = CrossEncoder(self.model_name, device=self.device, max_length=512, cache_dir=get_models_dir())
+            logger.info(f"Loaded reranker {self.model_name} in {time.perf_counter() - start:.2f}s")
+            with self._lock:
+                self._model = model
+        except Exception as e:
+            logger.error(f"Error loading reranker {self.model_name}: {str(e)}")
+            with self._lock:
+                self._load_error = str(e)
+                self._load_failed_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def load(self, wait: bool = False) -> bool:
+        """Start loading the model if needed. Returns whether it is ready."""
+        with self._lock:
+            if self._model is not None:
+                return True
+            if self._load_error is not None:
+                if not wait and time.monotonic() - self._load_failed_at < RERANK_RETRY_SECONDS:
+                    return False
+                if not self._loading:
+                    logger.info(f"Retrying reranker {self.model_name} load after: {self._load_error}")
+                self._load_error = None
+                self._load_failed_at = None
+            start_thread = not self._loading
+            self._loading = True
+        if wait:
+            if start_thread:
+                self._load()
+            else:
+                while self._loading:
+                    time.sleep(0.05)
+            return self._model is not None
+        if start_thread:
+            threading.Thread(target=self._load, name="reranker-load", daemon=True).start()
+        return False
+
+    def rerank(self, query: str, hits: List[Hit], top_k: int, budget_ms: Optional[float] = None) -> List[Hit]:
+        """Return the top_k hits by cross-encoder score, or the first top_k unchanged if skipped."""
+        if len(hits) <= 1:
+            return hits[:top_k]
+        budget_ms = RERANK_BUDGET_MS if budget_ms is None else budget_ms
+        if not self.load(wait=budget_ms <= 0):
+            with self._lock:
+                self.skipped += 1
+            return hits[:top_k]
+
+        key_query = normalize_query(query)
+        with self._lock:
+            scores = {hit[0]: self._scores.get((key_query, hit[0])) for hit in hits}
+            missing = [hit for hit in hits if scores[hit[0]] is None]
+            self.cache_hits += len(hits) - len(missing)
+            predicted_ms = len(missing) * self.ms_per_pair if self.ms_per_pair is not None else 0.0
+            if budget_ms > 0 and predicted_ms > budget_ms:
+                self.skipped += 1
+                logger.info(f"Skipping rerank of {len(missing)} pairs, predicted {predicted_ms:.0f}ms > {budget_ms:.0f}ms budget")
+                return hits[:top_k]
+
+        if missing:
+            start = time.perf_counter()
+            predicted = self._model.predict([(query, hit[1]) for hit in missing], batch_size=RERANK_BATCH_SIZE, show_progress_bar=False)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                per_pair = elapsed_ms / len(missing)
+                # Smoothed so one slow call (GC, contention) doesn't disable reranking
+                self.ms_per_pair = per_pair if self.ms_per_pair is None else 0.8 * self.ms_per_pair + 0.2 * per_pair
+                self.pairs_scored += len(missing)
+                for hit, score in zip(missing, predicted):
+                    scores[hit[0]] = float(score)
+                    self._scores[(key_query, hit[0])] = float(score)
+                    self._scores.move_to_end((key_query, hit[0]))
+                while len(self._scores) > self.cache_size:
+                    self._scores.popitem(last=False)
+
+        with self._lock:
+            self.reranked += 1
+        return sorted(hits, key=lambda hit: scores[hit[0]], reverse=True)[:top_k]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "model_name": self.model_name,
+                "loaded": self._model is not None,
+                "load_error": self._load_error,
+                # Seconds until a failed load is retried
+                "load_retry_in_s": (round(max(0.0, RERANK_RETRY_SECONDS - (time.monotonic() - self._load_failed_at)), 1)
+                                    if self._load_failed_at is not None else None),
+                "ms_per_pair": round(self.ms_per_pair, 3) if self.ms_per_pair is not None else None,
+                "reranked": self.reranked,
+                "skipped": self.skipped,
+                "cache_entries": len(self._scores),
+                "cache_hits": self.cache_hits,
+                "pairs_scored": self.pairs_scored,
+            }
+
+
+# Global reranker instance
+reranker = Reranker()
@@ -1,8 +1,8 @@
-from src.vectorstorage.init_store import get_models_dir
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
+from src.vectorstorage.embedding_registry import embedding_registry, get_embedding_device
+from src.vectorstorage.chroma_client import ChromaClientManager
+from src.vectorstorage.compact_embeddings import compact_embeddings
 from langchain_openai import OpenAIEmbeddings
-import torch
+from functools import lru_cache
 import os
 import logging
 import platform
@@ -24,109 +24,73 @@ def get_app_data_dir():
 chroma_db_path = os.path.join(get_app_data_dir(), "chroma_db")
 logger.info(f"Using Chroma DB path: {chroma_db_path}")
 
+
+def get_collection_dir(collection_name: str) -> str:
+    """Directory for per-collection sidecar files (manifest, settings, indexes)."""
+    collection_dir = os.path.join(get_app_data_dir(), "collections", collection_name)
+    os.makedirs(collection_dir, exist_ok=True)
+    return collection_dir
+
+
+# Global Chroma client manager instance
+chroma_manager = ChromaClientManager(chroma_db_path)
+
+
+@lru_cache(maxsize=8)
+def _openai_embeddings(api_key: str) -> OpenAIEmbeddings:
+    return OpenAIEmbeddings(api_key=api_key)
+
+
+def collection_config(collection_name: str):
+    """Backend-side settings of a collection (embedding backend, storage dimension and dtype)."""
+    # Imported here: collection_config keeps its file under get_collection_dir
+    from src.vectorstorage.collection_config import get_collection_config
+    return get_collection_config(collection_name)
+
+
+def get_embeddings(api_key: str, use_local_embeddings: bool = False, local_embedding_model: str = "HIT-TMG/KaLM-embedding-multilingual-mini-instruct-v1.5", embedding_backend: str = "torch"):
+    if use_local_embeddings or api_key is None:
+        logger.info(f"Using local embedding model: {local_embedding_model} ({embedding_backend})")
+        return embedding_registry.get(local_embedding_model, backend=embedding_backend)
+    logger.info("Using OpenAI embedding model")
+    return _openai_embeddings(api_key)
+
+
+def embedding_model_id(api_key: str, use_local_embeddings: bool = False, local_embedding_model: str = "HIT-TMG/KaLM-embedding-multilingual-mini-instruct-v1.5", embedding_backend: str = "torch") -> str:
+    """Identify the embedding model get_embeddings would pick, for use in cache keys."""
+    if use_local_embeddings or api_key is None:
+        if embedding_backend != "torch":
+            return f"{local_embedding_model}[{embedding_backend}]"
+        return local_embedding_model
+    return f"openai:{_openai_embeddings(api_key).model}"
+
+
+def collection_model_id(api_key: str, collection_name: str, use_local_embeddings: bool = False, local_embedding_model: str = "HIT-TMG/KaLM-embedding-multilingual-mini-instruct-v1.5") -> str:
+    """Identify the vectors get_vectorstore produces for a collection, including its storage settings."""
+    config = collection_config(collection_name)
+    model_id = embedding_model_id(api_key, use_local_embeddings, local_embedding_model, config.embedding_backend)
+    if config.embedding_dim:
+        model_id += f":d{config.embedding_dim}"
+    return model_id
+
+
+def batch_tuning_key(api_key: str, use_local_embeddings: bool = False, local_embedding_model: str = "HIT-TMG/KaLM-embedding-multilingual-mini-instruct-v1.5", embedding_backend: str = "torch") -> str:
+    """Key under which tuned embedding batch sizes are stored: model plus device."""
+    model_id = embedding_model_id(api_key, use_local_embeddings, local_embedding_model, embedding_backend)
+    if use_local_embeddings or api_key is None:
+        device = "cpu" if embedding_backend != "torch" else get_embedding_device()
+        return f"{model_id}@{device}"
+    return model_id
+
+
 def get_vectorstore(api_key: str, collection_name: str, use_local_embeddings: bool = False, local_embedding_model: str = "HIT-TMG/KaLM-embedding-multilingual-mini-instruct-v1.5"):
     try:
-        # Get embeddings
-        if use_local_embeddings or api_key is None:
-            logger.info(f"Using local embedding model: {local_embedding_model}")
-            
-            # Determine the appropriate device
-            if torch.cuda.is_available():
-                device = "cuda"
-            elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
-                device = "mps"
-            else:
-                device = "cpu"
-                
-            logger.info(f"Using device: {device}")
-            models_dir = get_models_dir()
-            logger.info(f"Using models directory: {models_dir}")
-
-            model_kwargs = {"device": device}
-            encode_kwargs = {
-                "device": device,
-                "normalize_embeddings": True,
-                "max_seq_length": 512
-            }
-
-            try:
-                embeddings = HuggingFaceEmbeddings(
-                    model_name=local_embedding_model,
-                    model_kwargs=model_kwargs,
-                    encode_kwargs=encode_kwargs,
-                    cache_folder=models_dir
-                )
-            except Exception as e:
-                logger.error(f"Error initializing embeddings with {device}: {str(e)}")
-                if device != "cpu":
-                    logger.info("Falling back to CPU")
-                    model_kwargs["device"] = "cpu"
-                    encode_kwargs["device"] = "cpu"
-                    embeddings = HuggingFaceEmbeddings(
-                        model_name=local_embedding_model,
-                        model_kwargs=model_kwargs,
-                        encode_kwargs=encode_kwargs,
-                        cache_folder=models_dir
-                    )
-                else:
-                    raise
-        else:
-            logger.info("Using OpenAI embedding model")
-            embeddings = OpenAIEmbeddings(api_key=api_key)
-
-        # Try to create vectorstore with specific settings
-        try:
-            from chromadb.config import Settings
-            import chromadb
-
-            # Use in-memory store if persistent store fails
-            try:
-                chroma_client = chromadb.PersistentClient(
-                    path=chroma_db_path,
-                    settings=Settings(
-                        anonymized_telemetry=False,
-                        allow_reset=True,
-                        is_persistent=True
-                    )
-                )
-            except Exception as e:
-                logger.warning(f"Failed to create persistent client: {str(e)}, falling back to in-memory")
-                chroma_client = chromadb.Client(
-                    settings=Settings(
-                        anonymized_telemetry=False,
-                        allow_reset=True,
-                        is_persistent=False
-                    )
-                )
-
-            vectorstore = Chroma(
-                client=chroma_client,
-                embedding_function=embeddings,
-                collection_name=collection_name,
-            )
-            logger.info(f"Successfully initialized vectorstore for collection: {collection_name}")
-            return vectorstore
-        except Exception as e:
-            logger.error(f"Error creating Chroma instance: {str(e)}")
-            # Try one more time with in-memory store
-            try:
-                chroma_client = chromadb.Client(
-                    settings=Settings(
-                        anonymized_telemetry=False,
-                        allow_reset=True,
-                        is_persistent=False
-                    )
-                )
-                vectorstore = Chroma(
-                    client=chroma_client,
-                    embedding_function=embeddings,
-                    collection_name=collection_name,
-                )
-                return vectorstore
-            except Exception as e2:
-                logger.error(f"Error creating in-memory Chroma instance: {str(e2)}")
-                return None
-
+        config = collection_config(collection_name)
+        embeddings = get_embeddings(api_key, use_local_embeddings, local_embedding_model, config.embedding_backend)
+        embeddings = compact_embeddings(embeddings, config.embedding_dim)
+        # HNSW parameters only apply when this creates the collection
+        vectorstore = chroma_manager.get_vectorstore(collection_name, embeddings, config.hnsw_metadata())
+        return vectorstore
     except Exception as e:
-        logger.error(f"Error getting vectorstore: {str(e)}")
+        logger.error(f"Error getting vectorstore for {collection_name}: {str(e)}")
         return None
@@ -0,0 +1,243 @@
+from src.data.database.db import db
+from src.data.database.getLLMApiKey import get_llm_api_key
+from src.vectorstorage.helpers.sanitizeCollectionName import sanitize_collection_name
+from src.vectorstorage.lexical_index import get_lexical_index
+from src.vectorstorage.vectorstore import chroma_manager, get_app_data_dir, get_collection_dir, get_vectorstore
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+import threading
+import logging
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.environ.get("NOTATE_WARMUP", "1") != "0"
+# Collections preloaded at startup
+WARMUP_LIMIT = int(os.environ.get("NOTATE_WARMUP_LIMIT", "3"))
+# Comma-separated collection names always warmed first
+WARMUP_COLLECTIONS = [name.strip() for name in os.environ.get("NOTATE_WARMUP_COLLECTIONS", "").split(",") if name.strip()]
+# Seconds between writes of the last-used times
+USAGE_FLUSH_SECONDS = 30.0
+
+WARMUP_STEPS = ("embedding_model", "collection", "index")
+
+
+@dataclass
+class WarmupTarget:
+    """A collection to preload, with what's needed to pick its embedding model."""
+    name: str
+    user_id: Optional[int] = None
+    is_local: bool = True
+    local_embedding_model: Optional[str] = None
+
+
+class CollectionUsage:
+    """
+    Last query time per collection, kept in app data so the next start knows
+    which collections are hot. Writes are throttled; queries only touch memory.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(get_app_data_dir(), "collection_usage.json")
+        self._lock = threading.Lock()
+        self._last_used: Dict[str, float] = {}
+        self._dirty = False
+        self._flushed_at = 0.0
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._last_used = {k: float(v) for k, v in json.load(f).items()}
+            except Exception as e:
+                logger.error(f"Error reading collection usage, starting empty: {str(e)}")
+
+    def record(self, collection_name: str) -> None:
+        with self._lock:
+            now = time.time()
+            self._last_used[collection_name] = now
+            self._dirty = True
+            due = now - self._flushed_at >= USAGE_FLUSH_SECONDS
+        if due:
+            self.flush()
+
+    def forget(self, collection_name: str) -> None:
+        with self._lock:
+            if self._last_used.pop(collection_name, None) is not None:
+                self._dirty = True
+        self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._last_used)
+            self._dirty = False
+            self._flushed_at = time.time()
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error writing collection usage: {str(e)}")
+
+    def most_recent(self, limit: Optional[int] = None) -> List[str]:
+        with self._lock:
+            names = sorted(self._last_used, key=self._last_used.get, reverse=True)
+        return names if limit is None else names[:limit]
+
+
+def _collection_rows() -> List[WarmupTarget]:
+    """Collections known to the app, newest first."""
+    conn = db()
+    if not conn:
+        return []
+    try:
+        rows = conn.execute(
+            "SELECT name, user_id, is_local, local_embedding_model FROM collections ORDER BY created_at DESC, id DESC"
+        ).fetchall()
+    except Exception as e:
+        logger.error(f"Error reading collections for warmup: {str(e)}")
+        return []
+    finally:
+        conn.close()
+    return [
+        WarmupTarget(sanitize_collection_name(str(name)), user_id, bool(is_local), local_embedding_model)
+        for name, user_id, is_local, local_embedding_model in rows
+    ]
+
+
+def select_targets(rows: List[WarmupTarget], recent: List[str], configured: List[str], limit: int) -> List[WarmupTarget]:
+    """
+    Pick collections to warm: configured ones first, then the most recently
+    queried, then the newest. Names without a row fall back to the default
+    local model.
+    """
+    by_name: Dict[str, WarmupTarget] = {}
+    for row in rows:
+        by_name.setdefault(row.name, row)
+    ordered = [sanitize_collection_name(name) for name in configured] + recent + [row.name for row in rows]
+    targets: List[WarmupTarget] = []
+    for name in dict.fromkeys(ordered):
+        if len(targets) >= limit:
+            break
+        targets.append(by_name.get(name, WarmupTarget(name)))
+    return targets
+
+
+class Warmup:
+    """
+    Background preload of the collections likely to be queried first: their
+    embedding model (load and first encode), the Chroma handle, and the HNSW
+    index, which Chroma only reads from disk on the first query.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.state = "idle"
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.collections: Dict[str, Dict[str, Any]] = {}
+
+    def start(self, targets: Optional[List[WarmupTarget]] = None) -> bool:
+        """Start warming in the background. Returns False if a run is already going."""
+        with self._lock:
+            if self.state == "running":
+                return False
+            self.state = "running"
+            self.started_at = time.time()
+            self.finished_at = None
+            self.collections = {}
+        self._thread = threading.Thread(target=self._run, args=(targets,), name="warmup", daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self, targets: Optional[List[WarmupTarget]]) -> None:
+        try:
+            if targets is None:
+                targets = select_targets(_collection_rows(), collection_usage.most_recent(), WARMUP_COLLECTIONS, WARMUP_LIMIT)
+            with self._lock:
+                self.collections = {
+                    target.name: {"status": "pending", "steps_done": [], "seconds": None, "error": None}
+                    for target in targets
+                }
+            for target in targets:
+                self._warm(target)
+            logger.info(f"Warmup finished: {len(targets)} collections in {time.time() - self.started_at:.1f}s")
+        except Exception as e:
+            logger.error(f"Warmup failed: {str(e)}")
+        finally:
+            with self._lock:
+                self.state = "ready"
+                self.finished_at = time.time()
+
+    def _step_done(self, name: str, step: str) -> None:
+        with self._lock:
+            self.collections[name]["steps_done"].append(step)
+
+    def _set(self, name: str, **values) -> None:
+        with self._lock:
+            self.collections[name].update(values)
+
+    def _warm(self, target: WarmupTarget) -> None:
+        name = target.name
+        start = time.perf_counter()
+        self._set(name, status="running")
+        try:
+            if name not in set(chroma_manager.get_client().list_collections()):
+                self._set(name, status="skipped", error="Collection not found")
+                return
+
+            api_key = None
+            if not target.is_local:
+                api_key = get_llm_api_key(target.user_id, "openai")
+                if not api_key:
+                    self._set(name, status="skipped", error="No OpenAI API key")
+                    return
+            model_args = {"local_embedding_model": target.local_embedding_model} if target.local_embedding_model else {}
+            vectordb = get_vectorstore(api_key, name, target.is_local, **model_args)
+            if vectordb is None:
+                raise RuntimeError("Could not open vectorstore")
+            # First encode initialises kernels / the ONNX session, not just the weights
+            vectordb.embeddings.embed_query("warmup")
+            self._step_done(name, "embedding_model")
+
+            collection = vectordb._collection
+            self._step_done(name, "collection")
+
+            stored = collection.get(limit=1, include=["embeddings"])
+            if stored["ids"]:
+                collection.query(query_embeddings=[list(stored["embeddings"][0])], n_results=1, include=[])
+            if os.path.exists(os.path.join(get_collection_dir(name), "lexical.db")):
+                # Fill in chunks stored before the index existed so hybrid queries don't wait for it
+                get_lexical_index(name).start_backfill(collection)
+            self._step_done(name, "index")
+            self._set(name, status="ready")
+        except Exception as e:
+            logger.error(f"Error warming {name}: {str(e)}")
+            self._set(name, status="failed", error=str(e))
+        finally:
+            self._set(name, seconds=round(time.perf_counter() - start, 2))
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            total = len(self.collections) * len(WARMUP_STEPS)
+            done = sum(
+                len(WARMUP_STEPS) if info["status"] in ("ready", "skipped", "failed") else len(info["steps_done"])
+                for info in self.collections.values()
+            )
+            return {
+                "state": self.state,
+                "ready": self.state != "running",
+                "progress": round(done / total, 3) if total else (0.0 if self.state == "running" else 1.0),
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "collections": {name: dict(info, steps_done=list(info["steps_done"])) for name, info in self.collections.items()},
+            }
+
+
+# Global instances
+collection_usage = CollectionUsage()
+warmup = Warmup()
@@ -0,0 +1,60 @@
+import pytest
+from src.vectorstorage import batch_tuner
+from src.vectorstorage.batch_tuner import AdaptiveBatchSizer, MAX_BATCH_SECONDS, MIN_TOKEN_BUDGET
+
+PEAK = 16384
+
+
+def seconds_for(budget):
+    # Throughput (tokens/s) rises with batch size up to PEAK, then falls off
+    rate = 10000 * budget / PEAK / (1 + ((budget - PEAK) / PEAK) ** 2) if budget < PEAK else 10000 * PEAK / budget
+    return budget / rate
+
+
+def drive(sizer, steps=200):
+    for _ in range(steps):
+        if sizer.converged:
+            return
+        budget = sizer.token_budget
+        sizer.record(budget // 100, budget, seconds_for(budget), budget)
+
+
+@pytest.fixture(autouse=True)
+def tuning_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_tuner, "tuning_path", str(tmp_path / "tuning.json"))
+
+
+def test_hill_climb_converges_near_the_fastest_budget():
+    sizer = AdaptiveBatchSizer("model@cpu", initial_budget=4096)
+    drive(sizer)
+    assert sizer.converged
+    assert PEAK / 1.5 <= sizer.best_budget <= PEAK * 1.5
+    assert sizer.token_budget == sizer.best_budget
+
+
+def test_measurements_from_an_older_budget_are_ignored():
+    sizer = AdaptiveBatchSizer("model@cpu", initial_budget=4096)
+    for _ in range(10):
+        sizer.record(10, 1024, 0.01, 1024)
+    assert sizer.token_budget == 4096 and sizer.best_rate == 0
+
+
+def test_slow_batches_halve_the_budget_down_to_the_minimum():
+    sizer = AdaptiveBatchSizer("model@cpu", initial_budget=4096)
+    sizer.record(10, 4096, MAX_BATCH_SECONDS + 1, 4096)
+    assert sizer.token_budget == 2048
+    for _ in range(10):
+        sizer.record(10, sizer.token_budget, MAX_BATCH_SECONDS + 1, sizer.token_budget)
+    assert sizer.token_budget == MIN_TOKEN_BUDGET
+
+
+def test_save_and_warm_start_round_trip():
+    sizer = AdaptiveBatchSizer("model@cuda", initial_budget=4096)
+    drive(sizer)
+    sizer.save()
+
+    warm = AdaptiveBatchSizer("model@cuda")
+    assert warm.warm and warm.token_budget == sizer.best_budget
+    assert warm.step == 1.25
+    # Other models and devices start cold
+    assert not AdaptiveBatchSizer("model@cpu").warm
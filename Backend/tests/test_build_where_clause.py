@@ -0,0 +1,37 @@
+import pytest
+from src.vectorstorage.helpers.buildWhereClause import build_where_clause
+
+
+def test_empty_filter_is_none():
+    assert build_where_clause(None) is None
+    assert build_where_clause({}) is None
+
+
+def test_single_field_passes_through():
+    assert build_where_clause({"source": "a.pdf"}) == {"source": "a.pdf"}
+    assert build_where_clause({"page": {"$gte": 3}}) == {"page": {"$gte": 3}}
+
+
+def test_several_fields_are_and_ed():
+    assert build_where_clause({"source": "a.pdf", "page": {"$lte": 10}}) == {
+        "$and": [{"source": "a.pdf"}, {"page": {"$lte": 10}}]
+    }
+
+
+def test_nested_logical_operators():
+    where = build_where_clause({"$or": [{"source": "a.pdf"}, {"source": "b.pdf", "page": 2}]})
+    assert where == {"$or": [{"source": "a.pdf"}, {"$and": [{"source": "b.pdf"}, {"page": 2}]}]}
+
+
+@pytest.mark.parametrize("bad", [
+    {"page": {"$regex": "x"}},
+    {"page": {"$gt": "3"}},
+    {"source": {"$in": []}},
+    {"source": ["a", "b"]},
+    {"$or": [{"source": "a"}]},
+    {"$not": {"source": "a"}},
+    {"page": {"$gt": 1, "$lt": 5}},
+])
+def test_invalid_filters_are_rejected(bad):
+    with pytest.raises(ValueError):
+        build_where_clause(bad)
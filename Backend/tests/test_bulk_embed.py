@@ -0,0 +1,72 @@
+import os
+import queue
+import pytest
+from langchain_core.documents import Document
+from src.endpoint.bulkEmbed import BulkTracker, collect_files
+from src.vectorstorage import manifest as manifest_module
+from src.vectorstorage.embeddings import chunk_id
+from src.vectorstorage.manifest import CollectionManifest
+
+
+@pytest.fixture
+def manifest(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest_module, "get_collection_dir", lambda name: str(tmp_path))
+    return CollectionManifest("bulk")
+
+
+def drain(events):
+    out = []
+    while not events.empty():
+        out.append(events.get())
+    return [(e["data"]["state"], os.path.basename(e["data"]["file"])) for e in out if e["status"] == "file"]
+
+
+def test_collect_files_walks_supported_files_and_keeps_listed_ones(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / ".hidden").mkdir()
+    for name in ("a.txt", "b.exe", ".c.txt", "sub/d.md", ".hidden/e.txt"):
+        (tmp_path / name).write_text("x")
+
+    assert [os.path.relpath(p, tmp_path) for p in collect_files(str(tmp_path))] == ["a.txt", os.path.join("sub", "d.md")]
+    assert len(collect_files(str(tmp_path), recursive=False)) == 1
+    listed = collect_files(str(tmp_path), [str(tmp_path / "a.txt"), str(tmp_path / "b.exe")])
+    assert [os.path.basename(p) for p in listed] == ["a.txt", "d.md", "b.exe"]
+
+
+def test_file_finishes_when_all_its_chunks_settle(manifest, tmp_path):
+    path = str(tmp_path / "a.txt")
+    docs = [Document(page_content=text, metadata={"source": path}) for text in ("one", "two", "one")]
+    events = queue.Queue()
+    tracker = BulkTracker(manifest, None, events, total=2)
+
+    tracker.begin(path, {"size": 1, "mtime": 1, "hash": "h"})
+    for doc in docs:
+        tracker.expect(path, doc)
+    tracker.fed(path)
+    tracker.settled([chunk_id(docs[0])])
+    assert drain(events) == [("parsed", "a.txt")]
+
+    tracker.settled([chunk_id(docs[1])])
+    assert drain(events) == [("done", "a.txt")]
+    assert manifest.chunk_ids(path) == [chunk_id(docs[0]), chunk_id(docs[1])]
+    assert tracker.counts()["files_done"] == 1 and tracker.fraction == 0.5
+
+
+def test_dropped_batch_fails_the_file_and_keeps_it_out_of_the_manifest(manifest, tmp_path):
+    good, bad = str(tmp_path / "good.txt"), str(tmp_path / "bad.txt")
+    events = queue.Queue()
+    tracker = BulkTracker(manifest, None, events, total=3)
+    ids = {}
+    for path in (good, bad):
+        tracker.begin(path, {"size": 1, "mtime": 1, "hash": "h"})
+        doc = Document(page_content="text", metadata={"source": path})
+        ids[path] = chunk_id(doc)
+        tracker.expect(path, doc)
+        tracker.fed(path)
+    tracker.settled([ids[good]])
+    tracker.settled([ids[bad]], "Error embedding batch: boom")
+    tracker.fail(str(tmp_path / "broken.pdf"), "Failed to load document")
+
+    assert [e for e in drain(events) if e[0] != "parsed"] == [("done", "good.txt"), ("failed", "bad.txt"), ("failed", "broken.pdf")]
+    assert manifest.chunk_ids(good) and not manifest.chunk_ids(bad)
+    assert tracker.counts() == {"files_total": 3, "files_done": 1, "files_failed": 2, "files_skipped": 0}
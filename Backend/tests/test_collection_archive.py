@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+import tarfile
+from src.vectorstorage import collection_archive, collection_config, lexical_index, manifest
+from src.vectorstorage.chroma_client import ChromaClientManager
+from src.vectorstorage.collection_config import CollectionConfig, save_collection_config
+
+
+@pytest.fixture
+def manager(monkeypatch, tmp_path):
+    def collection_dir(name):
+        path = tmp_path / "collections" / name
+        path.mkdir(parents=True, exist_ok=True)
+        return str(path)
+
+    for module in (collection_archive, collection_config, lexical_index, manifest):
+        monkeypatch.setattr(module, "get_collection_dir", collection_dir)
+    monkeypatch.setattr(collection_config, "_configs", {})
+    manager = ChromaClientManager(str(tmp_path), in_memory=True)
+    monkeypatch.setattr(collection_archive, "chroma_manager", manager)
+    return manager
+
+
+def test_export_import_round_trip_without_embedding(manager, tmp_path):
+    client = manager.get_client()
+    source = client.create_collection("archive_src", metadata={"hnsw:space": "cosine"}, embedding_function=None)
+    ids = [f"c{i}" for i in range(25)]
+    vectors = np.random.default_rng(0).random((25, 8), dtype=np.float32)
+    source.add(ids=ids, embeddings=vectors, documents=[f"chunk number {i}" for i in range(25)],
+               metadatas=[{"page": i} if i % 2 else None for i in range(25)])
+    save_collection_config("archive_src", CollectionConfig(hnsw_m=24))
+
+    archive = str(tmp_path / "export" / "archive_src.tar")
+    exported = collection_archive.export_collection("archive_src", archive)
+    assert (exported["count"], exported["dim"]) == (25, 8)
+
+    result = collection_archive.import_collection(archive, "archive_dst")
+    assert result["count"] == 25
+
+    imported = client.get_collection("archive_dst")
+    assert imported.metadata["hnsw:space"] == "cosine"
+    stored = imported.get(ids=["c3", "c4"], include=["embeddings", "documents", "metadatas"])
+    by_id = {i: n for n, i in enumerate(stored["ids"])}
+    assert np.allclose(stored["embeddings"][by_id["c3"]], vectors[3])
+    assert stored["documents"][by_id["c3"]] == "chunk number 3"
+    assert stored["metadatas"][by_id["c3"]] == {"page": 3}
+    assert collection_config.get_collection_config("archive_dst").hnsw_m == 24
+    assert lexical_index.get_lexical_index("archive_dst").search("number 7", 1)[0][0] == "c7"
+
+
+def test_vectors_are_mapped_from_the_archive(manager, tmp_path):
+    client = manager.get_client()
+    source = client.create_collection("archive_map", embedding_function=None)
+    source.add(ids=["a", "b"], embeddings=[[1.0, 2.0], [3.0, 4.0]], documents=["a", "b"])
+    archive = str(tmp_path / "archive_map.tar")
+    collection_archive.export_collection("archive_map", archive)
+
+    with tarfile.open(archive) as tar:
+        mapped = collection_archive.open_vectors(archive, tar.getmember("vectors.npy"))
+    assert isinstance(mapped, np.memmap)
+    assert sorted(map(tuple, mapped.tolist())) == [(1.0, 2.0), (3.0, 4.0)]
+
+
+def test_import_refuses_to_overwrite_without_replace(manager, tmp_path):
+    client = manager.get_client()
+    source = client.create_collection("archive_keep", embedding_function=None)
+    source.add(ids=["a"], embeddings=[[1.0, 0.0]], documents=["a"])
+    archive = str(tmp_path / "archive_keep.tar")
+    collection_archive.export_collection("archive_keep", archive)
+    with pytest.raises(ValueError):
+        collection_archive.import_collection(archive)
+    assert collection_archive.import_collection(archive, replace=True)["count"] == 1
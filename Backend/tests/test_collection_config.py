@@ -0,0 +1,29 @@
+import pytest
+from src.vectorstorage import collection_config
+from src.vectorstorage.collection_config import CollectionConfig, get_collection_config, save_collection_config
+
+
+@pytest.fixture(autouse=True)
+def collection_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(collection_config, "get_collection_dir", lambda name: str(tmp_path))
+    monkeypatch.setattr(collection_config, "_configs", {})
+
+
+def test_hnsw_metadata_only_includes_set_parameters():
+    assert CollectionConfig().hnsw_metadata() is None
+    config = CollectionConfig(hnsw_m=32, hnsw_search_ef=64)
+    assert config.hnsw_metadata() == {"hnsw:M": 32, "hnsw:search_ef": 64}
+
+
+def test_hnsw_parameters_round_trip(monkeypatch):
+    save_collection_config("docs", CollectionConfig(hnsw_m=24, hnsw_construction_ef=200))
+    monkeypatch.setattr(collection_config, "_configs", {})
+    config = get_collection_config("docs")
+    assert (config.hnsw_m, config.hnsw_construction_ef, config.hnsw_search_ef) == (24, 200, None)
+
+
+def test_rejects_invalid_hnsw_parameters():
+    with pytest.raises(ValueError):
+        save_collection_config("docs", CollectionConfig(hnsw_m=1))
+    with pytest.raises(ValueError):
+        save_collection_config("docs", CollectionConfig(hnsw_search_ef=0))
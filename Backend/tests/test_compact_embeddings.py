@@ -0,0 +1,27 @@
+import numpy as np
+from src.vectorstorage.compact_embeddings import CompactEmbeddings, compact_embeddings, compact_vectors
+
+
+class FixedEmbeddings:
+    def embed_documents(self, texts):
+        return [[3.0, 4.0, 12.0, 0.0] for _ in texts]
+
+    def embed_query(self, text):
+        return [3.0, 4.0, 12.0, 0.0]
+
+
+def test_truncation_renormalizes():
+    vector = compact_vectors([3.0, 4.0, 12.0, 0.0], dim=2)
+    assert np.allclose(vector, [0.6, 0.8])
+
+
+def test_documents_and_queries_match():
+    embeddings = CompactEmbeddings(FixedEmbeddings(), dim=2)
+    assert embeddings.embed_documents(["a"])[0] == embeddings.embed_query("a")
+    assert embeddings.embed_documents([]) == []
+
+
+def test_wrapper_is_shared_and_skipped_for_full_width():
+    base = FixedEmbeddings()
+    assert compact_embeddings(base) is base
+    assert compact_embeddings(base, 2) is compact_embeddings(base, 2)
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+import time
+import pytest
+from src.vectorstorage import compaction
+from src.vectorstorage.chroma_client import ChromaClientManager
+from src.vectorstorage.collection_config import CollectionConfig
+
+
+class NoopIndex:
+    def optimize(self):
+        pass
+
+
+@pytest.fixture
+def manager(monkeypatch, tmp_path):
+    manager = ChromaClientManager(str(tmp_path), in_memory=True)
+    monkeypatch.setattr(compaction, "chroma_manager", manager)
+    monkeypatch.setattr(compaction, "chroma_db_path", str(tmp_path))
+    monkeypatch.setattr(compaction, "get_collection_dir", lambda name: str(tmp_path))
+    monkeypatch.setattr(compaction, "collection_config", lambda name: CollectionConfig(hnsw_m=24))
+    monkeypatch.setattr(compaction, "get_lexical_index", lambda name: NoopIndex())
+    return manager
+
+
+def test_compaction_keeps_live_rows_and_redirects_old_handles(manager, tmp_path):
+    client = manager.get_client()
+    original = client.create_collection("compact_me", embedding_function=None)
+    ids = [f"c{i}" for i in range(40)]
+    original.add(ids=ids, embeddings=[[float(i), 1.0] for i in range(40)], documents=ids, metadatas=[{"n": i} for i in range(40)])
+    original.delete(ids=ids[:10])
+
+    compactor = compaction.Compactor(grace_seconds=0)
+    assert compactor.start("compact_me")
+    while compactor.status("compact_me")["state"] not in ("done", "failed"):
+        time.sleep(0.01)
+
+    status = compactor.status("compact_me")
+    assert status["state"] == "done", status["error"]
+    assert status["rows"] == 30
+    assert status["latency_before"] is not None and status["latency_after"] is not None
+
+    current = client.get_collection("compact_me")
+    assert current.id != original.id
+    assert current.metadata["hnsw:M"] == 24
+    assert sorted(current.get(include=[])["ids"]) == sorted(ids[10:])
+    assert current.get(ids=["c15"], include=["documents"])["documents"] == ["c15"]
+    assert [name for name in client.list_collections() if name.startswith("compact_me-")] == []
+    assert not (tmp_path / "compaction_work.json").exists()
+
+    # A handle opened before the swap writes to the new collection
+    stale = SimpleNamespace(id=original.id)
+    manager.current_collection(stale).add(ids=["late"], embeddings=[[0.5, 0.5]], documents=["late"])
+    assert current.count() == 31
+
+
+def test_only_recorded_work_collections_are_dropped(manager):
+    client = manager.get_client()
+    client.create_collection("notes", embedding_function=None)
+    client.create_collection("notes-compact-1", embedding_function=None)
+    client.create_collection("notes-retired-2", embedding_function=None)
+    compaction._record_work("notes", ["notes-compact-1", "notes-compact-9"])
+
+    compaction.Compactor()._drop_leftovers("notes")
+
+    notes = lambda: sorted(name for name in client.list_collections() if name.startswith("notes"))
+    assert notes() == ["notes", "notes-retired-2"]
+    compaction.Compactor()._drop_leftovers("notes")
+    assert notes() == ["notes", "notes-retired-2"]
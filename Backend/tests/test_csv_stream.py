@@ -0,0 +1,47 @@
+import csv
+import io
+from src.data.dataIntake.fileTypes.loadX import CsvDocumentStream
+
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "note"])
+        writer.writerows(rows)
+
+
+def test_documents_repeat_header_and_cover_every_row_once(tmp_path):
+    rows = [[i, f"name {i}", "plain" if i % 3 else 'has, comma and "quotes"'] for i in range(1000)]
+    path = tmp_path / "rows.csv"
+    _write_csv(path, rows)
+
+    stream = CsvDocumentStream(str(path), {"tag": "t"}, target_chars=300, read_rows=64)
+    docs = list(stream)
+
+    parsed = []
+    for doc in docs:
+        assert doc.page_content.startswith("id,name,note\n")
+        assert doc.metadata["source"] == str(path) and doc.metadata["tag"] == "t"
+        body = list(csv.reader(io.StringIO(doc.page_content)))[1:]
+        assert len(body) == doc.metadata["row_end"] - doc.metadata["row_start"]
+        parsed.extend(body)
+    assert parsed == [[str(v) for v in row] for row in rows]
+    assert [d.metadata["row_start"] for d in docs[1:]] == [d.metadata["row_end"] for d in docs[:-1]]
+    # Documents stay near the target size and aren't cut short at read-chunk edges
+    assert all(len(doc.page_content) < 300 + 60 for doc in docs)
+    assert all(len(doc.page_content) > 200 for doc in docs[:-1])
+    assert stream.rows_read == 1000 and stream.fraction == 1.0
+
+
+def test_short_rows_and_header_only_files(tmp_path):
+    ragged = tmp_path / "ragged.csv"
+    ragged.write_text("a,b,c\n1,2\n3,4,5\n", encoding="utf-8")
+    assert [doc.page_content for doc in CsvDocumentStream(str(ragged))] == ["a,b,c\n1,2,\n3,4,5"]
+
+    header_only = tmp_path / "header.csv"
+    header_only.write_text("a,b\n", encoding="utf-8")
+    assert list(CsvDocumentStream(str(header_only))) == []
+
+    empty = tmp_path / "empty.csv"
+    empty.write_text("", encoding="utf-8")
+    assert list(CsvDocumentStream(str(empty))) == []
@@ -0,0 +1,52 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from src.endpoint import embed as embed_module
+from src.endpoint.models import EmbeddingRequest
+from src.vectorstorage import manifest as manifest_module
+from src.vectorstorage.collection_config import CollectionConfig
+from src.vectorstorage.manifest import CollectionManifest
+
+
+class FakeChromaManager:
+    def __init__(self):
+        self.hnsw_updates = []
+
+    def get_collection(self, name):
+        return SimpleNamespace(count=lambda: 3)
+
+    def update_hnsw_metadata(self, name, metadata):
+        self.hnsw_updates.append(metadata)
+
+
+@pytest.fixture
+def recorded_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest_module, "get_collection_dir", lambda name: str(tmp_path))
+    manifest = CollectionManifest("docs")
+    path = tmp_path / "a.txt"
+    path.write_text("hello")
+    _, info = manifest.check(str(path), {"tag": "a"})
+    manifest.record(str(path), info, ["id-1"])
+    monkeypatch.setattr(embed_module, "get_manifest", lambda name: manifest)
+    return str(path)
+
+
+def run(request):
+    async def collect():
+        return [event async for event in embed_module.embed(request)]
+    return asyncio.run(collect())
+
+
+def test_unchanged_file_still_applies_changed_settings(recorded_file, monkeypatch):
+    saved = []
+    manager = FakeChromaManager()
+    monkeypatch.setattr(embed_module, "chroma_manager", manager)
+    monkeypatch.setattr(embed_module, "get_collection_config", lambda name: CollectionConfig(hnsw_search_ef=10))
+    monkeypatch.setattr(embed_module, "save_collection_config", lambda name, config: saved.append(config))
+
+    events = run(EmbeddingRequest(file_path=recorded_file, collection=1, collection_name="docs", user=1,
+                                  metadata={"tag": "a"}, hnsw_search_ef=50))
+
+    assert [config.hnsw_search_ef for config in saved] == [50]
+    assert manager.hnsw_updates == [{"hnsw:search_ef": 50}]
+    assert events[-1]["status"] == "success" and "unchanged" in events[-1]["message"]
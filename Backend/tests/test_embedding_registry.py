@@ -0,0 +1,89 @@
+import threading
+import pytest
+from src.vectorstorage import embedding_registry as registry_module
+from src.vectorstorage.embedding_registry import EmbeddingRegistry
+
+
+class FakeEmbeddings:
+    def __init__(self, name):
+        self.name = name
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = EmbeddingRegistry(ram_budget_mb=2)
+    loads = []
+
+    def fake_load(model_name, device, encode_kwargs, backend="torch"):
+        if backend == "broken":
+            raise RuntimeError("export failed")
+        loads.append(model_name)
+        return FakeEmbeddings(model_name)
+
+    monkeypatch.setattr(registry, "_load", fake_load)
+    # Every fake model "weighs" 1MB
+    monkeypatch.setattr(registry_module, "_estimate_model_bytes", lambda e: 1024 * 1024)
+    registry.loads = loads
+    return registry
+
+
+def test_model_loaded_once(registry):
+    first = registry.get("model-a", "cpu")
+    second = registry.get("model-a", "cpu")
+    assert first is second
+    assert registry.loads == ["model-a"]
+    stats = registry.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_distinct_keys_load_separately(registry):
+    registry.get("model-a", "cpu")
+    registry.get("model-a", "cpu", {"normalize_embeddings": False})
+    assert registry.loads == ["model-a", "model-a"]
+
+
+def test_lru_eviction_under_budget(registry):
+    registry.get("model-a", "cpu")
+    registry.get("model-b", "cpu")
+    registry.get("model-a", "cpu")  # a is now most recently used
+    registry.get("model-c", "cpu")  # exceeds the 2MB budget, evicts b
+    names = [m["model_name"] for m in registry.stats()["models"]]
+    assert names == ["model-a", "model-c"]
+    assert registry.stats()["evictions"] == 1
+
+
+def test_failed_backend_falls_back_to_torch(registry, monkeypatch):
+    monkeypatch.setattr(registry_module, "get_embedding_device", lambda: "cpu")
+    torch_model = registry.get("model-a", "cpu")
+    fallback = registry.get("model-a", "cpu", backend="broken")
+    assert fallback is torch_model
+    # The failed key is aliased, so the export isn't retried
+    registry.get("model-a", "cpu", backend="broken")
+    assert registry.loads == ["model-a"]
+
+
+def test_loading_one_model_does_not_block_others(registry, monkeypatch):
+    registry.get("model-a", "cpu")
+    started, release = threading.Event(), threading.Event()
+    original = registry._load
+
+    def slow_load(model_name, device, encode_kwargs, backend="torch"):
+        if model_name == "model-slow":
+            started.set()
+            release.wait(5)
+        return original(model_name, device, encode_kwargs, backend)
+
+    monkeypatch.setattr(registry, "_load", slow_load)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("model-slow", "cpu"))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    assert started.wait(5)
+    # A cached model is served while the other one is still loading
+    assert registry.get("model-a", "cpu").name == "model-a"
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(results) == 3 and results[0] is results[1] is results[2]
+    assert registry.loads == ["model-a", "model-slow"]
@@ -0,0 +1,126 @@
+import threading
+import sqlite3
+import pytest
+from src.vectorstorage import hybrid
+from src.vectorstorage import lexical_index as lexical_module
+from src.vectorstorage.lexical_index import LexicalIndex, build_match_query
+from src.vectorstorage.hybrid import hybrid_search, lexical_candidates, reciprocal_rank_fusion, source_filter
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(lexical_module, "get_collection_dir", lambda name: str(tmp_path))
+    index = LexicalIndex("test_collection")
+    yield index
+    index.close()
+
+
+def test_match_query_is_escaped_and_keeps_identifiers_together():
+    assert build_match_query('SKU AB-1234 "x" *') == '"SKU" OR "AB 1234" OR "x"'
+    assert build_match_query("*** ''") == ""
+
+
+def test_identifier_search_and_removal(index):
+    index.add(["a", "b", "c"], ["connection refused: E_CONN_REFUSED", "SKU AB-1234 is in stock", "unrelated"])
+    assert [chunk_id for chunk_id, _ in index.search("AB-1234", 5)] == ["b"]
+    index.remove(["b"])
+    assert index.search("AB-1234", 5) == []
+    assert index.count() == 2
+
+
+def test_add_is_idempotent(index):
+    assert index.add(["a"], ["hello world"]) == 1
+    assert index.add(["a"], ["hello world"]) == 0
+    assert index.count() == 1
+
+
+def test_backfill_runs_once(index):
+    class Collection:
+        calls = 0
+
+        def get(self, include, limit, offset):
+            Collection.calls += 1
+            ids = [f"id-{i}" for i in range(offset, min(offset + limit, 7))]
+            return {"ids": ids, "documents": ["text"] * len(ids), "metadatas": [None] * len(ids)}
+
+    index.backfill(Collection(), page=3)
+    index.backfill(Collection(), page=3)
+    assert index.count() == 7
+    assert Collection.calls == 4
+
+
+def test_hybrid_search_is_dense_only_until_the_backfill_finishes(index, monkeypatch):
+    release = threading.Event()
+
+    class Collection:
+        name = "test_collection"
+
+        def get(self, include, limit=None, offset=0, ids=None, where=None):
+            if ids is not None:
+                return {"ids": ids, "documents": ["stored"] * len(ids), "metadatas": [{}] * len(ids)}
+            release.wait(5)
+            chunk_ids = ["old"] if offset == 0 else []
+            return {"ids": chunk_ids, "documents": ["needle in an old chunk"] * len(chunk_ids), "metadatas": [{}] * len(chunk_ids)}
+
+    monkeypatch.setattr(hybrid, "get_lexical_index", lambda name: index)
+    dense = [("d1", "dense", {}), ("d2", "dense", {})]
+
+    assert hybrid_search(Collection(), "needle", dense, 1) == dense[:1]
+    assert not index.is_backfilled()
+    release.set()
+    index._backfill_thread.join(5)
+    assert index.is_backfilled()
+    assert [hit[0] for hit in hybrid_search(Collection(), "needle", dense, 3)] == ["d1", "old", "d2"]
+
+
+def test_search_limited_to_sources(index):
+    index.add(["a", "b", "c"], ["alpha one", "alpha two", "alpha three"], ["x.pdf", "y.pdf", None])
+    assert sorted(chunk_id for chunk_id, _ in index.search("alpha", 5, ["y.pdf", "x.pdf"])) == ["a", "b"]
+    assert index.search("alpha", 5, []) == []
+    assert len(index.search("alpha", 5)) == 3
+
+
+def test_index_without_sources_is_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setattr(lexical_module, "get_collection_dir", lambda name: str(tmp_path))
+    with sqlite3.connect(tmp_path / "lexical.db") as old:
+        old.execute("CREATE TABLE chunk_map (rowid INTEGER PRIMARY KEY, chunk_id TEXT UNIQUE NOT NULL)")
+        old.execute("CREATE TABLE index_meta (key TEXT PRIMARY KEY, value TEXT)")
+        old.execute("INSERT INTO index_meta VALUES ('backfilled', '1')")
+    index = LexicalIndex("test_collection")
+    assert index.count() == 0 and not index.is_backfilled()
+    index.close()
+
+
+def test_source_filter():
+    assert source_filter(None) is None
+    assert source_filter({"page": 3}) is None
+    assert source_filter({"source": "a.pdf"}) == ["a.pdf"]
+    assert source_filter({"$and": [{"source": {"$in": ["a.pdf", "b.pdf"]}}, {"page": {"$gte": 3}}]}) == ["a.pdf", "b.pdf"]
+    assert source_filter({"$and": [{"source": {"$in": ["a.pdf", "b.pdf"]}}, {"source": {"$eq": "c.pdf"}}]}) == []
+    assert source_filter({"source": {"$ne": "a.pdf"}}) is None
+    assert source_filter({"$or": [{"source": "a.pdf"}, {"source": "b.pdf"}]}) is None
+
+
+def test_lexical_candidates_search_deeper_until_enough_match(index):
+    index.add([f"c{i}" for i in range(40)], [f"needle {'needle ' * (40 - i)}" for i in range(40)])
+
+    class Collection:
+        calls = 0
+
+        def get(self, ids, where, include):
+            Collection.calls += 1
+            # Only every tenth chunk is on a page >= 3
+            kept = [chunk_id for chunk_id in ids if int(chunk_id[1:]) % 10 == 0]
+            return {"ids": kept, "documents": ["needle"] * len(kept), "metadatas": [{"page": 3}] * len(kept)}
+
+    known = {}
+    found = lexical_candidates(Collection(), index, "needle", 3, {"page": {"$gte": 3}}, known)
+    assert found == ["c0", "c10", "c20"]
+    assert set(known) == {"c0", "c10", "c20", "c30"}
+    assert Collection.calls == 3
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d"]])
+    assert fused[0][0] == "c"
+    assert [chunk_id for chunk_id, _ in fused] == ["c", "a", "b", "d"]
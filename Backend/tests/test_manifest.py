@@ -0,0 +1,80 @@
+import os
+import pytest
+from src.vectorstorage import manifest as manifest_module
+from src.vectorstorage.manifest import CollectionManifest
+
+
+@pytest.fixture
+def manifest(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest_module, "get_collection_dir", lambda name: str(tmp_path))
+    return CollectionManifest("test_collection")
+
+
+def write(path, text, mtime=None):
+    path.write_text(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_new_then_unchanged(manifest, tmp_path):
+    path = write(tmp_path / "a.txt", "hello")
+    status, info = manifest.check(path)
+    assert status == "new"
+    manifest.record(path, info, ["id-1"])
+    status, _ = manifest.check(path)
+    assert status == "unchanged"
+
+
+def test_touched_but_same_content_is_unchanged(manifest, tmp_path):
+    path = write(tmp_path / "a.txt", "hello", mtime=1000)
+    _, info = manifest.check(path)
+    manifest.record(path, info, ["id-1"])
+    write(tmp_path / "a.txt", "hello", mtime=2000)
+    status, _ = manifest.check(path)
+    assert status == "unchanged"
+
+
+def test_changed_content(manifest, tmp_path):
+    path = write(tmp_path / "a.txt", "hello", mtime=1000)
+    _, info = manifest.check(path)
+    manifest.record(path, info, ["id-1"])
+    write(tmp_path / "a.txt", "hello world", mtime=2000)
+    status, _ = manifest.check(path)
+    assert status == "changed"
+    assert manifest.chunk_ids(path) == ["id-1"]
+
+
+def test_missing_files_and_persistence(manifest, tmp_path):
+    path = write(tmp_path / "a.txt", "hello")
+    _, info = manifest.check(path)
+    manifest.record(path, info, ["id-1", "id-2"])
+    manifest.save()
+    os.remove(path)
+
+    reloaded = CollectionManifest("test_collection")
+    assert reloaded.missing_files() == [os.path.abspath(path)]
+    assert reloaded.remove(path) == ["id-1", "id-2"]
+    assert reloaded.missing_files() == []
+
+
+def test_missing_files_under_a_directory(manifest, tmp_path):
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs2").mkdir()
+    paths = [write(tmp_path / name, "hello") for name in ("docs/a.txt", "docs2/b.txt", "c.txt")]
+    for path in paths:
+        _, info = manifest.check(path)
+        manifest.record(path, info, [path])
+        os.remove(path)
+
+    assert manifest.missing_files(under=str(tmp_path / "docs")) == [os.path.abspath(paths[0])]
+    assert len(manifest.missing_files()) == 3
+
+
+def test_changed_metadata_is_reported(manifest, tmp_path):
+    path = write(tmp_path / "a.txt", "hello")
+    _, info = manifest.check(path, {"tag": "a"})
+    manifest.record(path, info, ["id-1"])
+    assert manifest.check(path, {"tag": "a"})[0] == "unchanged"
+    assert manifest.check(path, {"tag": "b"})[0] == "metadata_changed"
+    assert manifest.check(path)[0] == "metadata_changed"
@@ -0,0 +1,30 @@
+import numpy as np
+from src.vectorstorage.mmr import maximal_marginal_relevance, mmr_select
+
+
+def test_near_duplicates_are_skipped():
+    query = [1.0, 0.0]
+    candidates = [[1.0, 0.0], [0.999, 0.01], [0.7, 0.7]]
+    assert maximal_marginal_relevance(query, candidates, 2, lambda_mult=0.3) == [0, 2]
+
+
+def test_lambda_one_is_relevance_order():
+    query = [1.0, 0.0]
+    candidates = [[0.5, 0.5], [1.0, 0.0], [0.999, 0.01]]
+    assert maximal_marginal_relevance(query, candidates, 3, lambda_mult=1.0) == [1, 2, 0]
+
+
+def test_k_larger_than_candidates_and_empty():
+    assert sorted(maximal_marginal_relevance([1.0, 0.0], [[1.0, 0.0], [0.0, 1.0]], 5)) == [0, 1]
+    assert maximal_marginal_relevance([1.0, 0.0], [], 3) == []
+
+
+def test_mmr_select_loads_vectors_and_drops_missing_ids():
+    class Collection:
+        def get(self, ids, include):
+            stored = {"a": [1.0, 0.0], "b": [0.999, 0.01], "c": [0.7, 0.7]}
+            found = [i for i in ids if i in stored]
+            return {"ids": found, "embeddings": np.array([stored[i] for i in found])}
+
+    hits = [("a", "A", {}), ("b", "B", {}), ("gone", "G", {}), ("c", "C", {})]
+    assert [h[0] for h in mmr_select(Collection(), [1.0, 0.0], hits, 2, lambda_mult=0.3)] == ["a", "c"]
@@ -0,0 +1,34 @@
+import asyncio
+from src.data.dataIntake.fileTypes import loadX
+from src.data.dataIntake.fileTypes.loadX import PdfPageStream
+
+
+def fake_extract(file_path, start, end):
+    # Every third page is blank and gets dropped
+    return [(i, f"page {i}") for i in range(start, end) if i % 3]
+
+
+def collect(stream):
+    async def run():
+        return [doc async for doc in stream]
+    return asyncio.run(run())
+
+
+def test_streams_all_non_empty_pages(monkeypatch):
+    monkeypatch.setattr(loadX, "count_pdf_pages", lambda path: 23)
+    monkeypatch.setattr(loadX, "extract_pdf_pages", fake_extract)
+    stream = PdfPageStream("doc.pdf", pages_per_shard=5, workers=1)
+    docs = collect(stream)
+    assert sorted(doc.metadata["page"] for doc in docs) == [i for i in range(23) if i % 3]
+    assert all(doc.metadata["source"] == "doc.pdf" for doc in docs)
+    assert stream.fraction == 1.0 and stream.pages_yielded == len(docs)
+
+
+def test_load_pdf_with_chunk_size_returns_pages_in_order(monkeypatch, tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"%PDF")
+    monkeypatch.setattr(loadX, "count_pdf_pages", lambda path: 12)
+    monkeypatch.setattr(loadX, "extract_pdf_pages", fake_extract)
+    monkeypatch.setattr(loadX, "PDF_WORKERS", 1)
+    pages = asyncio.run(loadX.load_pdf(str(path), chunk_size=4))
+    assert [doc.metadata["page"] for doc in pages] == [i for i in range(12) if i % 3]
@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+from langchain_core.documents import Document
+from src.vectorstorage.embeddings import IngestProgress, embed_texts
+from src.vectorstorage.pipeline import IngestPipeline
+
+
+class LengthEmbeddings:
+    def embed_documents(self, texts):
+        return [[float(len(t))] for t in texts]
+
+
+def docs_of_lengths(lengths):
+    return [Document(page_content="x" * n, metadata={"source": str(i)}) for i, n in enumerate(lengths)]
+
+
+def test_embed_texts_returns_vectors_in_input_order():
+    docs = docs_of_lengths([50, 3, 20, 7])
+    assert embed_texts(LengthEmbeddings(), docs) == [[50.0], [3.0], [20.0], [7.0]]
+
+
+def test_bucketing_window_groups_similar_lengths():
+    pipeline = IngestPipeline(SimpleNamespace(embeddings=None), IngestProgress(), batch_size=2, bucket_window=3)
+    batches = pipeline._cut_batches(docs_of_lengths([100, 1, 90, 2, 80, 3]))
+    assert [[len(d.page_content) for d in b] for b in batches] == [[1, 2], [3, 80], [90, 100]]
+
+
+def test_window_of_one_keeps_arrival_order():
+    pipeline = IngestPipeline(SimpleNamespace(embeddings=None), IngestProgress(), batch_size=2, bucket_window=1)
+    batches = pipeline._cut_batches(docs_of_lengths([100, 1, 90]))
+    assert [[len(d.page_content) for d in b] for b in batches] == [[100, 1], [90]]
+
+
+class FakeSentenceTransformer:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, show_progress_bar=False, **kwargs):
+        import numpy as np
+        self.calls.append(kwargs)
+        return np.array([[float(len(t))] for t in texts])
+
+
+def test_embed_texts_sets_the_forward_batch_size():
+    client = FakeSentenceTransformer()
+    model = SimpleNamespace(_client=client, encode_kwargs={"normalize_embeddings": True}, embed_documents=None)
+    vectors = embed_texts(model, docs_of_lengths([5, 2, 9]), batch_size=3)
+    assert vectors == [[5.0], [2.0], [9.0]]
+    assert client.calls == [{"normalize_embeddings": True, "batch_size": 3}]
+
+
+def test_out_of_memory_falls_back_to_the_default_batch_size():
+    class OutOfMemory:
+        def encode(self, texts, show_progress_bar=False, **kwargs):
+            raise MemoryError()
+
+    model = SimpleNamespace(_client=OutOfMemory(), encode_kwargs={}, embed_documents=LengthEmbeddings().embed_documents)
+    assert embed_texts(model, docs_of_lengths([4, 1]), batch_size=2) == [[4.0], [1.0]]
@@ -0,0 +1,47 @@
+import time
+from src.vectorstorage.query_cache import QueryEmbeddingCache, normalize_query
+
+
+def test_normalized_queries_share_an_entry():
+    cache = QueryEmbeddingCache(max_entries=10, ttl=0)
+    calls = []
+
+    def embed(text):
+        calls.append(text)
+        return [1.0, 2.0, 3.0]
+
+    first = cache.get_or_compute("model", "What is  Notate?", embed)
+    second = cache.get_or_compute("model", " What is Notate? ", embed)
+    assert first == second == [1.0, 2.0, 3.0]
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_keys_include_model():
+    cache = QueryEmbeddingCache(max_entries=10, ttl=0)
+    cache.put("model-a", "query", [1.0])
+    assert cache.get("model-b", "query") is None
+    assert cache.get("model-a", "query") == [1.0]
+
+
+def test_lru_size_limit():
+    cache = QueryEmbeddingCache(max_entries=2, ttl=0)
+    cache.put("m", "a", [1.0])
+    cache.put("m", "b", [2.0])
+    cache.get("m", "a")
+    cache.put("m", "c", [3.0])
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == [1.0]
+
+
+def test_ttl_expiry():
+    cache = QueryEmbeddingCache(max_entries=10, ttl=0.01)
+    cache.put("m", "a", [1.0])
+    time.sleep(0.02)
+    assert cache.get("m", "a") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_normalize_query():
+    assert normalize_query("  foo\tbar\n") == "foo bar"
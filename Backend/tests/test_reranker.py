@@ -0,0 +1,66 @@
+import time
+from src.vectorstorage import reranker as reranker_module
+from src.vectorstorage.reranker import Reranker
+
+
+class LengthModel:
+    """Scores a passage by its length and records what it was asked to score."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs, batch_size, show_progress_bar):
+        self.calls.append(len(pairs))
+        return [len(passage) for _, passage in pairs]
+
+
+def make_reranker():
+    reranker = Reranker(model_name="fake")
+    reranker._model = LengthModel()
+    return reranker
+
+
+HITS = [("a", "x", {}), ("b", "xxx", {}), ("c", "xx", {})]
+
+
+def test_reorders_and_caches_scores():
+    reranker = make_reranker()
+    assert [h[0] for h in reranker.rerank("query", HITS, 2, budget_ms=0)] == ["b", "c"]
+    reranker.rerank("  query ", HITS, 2, budget_ms=0)
+    assert reranker._model.calls == [3]
+    assert reranker.stats()["cache_hits"] == 3
+
+
+def test_skips_when_budget_would_be_exceeded():
+    reranker = make_reranker()
+    reranker.ms_per_pair = 50.0
+    assert reranker.rerank("query", HITS, 2, budget_ms=100) == HITS[:2]
+    assert reranker._model.calls == []
+    assert reranker.stats()["skipped"] == 1
+
+
+def failed_reranker(seconds_ago):
+    reranker = Reranker(model_name="fake")
+    reranker._load_error = "download failed"
+    reranker._load_failed_at = time.monotonic() - seconds_ago
+    return reranker
+
+
+def test_skips_while_model_is_unavailable():
+    reranker = failed_reranker(0)
+    assert reranker.rerank("query", HITS, 2) == HITS[:2]
+    assert 0 < reranker.stats()["load_retry_in_s"] <= reranker_module.RERANK_RETRY_SECONDS
+
+
+def test_failed_load_is_retried_after_the_backoff():
+    reranker = failed_reranker(reranker_module.RERANK_RETRY_SECONDS + 1)
+    reranker._load = lambda: setattr(reranker, "_model", LengthModel())
+    assert reranker.load(wait=True)
+    assert reranker.stats()["load_error"] is None and reranker.stats()["load_retry_in_s"] is None
+
+
+def test_waiting_caller_retries_a_failed_load_at_once():
+    reranker = failed_reranker(0)
+    reranker._load = lambda: setattr(reranker, "_model", LengthModel())
+    assert not reranker.load()
+    assert reranker.load(wait=True)
@@ -0,0 +1,49 @@
+import random
+from src.data.dataIntake import textSplitting
+from src.data.dataIntake.fileTypes.loadX import TextWindowReader
+from src.data.dataIntake.textSplitting import normalize_whitespace, split_text, split_text_stream
+
+
+def _pieces(text, sizes):
+    start = 0
+    for size in sizes:
+        yield text[start:start + size]
+        start += size
+    yield text[start:]
+
+
+def test_normalize_whitespace_matches_split_join_across_pieces():
+    rng = random.Random(0)
+    text = "  lead\n\nword  split\tacross \n" + " ".join(rng.choice(["a", "bb", "ccc", " ", "\n"]) for _ in range(500)) + "  "
+    expected = " ".join(text.split())
+    for _ in range(50):
+        sizes = [rng.randint(0, 7) for _ in range(len(text) // 3)]
+        assert "".join(normalize_whitespace(_pieces(text, sizes))) == expected
+
+
+def test_split_text_stream_matches_split_text_chunk_sizes(monkeypatch):
+    monkeypatch.setattr(textSplitting, "STREAM_SPLIT_BUFFER", 2000)
+    rng = random.Random(1)
+    sentences = [" ".join(rng.choice(["alpha", "beta", "gamma", "delta"]) for _ in range(rng.randint(3, 30))) + ". "
+                 for _ in range(400)]
+    text = "".join(sentences)
+
+    streamed = list(split_text_stream(_pieces(text, [333] * (len(text) // 333)), "big.txt", {"tag": "x"}))
+    whole = split_text(text, "big.txt")
+
+    assert streamed
+    assert all(len(doc.page_content) <= 500 for doc in streamed)
+    assert all(doc.metadata == {"tag": "x", "source": "big.txt"} for doc in streamed)
+    # Every word survives, in order, apart from the overlap between neighbouring chunks
+    assert " ".join(doc.page_content for doc in streamed).count("alpha") >= text.count("alpha")
+    assert abs(len(streamed) - len(whole)) <= len(whole) // 10 + 1
+
+
+def test_window_reader_keeps_multibyte_characters_whole(tmp_path):
+    text = "naïve café – 日本語 " * 200
+    path = tmp_path / "utf8.txt"
+    path.write_text(text, encoding="utf-8")
+
+    reader = TextWindowReader(str(path), window_bytes=7)
+    assert "".join(reader) == text
+    assert reader.fraction == 1.0
@@ -0,0 +1,56 @@
+from src.endpoint import vectorQuery
+from src.endpoint.models import BatchVectorStoreQueryRequest
+from src.vectorstorage.query_cache import QueryEmbeddingCache
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+class FakeCollection:
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+
+    def query(self, query_embeddings, n_results, include, where=None):
+        self.calls += 1
+        return {
+            "ids": [[f"{self.name}-{int(v[0])}-{i}" for i in range(n_results)] for v in query_embeddings],
+            "documents": [[f"{self.name}-{int(v[0])}-{i}" for i in range(n_results)] for v in query_embeddings],
+            "metadatas": [[{"rank": i} for i in range(n_results)] for _ in query_embeddings],
+        }
+
+
+def test_batch_encodes_once_and_queries_once_per_collection(monkeypatch):
+    embeddings = CountingEmbeddings()
+    stores = {}
+
+    def fake_get_vectorstore(api_key, collection_name, is_local, model):
+        store = stores.setdefault(collection_name, type("Store", (), {})())
+        store.embeddings = embeddings
+        store._collection = getattr(store, "_collection", None) or FakeCollection(collection_name)
+        return store
+
+    monkeypatch.setattr(vectorQuery, "get_vectorstore", fake_get_vectorstore)
+    monkeypatch.setattr(vectorQuery, "collection_model_id", lambda *args: "model")
+    monkeypatch.setattr(vectorQuery, "query_cache", QueryEmbeddingCache())
+
+    request = BatchVectorStoreQueryRequest(queries={
+        "a": {"query": "one", "collection_name": "docs", "user": 1, "top_k": 1},
+        "b": {"query": "three", "collection_name": "docs", "user": 1, "top_k": 3},
+        "c": {"query": "one", "collection_name": "notes", "user": 1, "top_k": 2},
+    })
+    response = vectorQuery.query_vectorstore_batch(request)
+
+    assert response["status"] == "success"
+    assert list(response["results"]) == ["a", "b", "c"]
+    assert [len(response["results"][k]["results"]) for k in "abc"] == [1, 3, 2]
+    assert response["results"]["c"]["results"][0]["content"] == "notes-3-0"
+    # Duplicate query text across collections is encoded once, in a single model call
+    assert embeddings.calls == [["one", "three"]]
+    assert stores["docs"]._collection.calls == 1
@@ -0,0 +1,83 @@
+from src.vectorstorage import warmup as warmup_module
+from src.vectorstorage.warmup import CollectionUsage, Warmup, WarmupTarget, select_targets
+
+
+def test_select_targets_orders_configured_then_recent_then_newest():
+    rows = [WarmupTarget("newest", 1, False), WarmupTarget("older", 1, True, "model-a")]
+    targets = select_targets(rows, recent=["older"], configured=["pinned"], limit=3)
+    assert [t.name for t in targets] == ["pinned", "older", "newest"]
+    assert targets[1].local_embedding_model == "model-a"
+    assert select_targets(rows, recent=[], configured=[], limit=1) == [rows[0]]
+
+
+def test_collection_usage_persists_most_recent(tmp_path):
+    path = str(tmp_path / "usage.json")
+    usage = CollectionUsage(path)
+    usage.record("a")
+    usage.record("b")
+    usage.flush()
+    assert CollectionUsage(path).most_recent() == ["b", "a"]
+    usage.forget("b")
+    assert CollectionUsage(path).most_recent() == ["a"]
+
+
+class FakeCollection:
+    def __init__(self):
+        self.queries = []
+
+    def get(self, limit, include):
+        return {"ids": ["c1"], "embeddings": [[0.1, 0.2]]}
+
+    def query(self, query_embeddings, n_results, include):
+        self.queries.append(query_embeddings)
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.encoded = []
+
+    def embed_query(self, text):
+        self.encoded.append(text)
+        return [0.0, 1.0]
+
+
+class FakeVectorstore:
+    def __init__(self):
+        self.embeddings = FakeEmbeddings()
+        self._collection = FakeCollection()
+
+
+class FakeClient:
+    def list_collections(self):
+        return ["docs", "remote"]
+
+
+class FakeManager:
+    def get_client(self):
+        return FakeClient()
+
+
+def test_warmup_loads_models_and_touches_index(monkeypatch, tmp_path):
+    stores = {}
+
+    def fake_get_vectorstore(api_key, name, is_local, **kwargs):
+        stores[name] = FakeVectorstore()
+        return stores[name]
+
+    monkeypatch.setattr(warmup_module, "chroma_manager", FakeManager())
+    monkeypatch.setattr(warmup_module, "get_vectorstore", fake_get_vectorstore)
+    monkeypatch.setattr(warmup_module, "get_llm_api_key", lambda user_id, provider: None)
+    monkeypatch.setattr(warmup_module, "get_collection_dir", lambda name: str(tmp_path))
+
+    warmup = Warmup()
+    warmup.start([WarmupTarget("docs"), WarmupTarget("remote", 1, False), WarmupTarget("gone")])
+    warmup._thread.join(timeout=5)
+
+    status = warmup.status()
+    assert status["ready"] and status["progress"] == 1.0
+    assert status["collections"]["docs"]["status"] == "ready"
+    assert status["collections"]["docs"]["steps_done"] == ["embedding_model", "collection", "index"]
+    assert status["collections"]["remote"]["status"] == "skipped"
+    assert status["collections"]["gone"]["status"] == "skipped"
+    assert stores["docs"].embeddings.encoded == ["warmup"]
+    assert stores["docs"]._collection.queries == [[[0.1, 0.2]]]
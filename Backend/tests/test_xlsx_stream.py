@@ -0,0 +1,38 @@
+from openpyxl import Workbook
+from src.data.dataIntake.fileTypes.loadX import XlsxDocumentStream
+
+
+def test_every_sheet_is_streamed_with_row_ranges(tmp_path):
+    workbook = Workbook()
+    first = workbook.active
+    first.title = "Orders"
+    first.append(["id", "item", "note"])
+    for i in range(200):
+        first.append([i, f"item {i}", "with, comma" if i == 5 else None])
+    workbook.create_sheet("Empty")
+    third = workbook.create_sheet("Totals")
+    third.append([None])
+    third.append(["region", "total"])
+    third.append(["north", 10])
+    third.append([None, None])
+    third.append(["south", 7])
+    path = tmp_path / "book.xlsx"
+    workbook.save(path)
+
+    stream = XlsxDocumentStream(str(path), {"tag": "t"}, target_chars=300)
+    docs = list(stream)
+
+    orders = [doc for doc in docs if doc.metadata["sheet"] == "Orders"]
+    assert len(orders) > 1
+    assert all(doc.page_content.startswith("Sheet: Orders\nid,item,note\n") for doc in orders)
+    assert all(len(doc.page_content) <= 300 for doc in orders)
+    assert orders[0].metadata["row_start"] == 2 and orders[-1].metadata["row_end"] == 201
+    assert [d.metadata["row_start"] for d in orders[1:]] == [d.metadata["row_end"] + 1 for d in orders[:-1]]
+    assert '5,item 5,"with, comma"' in orders[0].page_content
+    assert orders[0].metadata["tag"] == "t" and orders[0].metadata["source"] == str(path)
+
+    totals = [doc for doc in docs if doc.metadata["sheet"] == "Totals"]
+    assert len(totals) == 1
+    assert totals[0].page_content == "Sheet: Totals\nregion,total\nnorth,10\nsouth,7"
+    assert (totals[0].metadata["row_start"], totals[0].metadata["row_end"]) == (3, 5)
+    assert stream.rows_read == 202 and stream.fraction == 1.0
@@ -0,0 +1,43 @@
+"""
+Export a collection to a single archive, or import one, without running any
+embedding model.
+
+The archive is an uncompressed tar of manifest.json, vectors.npy and
+records.parquet (IDs, documents, metadata). Import maps vectors.npy directly
+out of the archive and bulk-loads it into Chroma, then rebuilds the
+collection's lexical index from the documents.
+
+Run it while the server is stopped, or use the /export-collection and
+/import-collection endpoints instead: Chroma's persistent store isn't safe to
+write from two processes.
+
+Usage (from Backend/):
+    python -m tools.collection_archive export --collection my_collection --out my_collection.tar
+    python -m tools.collection_archive import --archive my_collection.tar [--collection new_name] [--replace]
+"""
+from src.vectorstorage.collection_archive import export_collection, import_collection
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export")
+    export_parser.add_argument("--collection", required=True)
+    export_parser.add_argument("--out", required=True)
+    import_parser = commands.add_parser("import")
+    import_parser.add_argument("--archive", required=True)
+    import_parser.add_argument("--collection", default=None, help="defaults to the exported collection's name")
+    import_parser.add_argument("--replace", action="store_true", help="replace an existing non-empty collection")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        manifest = export_collection(args.collection, args.out)
+        print(f"Exported {manifest['count']} rows ({manifest['dim']}d {manifest['vector_dtype']}) to {args.out}")
+    else:
+        result = import_collection(args.archive, args.collection, args.replace)
+        print(f"Imported {result['count']} rows into {result['collection_name']} in {result['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
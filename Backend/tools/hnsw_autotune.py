@@ -0,0 +1,161 @@
+"""
+HNSW parameter autotune for a collection.
+
+Reads a sample of the collection's stored vectors, uses some of them as
+queries and, for a grid of M / construction_ef / search_ef, builds the same
+HNSW index Chroma uses (hnswlib) over the sample and measures recall@k
+against exact search and single-query p50/p99 latency. The collection's
+current query latency through Chroma is reported as a baseline. No
+embedding model is loaded.
+
+The recommendation is the lowest-p99 setting that reaches --target-recall
+(ties go to the smaller, cheaper-to-build index). With --apply it is stored
+in the collection's settings: search_ef takes effect when Chroma next loads
+the index, M and construction_ef when the index is rebuilt (new or
+compacted collection).
+
+Recall at a given setting drops as the index grows, so a sample much
+smaller than the collection gives optimistic numbers; raise --sample for
+large collections.
+
+Usage (from Backend/):
+    python -m tools.hnsw_autotune --collection my_collection --top-k 10 --target-recall 0.95 [--apply]
+"""
+from src.vectorstorage.vectorstore import chroma_manager
+from src.vectorstorage.collection_config import get_collection_config, save_collection_config
+from tools.vector_storage_report import load_vectors, recall
+from dataclasses import replace
+import numpy as np
+import argparse
+import hnswlib
+import time
+
+DEFAULT_M = 16
+DEFAULT_CONSTRUCTION_EF = 100
+DEFAULT_SEARCH_EF = 10
+
+
+def exact_top_k(vectors: np.ndarray, query_rows: np.ndarray, k: int, space: str) -> np.ndarray:
+    """Exact top-k under the collection's distance, never returning the query's own row."""
+    queries = vectors[query_rows]
+    if space == "cosine":
+        normalized = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        distances = -(normalized[query_rows] @ normalized.T)
+    elif space == "ip":
+        distances = -(queries @ vectors.T)
+    else:
+        distances = (queries ** 2).sum(axis=1, keepdims=True) - 2 * queries @ vectors.T + (vectors ** 2).sum(axis=1)
+    distances[np.arange(len(query_rows)), query_rows] = np.inf
+    candidates = np.argpartition(distances, k, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(distances, candidates, axis=1), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def percentiles(latencies_ms):
+    return float(np.percentile(latencies_ms, 50)), float(np.percentile(latencies_ms, 99))
+
+
+def build_index(vectors: np.ndarray, space: str, m: int, construction_ef: int):
+    index = hnswlib.Index(space=space, dim=vectors.shape[1])
+    index.init_index(max_elements=len(vectors), ef_construction=construction_ef, M=m, random_seed=0)
+    index.add_items(vectors, np.arange(len(vectors)), num_threads=-1)
+    # Queries are measured one at a time, as the server runs them
+    index.set_num_threads(1)
+    return index
+
+
+def measure(index, vectors: np.ndarray, query_rows: np.ndarray, k: int, search_ef: int):
+    """(found rows, per-query latencies in ms) for k neighbours excluding the query itself."""
+    index.set_ef(max(search_ef, k + 1))
+    found, latencies = [], []
+    for row in query_rows:
+        start = time.perf_counter()
+        labels, _ = index.knn_query(vectors[row:row + 1], k=k + 1)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append([label for label in labels[0] if label != row][:k])
+    return np.asarray(found), latencies
+
+
+def chroma_baseline(collection, vectors: np.ndarray, query_rows: np.ndarray, k: int):
+    latencies = []
+    for row in query_rows:
+        start = time.perf_counter()
+        collection.query(query_embeddings=[vectors[row].tolist()], n_results=k + 1, include=[])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return percentiles(latencies)
+
+
+def recommend(results, target_recall: float):
+    """Lowest p99 among settings reaching the target, else the best recall."""
+    good = [r for r in results if r["recall"] >= target_recall]
+    if good:
+        return min(good, key=lambda r: (round(r["p99"], 2), r["m"], r["construction_ef"], r["search_ef"]))
+    return max(results, key=lambda r: (r["recall"], -r["p99"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", required=True)
+    parser.add_argument("--sample", type=int, default=50000, help="stored vectors to build test indexes from")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--m", default="8,16,32,48", help="comma-separated M values")
+    parser.add_argument("--construction-ef", default="100,200,400", help="comma-separated construction_ef values")
+    parser.add_argument("--search-ef", default="10,20,40,80,160,320", help="comma-separated search_ef values")
+    parser.add_argument("--apply", action="store_true", help="store the recommendation in the collection settings")
+    args = parser.parse_args()
+
+    collection = chroma_manager.get_client().get_collection(args.collection)
+    space = (collection.metadata or {}).get("hnsw:space", "l2")
+    total = collection.count()
+    vectors = load_vectors(collection, min(args.sample, total))
+    if len(vectors) <= args.top_k + 1:
+        raise SystemExit(f"{args.collection} has too few vectors ({len(vectors)}) for top-{args.top_k}")
+
+    rng = np.random.default_rng(0)
+    query_rows = rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+    truth = exact_top_k(vectors, query_rows, args.top_k, space)
+
+    config = get_collection_config(args.collection)
+    metadata = collection.metadata or {}
+    current = (metadata.get("hnsw:M", DEFAULT_M), metadata.get("hnsw:construction_ef", DEFAULT_CONSTRUCTION_EF),
+               metadata.get("hnsw:search_ef", DEFAULT_SEARCH_EF))
+    p50, p99 = chroma_baseline(collection, vectors, query_rows, args.top_k)
+    print(f"{args.collection}: {total} vectors, {vectors.shape[1]}d, space {space}, "
+          f"evaluated on {len(vectors)} with {len(query_rows)} queries")
+    print(f"Current Chroma query latency (M={current[0]} construction_ef={current[1]} search_ef={current[2]}): "
+          f"p50 {p50:.2f}ms p99 {p99:.2f}ms")
+
+    results = []
+    print(f"{'M':>4} {'constr_ef':>9} {'search_ef':>9} {'build s':>8} {'recall@' + str(args.top_k):>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for m in [int(v) for v in args.m.split(",")]:
+        for construction_ef in [int(v) for v in args.construction_ef.split(",")]:
+            start = time.perf_counter()
+            index = build_index(vectors, space, m, construction_ef)
+            build_seconds = time.perf_counter() - start
+            for search_ef in [int(v) for v in args.search_ef.split(",")]:
+                found, latencies = measure(index, vectors, query_rows, args.top_k, search_ef)
+                p50, p99 = percentiles(latencies)
+                result = {"m": m, "construction_ef": construction_ef, "search_ef": search_ef,
+                          "recall": recall(truth, found), "p50": p50, "p99": p99}
+                results.append(result)
+                print(f"{m:>4} {construction_ef:>9} {search_ef:>9} {build_seconds:>8.1f} "
+                      f"{result['recall']:>10.4f} {p50:>8.3f} {p99:>8.3f}")
+
+    best = recommend(results, args.target_recall)
+    reached = "reaches" if best["recall"] >= args.target_recall else "is the closest to"
+    print(f"Recommended: M={best['m']} construction_ef={best['construction_ef']} search_ef={best['search_ef']} "
+          f"(recall {best['recall']:.4f}, p99 {best['p99']:.3f}ms) {reached} target recall {args.target_recall}")
+
+    if args.apply:
+        save_collection_config(args.collection, replace(
+            config, hnsw_m=best["m"], hnsw_construction_ef=best["construction_ef"], hnsw_search_ef=best["search_ef"]))
+        if chroma_manager.update_hnsw_metadata(args.collection, {"hnsw:search_ef": best["search_ef"]}):
+            print("Applied search_ef; it takes effect when the collection is next loaded")
+        if (best["m"], best["construction_ef"]) != current[:2]:
+            print("Stored M and construction_ef; they take effect when the index is rebuilt")
+
+
+if __name__ == "__main__":
+    main()
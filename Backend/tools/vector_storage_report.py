@@ -0,0 +1,103 @@
+"""
+Recall-vs-size report for a collection's vector storage settings.
+
+Reads a sample of the collection's stored vectors, uses some of them as
+queries and measures how well exact top-k search over truncated (Matryoshka)
+vectors reproduces top-k over the full-width vectors.
+No embedding model is loaded. Search is brute force, so the numbers isolate the
+storage setting from HNSW approximation.
+
+"vectors MB" is the float32 payload of the whole collection at each width
+(what Chroma stores per vector). The header also reports the collection's
+measured size on disk: its HNSW index directory and the shared Chroma store.
+
+Truncation is only meaningful for Matryoshka-trained models; for other models
+recall drops off sharply below full width.
+
+Usage (from Backend/):
+    python -m tools.vector_storage_report --collection my_collection --dims 896,512,256,128
+"""
+from src.vectorstorage.vectorstore import chroma_manager, chroma_db_path
+from src.vectorstorage.compaction import dir_size
+from src.vectorstorage.collection_config import get_collection_config
+from src.vectorstorage.compact_embeddings import compact_vectors
+import numpy as np
+import argparse
+import sqlite3
+import os
+
+
+def load_vectors(collection, limit: int, page: int = 5000) -> np.ndarray:
+    vectors = []
+    for offset in range(0, limit, page):
+        batch = collection.get(include=["embeddings"], limit=min(page, limit - offset), offset=offset)
+        if len(batch["embeddings"]) == 0:
+            break
+        vectors.append(np.asarray(batch["embeddings"], dtype=np.float32))
+    return np.concatenate(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+
+
+def index_dir_bytes(collection) -> int:
+    """Measured size of the collection's HNSW index directory (0 if not yet persisted)."""
+    db_path = os.path.join(chroma_db_path, "chroma.sqlite3")
+    with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) as db:
+        rows = db.execute("SELECT id FROM segments WHERE collection = ? AND scope = 'VECTOR'", (str(collection.id),)).fetchall()
+    return sum(dir_size(os.path.join(chroma_db_path, segment_id)) for (segment_id,) in rows)
+
+
+def top_k(database: np.ndarray, queries: np.ndarray, query_rows: np.ndarray, k: int) -> np.ndarray:
+    """Exact top-k by cosine similarity, never returning the query's own row."""
+    database = database / np.maximum(np.linalg.norm(database, axis=1, keepdims=True), 1e-12)
+    queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    scores = queries @ database.T
+    scores[np.arange(len(query_rows)), query_rows] = -np.inf
+    candidates = np.argpartition(-scores, k, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def recall(truth: np.ndarray, found: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(t) & set(f)) / k for t, f in zip(truth, found)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", required=True)
+    parser.add_argument("--sample", type=int, default=20000, help="stored vectors to evaluate against")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--dims", default=None, help="comma-separated dimensions, default full, 1/2, 1/4, 1/8")
+    args = parser.parse_args()
+
+    collection = chroma_manager.get_collection(args.collection)
+    total = collection.count()
+    vectors = load_vectors(collection, min(args.sample, total))
+    if len(vectors) <= args.top_k:
+        raise SystemExit(f"{args.collection} has too few vectors ({len(vectors)}) for top-{args.top_k}")
+
+    config = get_collection_config(args.collection)
+    full_dim = vectors.shape[1]
+    if config.embedding_dim:
+        print(f"Note: {args.collection} already stores {full_dim}d vectors, "
+              f"recall is relative to that, not to the model's full output")
+    dims = [int(d) for d in args.dims.split(",")] if args.dims else [full_dim, full_dim // 2, full_dim // 4, full_dim // 8]
+    dims = [d for d in dims if 0 < d <= full_dim]
+
+    rng = np.random.default_rng(0)
+    query_rows = rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+    truth = top_k(vectors, vectors[query_rows], query_rows, args.top_k)
+
+    print(f"{args.collection}: {total} vectors, {full_dim}d stored, evaluated on {len(vectors)} with {len(query_rows)} queries")
+    print(f"On disk: index {index_dir_bytes(collection) / (1024 * 1024):.1f}MB, "
+          f"Chroma store (all collections) {dir_size(chroma_db_path) / (1024 * 1024):.1f}MB")
+    print(f"{'dim':>6} {'recall@' + str(args.top_k):>10} {'vectors MB':>11}")
+    for dim in dims:
+        compacted = compact_vectors(vectors, dim)
+        found = top_k(compacted, compacted[query_rows], query_rows, args.top_k)
+        vectors_mb = total * dim * 4 / (1024 * 1024)
+        print(f"{dim:>6} {recall(truth, found):>10.4f} {vectors_mb:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()